@@ -0,0 +1 @@
+"""Performance benchmarks (python -m benchmarks.bench); see bench.py."""
@@ -0,0 +1,319 @@
+"""Benchmark runner and baseline comparison.
+
+    python -m benchmarks.bench run [--sizes 10,1000,100000] [-o results.json]
+    python -m benchmarks.bench compare baseline.json results.json [--threshold 0.2]
+
+run generates synthetic sources (benchmarks.synthetic) per size and times
+each case: source parsing, Claude/Copilot generate and diff, selective
+merge, and end-to-end CLI generate -w / diff in a subprocess. Library cases
+report the best of --repeat timings and the peak traced allocation of one
+extra run under tracemalloc (kept apart so tracing does not skew the
+timings); CLI cases report the child's wall time and peak RSS.
+
+A CLI case whose child exits non-zero is recorded with an "error" (exit
+code and the end of its stderr) and makes run exit 1: its timing is that of
+a crash, not of the work.
+
+compare matches cases by (case, rules) and exits 1 if any got slower or
+bigger than the baseline by more than the threshold, or errored. Changes
+below a noise floor (--min-seconds) are not counted; cases that errored in
+the baseline have nothing to compare against and are skipped.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from benchmarks.synthetic import write_sources
+
+DEFAULT_SIZES = (10, 100, 1_000, 10_000, 100_000)
+DEFAULT_THRESHOLD = 0.20
+DEFAULT_MIN_SECONDS = 0.005
+
+# End-to-end runs: the installed entry point, without the console script shim
+_CLI = "from twsrt.bin.fast import main; main()"
+
+
+def run(sizes: list[int], repeat: int, seed: int, cli: bool) -> dict[str, Any]:
+    """Time every case at every size; the results document."""
+    from twsrt import __version__
+    from twsrt.lib import diagnostics
+
+    results: list[dict[str, Any]] = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory(prefix="twsrt-bench-") as tmp:
+            workspace = _Workspace(Path(tmp), size, seed)
+            # Collected, not printed: notices would interleave with progress
+            with diagnostics.collect():
+                for case, fn in workspace.cases():
+                    results.append(_measure(case, size, fn, repeat))
+                    _progress(results[-1])
+            if cli:
+                for case, args in workspace.cli_cases():
+                    results.append(_measure_cli(case, size, args, workspace.env))
+                    _progress(results[-1])
+    return {
+        "meta": {
+            "twsrt": __version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "seed": seed,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(
+    baseline: dict[str, Any],
+    current: dict[str, Any],
+    threshold: float = DEFAULT_THRESHOLD,
+    min_seconds: float = DEFAULT_MIN_SECONDS,
+) -> list[dict[str, Any]]:
+    """One row per case present in both; "regressed" lists what got worse."""
+    base = {(r["case"], r["rules"]): r for r in baseline["results"]}
+    rows: list[dict[str, Any]] = []
+    for result in current["results"]:
+        old = base.get((result["case"], result["rules"]))
+        if old is None or old.get("error"):
+            continue
+        regressed: list[str] = []
+        if result.get("error"):
+            regressed.append("error")
+        elif (
+            result["seconds"] > old["seconds"] * (1 + threshold)
+            and result["seconds"] - old["seconds"] > min_seconds
+        ):
+            regressed.append("time")
+        if (
+            not result.get("error")
+            and old.get("peak_bytes")
+            and result.get("peak_bytes")
+            and result["peak_bytes"] > old["peak_bytes"] * (1 + threshold)
+        ):
+            regressed.append("memory")
+        rows.append(
+            {
+                "case": result["case"],
+                "rules": result["rules"],
+                "seconds": (old["seconds"], result["seconds"]),
+                "peak_bytes": (old.get("peak_bytes"), result.get("peak_bytes")),
+                "regressed": regressed,
+            }
+        )
+    return rows
+
+
+class _Workspace:
+    """Sources, config and targets of one size in a temp dir."""
+
+    def __init__(self, root: Path, size: int, seed: int) -> None:
+        from twsrt.lib.config import load_config
+
+        self.root = root
+        self.srt_path, self.bash_path = write_sources(root / "sources", size, seed)
+        self.claude_target = root / "home" / ".claude" / "settings.full.json"
+        self.copilot_target = root / "home" / "copilot-flags.txt"
+        self.config_path = root / "config.toml"
+        self.config_path.write_text(
+            f'[sources]\nsrt = "{self.srt_path}"\nbash_rules = "{self.bash_path}"\n'
+            f'[targets]\nclaude_settings = "{self.claude_target}"\n'
+            f'copilot_output = "{self.copilot_target}"\n'
+        )
+        self.config = load_config(self.config_path)
+        self.env = {
+            **os.environ,
+            "HOME": str(root / "home"),
+            "TWSRT_CACHE_DIR": str(root / "cache"),
+            "TWSRT_HISTORY_DIR": str(root / "history"),
+        }
+
+    def cases(self) -> list[tuple[str, Callable[[], Any]]]:
+        from twsrt.lib.claude import ClaudeGenerator, selective_merge
+        from twsrt.lib.copilot import CopilotGenerator
+        from twsrt.lib.sources import load_sources, read_bash_rules, read_srt
+
+        config = self.config
+        rules = load_sources(config)
+        claude, copilot = ClaudeGenerator(), CopilotGenerator()
+
+        # Targets to diff and merge against: generated, plus hand-kept entries
+        settings = claude.build(rules, config)
+        existing = json.loads(json.dumps(settings))
+        existing["permissions"]["allow"].append("Bash(make test)")
+        existing["hooks"] = {"PreToolUse": []}
+        self.claude_target.parent.mkdir(parents=True, exist_ok=True)
+        self.claude_target.write_text(json.dumps(existing, indent=2))
+        self.copilot_target.write_text(copilot.generate(rules, config) + "\n")
+
+        return [
+            ("read_srt", lambda: read_srt(self.srt_path)),
+            ("read_bash_rules", lambda: read_bash_rules(self.bash_path)),
+            ("claude.generate", lambda: claude.generate(rules, config)),
+            ("claude.diff", lambda: claude.diff(rules, self.claude_target, config)),
+            ("copilot.generate", lambda: copilot.generate(rules, config)),
+            (
+                "copilot.diff",
+                lambda: copilot.diff(rules, self.copilot_target, config),
+            ),
+            (
+                "selective_merge",
+                lambda: selective_merge(self.claude_target, settings),
+            ),
+        ]
+
+    def cli_cases(self) -> list[tuple[str, list[str]]]:
+        base = ["-c", str(self.config_path)]
+        return [
+            ("cli.generate", [*base, "generate", "-w", "--no-cache"]),
+            ("cli.diff", [*base, "diff", "--no-cache"]),
+        ]
+
+
+def _measure(case: str, size: int, fn: Callable[[], Any], repeat: int) -> dict:
+    timings: list[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "case": case,
+        "rules": size,
+        "seconds": min(timings),
+        "median": statistics.median(timings),
+        "peak_bytes": peak,
+    }
+
+
+def _measure_cli(case: str, size: int, args: list[str], env: dict) -> dict:
+    # stderr to a file, not a pipe: wait4 does not drain pipes
+    with tempfile.TemporaryFile() as stderr:
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, "-c", _CLI, *args],
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=stderr,
+        )
+        peak = None
+        if hasattr(os, "wait4"):
+            _, status, usage = os.wait4(process.pid, 0)
+            process.returncode = os.waitstatus_to_exitcode(status)
+            # ru_maxrss: KiB on Linux, bytes on macOS
+            peak = usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+        else:
+            process.wait()
+        seconds = time.perf_counter() - start
+        stderr.seek(0)
+        output = stderr.read().decode(errors="replace")
+    result = {
+        "case": case,
+        "rules": size,
+        "seconds": seconds,
+        "median": seconds,
+        "peak_bytes": peak,
+        "exit_code": process.returncode,
+    }
+    if process.returncode != 0:
+        tail = output.strip().splitlines()[-3:]
+        result["error"] = f"exit code {process.returncode}: " + " / ".join(tail)
+    return result
+
+
+def _progress(result: dict) -> None:
+    peak = result["peak_bytes"]
+    memory = f"{peak / 2**20:9.1f} MiB" if peak else " " * 13
+    error = f"  ERROR ({result['error']})" if result.get("error") else ""
+    print(
+        f"{result['case']:<18} {result['rules']:>9} rules "
+        f"{result['seconds'] * 1000:10.2f} ms {memory}{error}",
+        file=sys.stderr,
+    )
+
+
+def _print_comparison(rows: list[dict[str, Any]]) -> None:
+    for row in rows:
+        (old_s, new_s), (old_b, new_b) = row["seconds"], row["peak_bytes"]
+        change = (new_s / old_s - 1) * 100 if old_s else 0.0
+        memory = ""
+        if old_b and new_b:
+            memory = f"  mem {(new_b / old_b - 1) * 100:+6.1f}%"
+        flag = (
+            f"  REGRESSED ({', '.join(row['regressed'])})" if row["regressed"] else ""
+        )
+        print(
+            f"{row['case']:<18} {row['rules']:>9} rules "
+            f"{old_s * 1000:10.2f} → {new_s * 1000:10.2f} ms {change:+6.1f}%"
+            f"{memory}{flag}"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the benchmarks")
+    run_parser.add_argument(
+        "--sizes",
+        default=",".join(map(str, DEFAULT_SIZES)),
+        help="Comma-separated rule counts (up to 1000000)",
+    )
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument(
+        "--no-cli", action="store_true", help="Skip the end-to-end CLI runs"
+    )
+    run_parser.add_argument("-o", "--output", type=Path, default=Path("results.json"))
+
+    compare_parser = commands.add_parser("compare", help="Compare against a baseline")
+    compare_parser.add_argument("baseline", type=Path)
+    compare_parser.add_argument("results", type=Path)
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    compare_parser.add_argument(
+        "--min-seconds", type=float, default=DEFAULT_MIN_SECONDS
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        sizes = [int(s.replace("_", "")) for s in args.sizes.split(",") if s]
+        document = run(sizes, args.repeat, args.seed, cli=not args.no_cli)
+        args.output.write_text(json.dumps(document, indent=2) + "\n")
+        print(f"Wrote: {args.output}", file=sys.stderr)
+        errors = [r for r in document["results"] if r.get("error")]
+        if errors:
+            print(f"{len(errors)} case(s) errored", file=sys.stderr)
+            return 1
+        return 0
+
+    rows = compare(
+        json.loads(args.baseline.read_text()),
+        json.loads(args.results.read_text()),
+        args.threshold,
+        args.min_seconds,
+    )
+    _print_comparison(rows)
+    regressions = [row for row in rows if row["regressed"]]
+    print(f"{len(regressions)} regression(s) in {len(rows)} cases")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
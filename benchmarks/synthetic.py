@@ -0,0 +1,151 @@
+"""Deterministic synthetic SRT and bash-rules sources of any size.
+
+The same (rules, seed) always gives byte-identical files, so results of
+different runs and machines measure the same input. Rule kinds follow the
+mix of real policies: mostly network allows, a fair share of file denies
+and bash rules, few write allows and denied domains.
+
+Domains are drawn from a Zipf-like vocabulary (a few very common
+organisations, a long tail) as exact hosts or '*.' wildcards; paths are
+home dotfiles, project trees and glob patterns, with or without '~'.
+Every entry is unique within its list.
+"""
+
+import itertools
+import json
+import random
+from pathlib import Path
+
+# Share of the rules per (section, key); the rest of the rule count is
+# distributed in this order
+MIX = (
+    ("network", "allowedDomains", 0.40),
+    ("network", "deniedDomains", 0.05),
+    ("filesystem", "denyRead", 0.15),
+    ("filesystem", "denyWrite", 0.10),
+    ("filesystem", "allowWrite", 0.05),
+    ("bash", "deny", 0.18),
+    ("bash", "ask", 0.07),
+)
+
+_ORGS = (
+    "github", "npmjs", "pypi", "google", "amazonaws", "cloudflare", "docker",
+    "microsoft", "anthropic", "gitlab", "atlassian", "slack", "sentry",
+    "datadoghq", "fastly", "akamai", "jsdelivr", "unpkg", "rust-lang", "golang",
+)  # fmt: skip
+_SUBDOMAINS = ("api", "www", "cdn", "registry", "files", "raw", "auth", "static")
+_TLDS = ("com", "org", "io", "net", "dev", "co.uk", "de", "cloud")
+_DOTFILES = (
+    ".aws", ".ssh", ".gnupg", ".kube", ".docker", ".netrc", ".npmrc", ".pypirc",
+    ".config/gh", ".config/gcloud", ".azure", ".terraform.d", ".vault-token",
+)  # fmt: skip
+_DIRS = ("src", "build", "dist", "secrets", "certs", "infra", "deploy", "data")
+_EXTENSIONS = ("pem", "key", "env", "p12", "crt", "tfstate", "kdbx", "json")
+_COMMANDS = (
+    "rm", "dd", "mkfs", "sudo", "chmod", "chown", "curl", "wget", "ssh", "scp",
+    "git push", "git reset", "docker run", "kubectl delete", "terraform apply",
+    "npm publish", "pip install", "shutdown", "reboot", "kill",
+)  # fmt: skip
+
+
+def make_sources(rules: int, seed: int = 0) -> tuple[dict, dict]:
+    """(SRT settings, bash rules) with `rules` rules in total."""
+    rng = random.Random(f"{seed}:{rules}")
+    counts = _split(rules)
+    srt: dict = {"network": {}, "filesystem": {}}
+    bash: dict = {}
+    for (section, key, _), count in zip(MIX, counts):
+        make = {
+            "allowedDomains": _domain,
+            "deniedDomains": _domain,
+            "denyRead": _path,
+            "denyWrite": _path,
+            "allowWrite": _path,
+            "deny": _command,
+            "ask": _command,
+        }[key]
+        entries = _unique(rng, make, count)
+        if section == "bash":
+            bash[key] = entries
+        else:
+            srt[section][key] = entries
+    srt["network"]["httpProxyPort"] = 3128
+    srt["filesystem"].setdefault("denyRead", [])
+    bash.setdefault("deny", [])
+    bash.setdefault("ask", [])
+    return srt, bash
+
+
+def write_sources(directory: Path, rules: int, seed: int = 0) -> tuple[Path, Path]:
+    """Write srt.json and bash-rules.json below directory; returns their paths."""
+    srt, bash = make_sources(rules, seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    srt_path = directory / "srt.json"
+    bash_path = directory / "bash-rules.json"
+    srt_path.write_text(json.dumps(srt, indent=2) + "\n")
+    bash_path.write_text(json.dumps(bash, indent=2) + "\n")
+    return srt_path, bash_path
+
+
+def _split(rules: int) -> list[int]:
+    counts = [int(rules * share) for _, _, share in MIX]
+    for i in range(rules - sum(counts)):
+        counts[i % len(counts)] += 1
+    return counts
+
+
+def _unique(rng: random.Random, make, count: int) -> list[str]:
+    """count distinct entries; repeats get a numeric component to stay unique."""
+    seen: set[str] = set()
+    entries: list[str] = []
+    while len(entries) < count:
+        entry = make(rng, len(entries))
+        if entry in seen:
+            entry = make(rng, len(entries), unique=True)
+        if entry not in seen:
+            seen.add(entry)
+            entries.append(entry)
+    return entries
+
+
+_CUM_WEIGHTS: dict[int, list[float]] = {}
+
+
+def _zipf(rng: random.Random, items: tuple[str, ...]) -> str:
+    """Item i drawn with weight 1/(i+1)."""
+    cum = _CUM_WEIGHTS.get(len(items))
+    if cum is None:
+        cum = _CUM_WEIGHTS[len(items)] = list(
+            itertools.accumulate(1 / (i + 1) for i in range(len(items)))
+        )
+    return rng.choices(items, cum_weights=cum)[0]
+
+
+def _domain(rng: random.Random, n: int, unique: bool = False) -> str:
+    org = _zipf(rng, _ORGS)
+    if unique:
+        org = f"{org}{n}"
+    tld = _zipf(rng, _TLDS)
+    if rng.random() < 0.3:
+        return f"*.{org}.{tld}"
+    return f"{rng.choice(_SUBDOMAINS)}.{org}.{tld}"
+
+
+def _path(rng: random.Random, n: int, unique: bool = False) -> str:
+    kind = rng.random()
+    if kind < 0.4:
+        path = f"~/{_zipf(rng, _DOTFILES)}"
+    elif kind < 0.7:
+        path = f"~/projects/p{rng.randrange(50)}/{rng.choice(_DIRS)}"
+    elif kind < 0.9:
+        path = f"**/*.{_zipf(rng, _EXTENSIONS)}"
+    else:
+        path = f"/srv/{rng.choice(_DIRS)}/{rng.choice(_DIRS)}"
+    return f"{path}/{n}" if unique else path
+
+
+def _command(rng: random.Random, n: int, unique: bool = False) -> str:
+    command = _zipf(rng, _COMMANDS)
+    if unique or rng.random() < 0.5:
+        return f"{command} --opt{n}"
+    return command
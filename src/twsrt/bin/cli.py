@@ -11,9 +11,10 @@ from typing import Optional
 
 import typer
 
-from twsrt.lib.models import AppConfig, yolo_path
+from twsrt import __version__
+from twsrt.bin import commands
+from twsrt.lib.models import AppConfig
 
-__version__ = "0.5.0"
 
 app = typer.Typer(
     name="twsrt",
@@ -48,11 +49,22 @@ def main(
         "-c",
         help="Config file path",
     ),
+    diagnostics_format: str = typer.Option(
+        "text",
+        "--diagnostics-format",
+        help="Diagnostics summary on stderr at end of run: text or json",
+    ),
+    timings: Optional[str] = typer.Option(
+        None,
+        "--timings",
+        help="Per-stage wall time, CPU time and peak memory on stderr: text or json",
+    ),
+    cprofile: Optional[Path] = typer.Option(
+        None, "--cprofile", help="Write cProfile stats of the run to this file"
+    ),
 ) -> None:
-    if verbose:
-        logging.basicConfig(level=logging.DEBUG)
     ctx.ensure_object(dict)
-    ctx.obj["config_path"] = config.expanduser()
+    commands.start(ctx, config, diagnostics_format, verbose, timings, cprofile)
 
 
 # Default config.toml content
@@ -64,6 +76,8 @@ bash_rules = "~/.config/twsrt/bash-rules.json"
 [targets]
 claude_settings = "~/.claude/settings.full.json"
 # copilot_output = "~/.config/twsrt/copilot-flags.txt"    # optional, stdout if omitted
+# copilot_format = "nul"    # copilot flags as "shell" (default), "nul" argv or "json" array
+# compact = true    # write Claude settings as compact JSON (smaller, faster to load)
 
 # YOLO target overrides (optional — defaults to inserting .yolo before extension)
 # claude_settings_yolo = "~/.claude/settings.yolo.json"
@@ -77,6 +91,15 @@ allowUnsandboxedCommands = false
 
 [sandbox_overrides.full]
 enabled = false
+
+# Named policy profiles (generate/diff --profile <name>, or --profile all)
+# [profiles.ci]
+# ask = "deny"                  # ask rules: "ask", "deny" or "skip"
+# yolo = false
+# claude_settings = "~/.claude/settings.ci.json"   # default: settings.<name>.json
+#
+# [profiles.ci.sandbox_overrides]
+# enabled = true
 """
 
 # Default bash-rules.json content
@@ -123,189 +146,195 @@ def generate(
     yolo: bool = typer.Option(
         False, "--yolo", help="YOLO mode: deny-only config, no ask rules"
     ),
+    profile: Optional[list[str]] = typer.Option(
+        None,
+        "--profile",
+        "-p",
+        help="Policy profile (repeatable): full, yolo, a [profiles.*] name, or all",
+    ),
+    compact: bool = typer.Option(
+        False, "--compact", help="Write Claude settings as compact JSON"
+    ),
+    copilot_format: Optional[str] = typer.Option(
+        None,
+        "--copilot-format",
+        help="Copilot flags output: shell (default), nul (argv for xargs -0), json",
+    ),
+    no_cache: bool = typer.Option(
+        False, "--no-cache", help="Regenerate, bypassing the output cache"
+    ),
+    lock_timeout: float = typer.Option(
+        30.0,
+        "--lock-timeout",
+        help="Seconds to wait for a concurrent generate -w before giving up",
+    ),
+    metrics: Optional[Path] = typer.Option(
+        None,
+        "--metrics",
+        help="Write OpenMetrics to this .prom file (textfile collector)",
+    ),
 ) -> None:
     """Generate agent-specific security config from canonical sources."""
-    from twsrt.lib.agent import GENERATORS
-    from twsrt.lib.claude import selective_merge
-    from twsrt.lib.config import load_config
-    from twsrt.lib.sources import read_bash_rules, read_srt
+    commands.generate(
+        ctx,
+        agent,
+        write,
+        dry_run,
+        yolo,
+        profile,
+        compact,
+        copilot_format,
+        no_cache,
+        lock_timeout,
+        metrics,
+    )
 
-    config_path = ctx.obj["config_path"]
-    config = load_config(config_path)
 
-    try:
-        srt_result = read_srt(config.srt_path)
-        bash_rules = read_bash_rules(config.bash_rules_path)
-    except (FileNotFoundError, ValueError) as e:
-        typer.echo(f"Error: {e}", err=True)
-        raise typer.Exit(1)
+@app.command()
+def diff(
+    ctx: typer.Context,
+    agent: str = typer.Argument("all", help="Target agent: claude, copilot, or all"),
+    yolo: bool = typer.Option(
+        False, "--yolo", help="YOLO mode: diff against yolo-specific config files"
+    ),
+    profile: Optional[list[str]] = typer.Option(
+        None,
+        "--profile",
+        "-p",
+        help="Policy profile (repeatable): full, yolo, a [profiles.*] name, or all",
+    ),
+    no_cache: bool = typer.Option(
+        False, "--no-cache", help="Regenerate, bypassing the output cache"
+    ),
+    archive: Optional[Path] = typer.Option(
+        None,
+        "--archive",
+        help="Diff a home directory snapshot (tar or zip) instead of the live files",
+    ),
+    archive_home: Optional[Path] = typer.Option(
+        None,
+        "--archive-home",
+        help="Home directory the archive was taken of (default: your home)",
+    ),
+    output_format: str = typer.Option(
+        "text", "--format", help="Report format: text or json"
+    ),
+    metrics: Optional[Path] = typer.Option(
+        None,
+        "--metrics",
+        help="Write OpenMetrics to this .prom file (textfile collector)",
+    ),
+) -> None:
+    """Compare generated config against existing agent config files."""
+    commands.diff(
+        ctx,
+        agent,
+        yolo,
+        profile,
+        no_cache,
+        archive,
+        archive_home,
+        output_format,
+        metrics,
+    )
 
-    all_rules = srt_result.rules + bash_rules
-    config.network_config = srt_result.network_config
-    config.filesystem_config = srt_result.filesystem_config
-    config.sandbox_config = srt_result.sandbox_config
-    config.yolo = yolo
-    config.apply_sandbox_overrides()
-
-    if agent == "all":
-        generators = list(GENERATORS.values())
-    elif agent in GENERATORS:
-        generators = [GENERATORS[agent]]
-    else:
-        typer.echo(
-            f"Error: Unknown agent '{agent}'. Available: {', '.join(GENERATORS)}",
-            err=True,
-        )
-        raise typer.Exit(1)
 
-    for gen in generators:
-        output = gen.generate(all_rules, config)
-
-        if write and not dry_run:
-            if gen.name == "claude":
-                target = _resolve_claude_target(config)
-                anchor = config.symlink_anchor
-
-                from twsrt.lib.symlink import (
-                    ensure_symlink,
-                    prepare_claude_target,
-                )
-
-                try:
-                    migration_msg = prepare_claude_target(anchor, target)
-                    if migration_msg:
-                        typer.echo(migration_msg)
-                except FileExistsError as e:
-                    typer.echo(str(e), err=True)
-                    raise typer.Exit(1)
-
-                if target.exists():
-                    generated = json.loads(output)
-                    merged = selective_merge(target, generated)
-                    target.write_text(json.dumps(merged, indent=2) + "\n")
-                else:
-                    target.parent.mkdir(parents=True, exist_ok=True)
-                    target.write_text(output + "\n")
-
-                ensure_symlink(target, anchor)
-
-                typer.echo(f"Wrote: {target}")
-            elif gen.name == "copilot":
-                target = _resolve_copilot_target(config)
-                if target:
-                    target.parent.mkdir(parents=True, exist_ok=True)
-                    target.write_text(output + "\n")
-                    typer.echo(f"Wrote: {target}")
-                else:
-                    typer.echo(output)
-        elif dry_run and write:
-            typer.echo(f"--- Dry run: {gen.name} ---")
-            if gen.name == "claude":
-                typer.echo(f"Would write to: {_resolve_claude_target(config)}")
-            elif gen.name == "copilot":
-                target = _resolve_copilot_target(config)
-                if target:
-                    typer.echo(f"Would write to: {target}")
-            typer.echo(output)
-        else:
-            if len(generators) > 1:
-                typer.echo(f"--- {gen.name} ---")
-            typer.echo(output)
+@app.command()
+def agents() -> None:
+    """List available agents (built-in and installed plugins)."""
+    from twsrt.lib.agent import GENERATORS
 
+    for info in GENERATORS.infos().values():
+        typer.echo(f"{info.name}\t{info.distribution or 'built-in'}\t{info.value}")
+
+
+@app.command()
+def status(
+    ctx: typer.Context,
+    agent: str = typer.Argument("all", help="Target agent: claude, copilot, or all"),
+    yolo: bool = typer.Option(
+        False, "--yolo", help="YOLO mode: check yolo-specific config files"
+    ),
+    profile: Optional[list[str]] = typer.Option(
+        None,
+        "--profile",
+        "-p",
+        help="Policy profile (repeatable): full, yolo, a [profiles.*] name, or all",
+    ),
+    quiet: bool = typer.Option(
+        False, "--quiet", "-q", help="Print nothing; report through the exit code"
+    ),
+) -> None:
+    """Check written targets against their stamps, without regenerating.
 
-def _resolve_claude_target(config: AppConfig) -> Path:
-    """Resolve Claude target path: yolo path in yolo mode, standard otherwise."""
-    if config.yolo:
-        return config.claude_yolo_path or yolo_path(config.claude_settings_path)
-    return config.claude_settings_path
+    Exit 0 if every target is current, 1 if any is stale, modified or
+    unstamped, 2 if a target is missing.
+    """
+    commands.status(ctx, agent, yolo, profile, quiet)
 
 
-def _resolve_copilot_target(config: AppConfig) -> Path | None:
-    """Resolve Copilot target path: yolo path in yolo mode, standard otherwise."""
-    if config.yolo:
-        if config.copilot_yolo_path:
-            return config.copilot_yolo_path
-        if config.copilot_output_path:
-            return yolo_path(config.copilot_output_path)
-        return None
-    return config.copilot_output_path
+@app.command()
+def history(
+    ctx: typer.Context,
+    agent: str = typer.Option("claude", "--agent", "-a", help="claude or copilot"),
+    profile: Optional[str] = typer.Option(
+        None, "--profile", "-p", help="Variant: full, yolo or a [profiles.*] name"
+    ),
+    limit: int = typer.Option(20, "--limit", "-n", help="Versions to list"),
+) -> None:
+    """List recorded versions of a target, newest first (numbers for rollback)."""
+    from itertools import islice
 
+    from twsrt.lib.history import History
 
-def _resolve_diff_target(gen_name: str, config: AppConfig) -> Path | None:
-    """Resolve target path for diff: yolo path in yolo mode, standard otherwise."""
-    if gen_name == "claude":
-        return _resolve_claude_target(config)
-    elif gen_name == "copilot":
-        return _resolve_copilot_target(config)
-    return None
+    _, target = _history_target(ctx, agent, profile)
+    typer.echo(f"{target}:")
+    for n, version in enumerate(islice(History().versions(target), limit)):
+        fp = version.fingerprint[:12] if version.fingerprint else "-"
+        typer.echo(f"{n:>4}  {version.when}  {version.event:<8}  {fp}")
 
 
 @app.command()
-def diff(
+def rollback(
     ctx: typer.Context,
-    agent: str = typer.Argument("all", help="Target agent: claude, copilot, or all"),
-    yolo: bool = typer.Option(
-        False, "--yolo", help="YOLO mode: diff against yolo-specific config files"
+    steps: int = typer.Argument(1, help="Version to restore (see twsrt history)"),
+    agent: str = typer.Option("claude", "--agent", "-a", help="claude or copilot"),
+    profile: Optional[str] = typer.Option(
+        None, "--profile", "-p", help="Variant: full, yolo or a [profiles.*] name"
     ),
 ) -> None:
-    """Compare generated config against existing agent config files."""
-    from twsrt.lib.agent import GENERATORS
-    from twsrt.lib.config import load_config
-    from twsrt.lib.sources import read_bash_rules, read_srt
-
-    config_path = ctx.obj["config_path"]
-    config = load_config(config_path)
+    """Restore a previously written version of a target, without regenerating."""
+    from twsrt.lib.history import History
 
+    config, target = _history_target(ctx, agent, profile)
+    commands.lock_targets(ctx, config)
     try:
-        srt_result = read_srt(config.srt_path)
-        bash_rules = read_bash_rules(config.bash_rules_path)
-    except (FileNotFoundError, ValueError) as e:
+        version = History().rollback(target, steps)
+    except (IndexError, OSError, ValueError) as e:
         typer.echo(f"Error: {e}", err=True)
         raise typer.Exit(1)
+    typer.echo(f"Restored: {target} (version of {version.when})")
 
-    all_rules = srt_result.rules + bash_rules
-    config.network_config = srt_result.network_config
-    config.filesystem_config = srt_result.filesystem_config
-    config.sandbox_config = srt_result.sandbox_config
-    config.yolo = yolo
-    config.apply_sandbox_overrides()
-
-    if agent == "all":
-        generators = list(GENERATORS.values())
-    elif agent in GENERATORS:
-        generators = [GENERATORS[agent]]
-    else:
-        typer.echo(
-            f"Error: Unknown agent '{agent}'. Available: {', '.join(GENERATORS)}",
-            err=True,
-        )
-        raise typer.Exit(1)
-
-    has_drift = False
-    for gen in generators:
-        target = _resolve_diff_target(gen.name, config)
-        if target is None or not target.exists():
-            typer.echo(
-                f"Error: Target file not found for {gen.name}: {target}", err=True
-            )
-            raise typer.Exit(2)
 
-        result = gen.diff(all_rules, target, config)
-
-        if result.matched:
-            typer.echo(f"{gen.name}: no drift")
-        else:
-            has_drift = True
-            typer.echo(
-                f"{gen.name}: {len(result.missing)} missing, {len(result.extra)} extra"
-            )
-            for entry in result.missing:
-                typer.echo(f"  + {entry} (missing from existing)")
-            for entry in result.extra:
-                typer.echo(f"  - {entry} (in existing, not in sources)")
+def _history_target(
+    ctx: typer.Context, agent: str, profile: Optional[str]
+) -> tuple[AppConfig, Path]:
+    """Config and target that history/rollback operate on; exits 1 if none."""
+    from twsrt.lib.config import load_config
+    from twsrt.lib.targets import resolve_target
 
-    if has_drift:
+    if agent not in ("claude", "copilot"):
+        typer.echo(f"Error: No history for agent '{agent}'", err=True)
+        raise typer.Exit(1)
+    config = load_config(ctx.obj["config_path"])
+    [(_, profile_config)] = commands.resolve_profiles(
+        config, [profile] if profile else None, False
+    )
+    target = resolve_target(agent, profile_config)
+    if target is None:
+        typer.echo(f"Error: No {agent} target configured", err=True)
         raise typer.Exit(1)
+    return config, target
 
 
 def _resolve_editor() -> str:
@@ -354,6 +383,348 @@ def edit(
         raise typer.Exit(result.returncode)
 
 
+@app.command()
+def mode(
+    ctx: typer.Context,
+    name: Optional[str] = typer.Argument(
+        None, help="Mode to switch Claude Code to: full or yolo"
+    ),
+    background: bool = typer.Option(
+        True,
+        "--background/--no-background",
+        help="Refresh the other variant in a background process",
+    ),
+    refresh_only: bool = typer.Option(
+        False, "--refresh-only", hidden=True, help="Refresh the variant, no switch"
+    ),
+) -> None:
+    """Switch Claude Code between full and yolo settings (prints mode if omitted)."""
+    from twsrt.lib.config import load_config
+    from twsrt.lib.modes import (
+        MODES,
+        current_mode,
+        refresh_variant,
+        spawn_refresh,
+        switch_mode,
+    )
+
+    config_path = ctx.obj["config_path"]
+    config = load_config(config_path)
+
+    if name is None:
+        typer.echo(current_mode(config) or "unmanaged")
+        raise typer.Exit(0)
+    if name not in MODES:
+        typer.echo(
+            f"Error: Unknown mode '{name}'. Available: {', '.join(MODES)}", err=True
+        )
+        raise typer.Exit(1)
+
+    commands.lock_targets(ctx, config)
+    try:
+        if refresh_only:
+            for msg in refresh_variant(config, name, __version__) or []:
+                typer.echo(msg)
+            return
+        result = switch_mode(config, name, __version__)
+    except (FileNotFoundError, FileExistsError, ValueError) as e:
+        typer.echo(f"Error: {e}", err=True)
+        raise typer.Exit(1)
+
+    for msg in result.messages:
+        typer.echo(msg)
+    typer.echo(f"Mode: {name} → {result.target}")
+
+    if background:
+        other = next(m for m in MODES if m != name)
+        spawn_refresh(config_path, other)
+
+
+@app.command(name="exec")
+def exec_agent(
+    ctx: typer.Context,
+    agent: str = typer.Argument(..., help="Agent to launch: copilot"),
+    args: Optional[list[str]] = typer.Argument(
+        None, help="Arguments passed to the agent (after --)"
+    ),
+    yolo: bool = typer.Option(
+        False, "--yolo", help="YOLO mode: deny-only flags, no ask rules"
+    ),
+    profile: Optional[str] = typer.Option(
+        None, "--profile", "-p", help="Policy profile: full, yolo or a [profiles.*]"
+    ),
+    srt: bool = typer.Option(False, "--srt", help="Run the agent inside `srt -c`"),
+    no_cache: bool = typer.Option(
+        False, "--no-cache", help="Regenerate flags, bypassing the cache"
+    ),
+) -> None:
+    """Launch an agent with flags generated from the canonical sources.
+
+    Example: twsrt exec copilot --srt -- --model gpt-5
+    """
+    from twsrt.lib.cache import OutputCache
+    from twsrt.lib.config import load_config
+    from twsrt.lib.launch import (
+        AGENT_COMMANDS,
+        agent_flags,
+        exec_command,
+        launch_command,
+    )
+
+    if agent not in AGENT_COMMANDS:
+        typer.echo(
+            f"Error: Cannot exec '{agent}'. Flag-configured agents: "
+            f"{', '.join(AGENT_COMMANDS)}",
+            err=True,
+        )
+        raise typer.Exit(1)
+
+    if yolo and profile not in (None, "yolo"):
+        raise typer.BadParameter(
+            f"--yolo cannot be combined with profile '{profile}'; "
+            "exec launches a single profile",
+            param_hint="'--yolo'",
+        )
+
+    config = load_config(ctx.obj["config_path"])
+    try:
+        flags = agent_flags(
+            agent,
+            config,
+            profile or ("yolo" if yolo else "full"),
+            __version__,
+            cache=None if no_cache else OutputCache(),
+        )
+    except (FileNotFoundError, ValueError) as e:
+        typer.echo(f"Error: {e}", err=True)
+        raise typer.Exit(1)
+
+    command = launch_command(agent, flags, args or [], srt=srt)
+    log.debug("exec: %s", command)
+    try:
+        exec_command(command)
+    except OSError as e:
+        typer.echo(f"Error: cannot run {command[0]}: {e}", err=True)
+        raise typer.Exit(127)
+
+
+fleet_app = typer.Typer(
+    help="Operate on many tenants (home dir + config.toml) in one invocation.",
+    no_args_is_help=True,
+)
+app.add_typer(fleet_app, name="fleet")
+
+
+@fleet_app.command("generate")
+def fleet_generate(
+    manifest: Path = typer.Argument(..., help="Fleet manifest TOML ([[tenant]] list)"),
+    agent: str = typer.Option(
+        "all", "--agent", "-a", help="Target agent: claude, copilot, or all"
+    ),
+    yolo: bool = typer.Option(
+        False, "--yolo", help="YOLO mode: deny-only config, no ask rules"
+    ),
+    workers: Optional[int] = typer.Option(
+        None, "--workers", "-j", help="Worker processes (default: CPU count)"
+    ),
+    summary: Optional[Path] = typer.Option(
+        None, "--summary", help="Write per-tenant result summary JSON here"
+    ),
+) -> None:
+    """Generate and write agent configs for every tenant in a manifest."""
+    from twsrt.lib.fleet import generate_fleet, read_manifest, write_summary
+
+    try:
+        tenants = read_manifest(manifest.expanduser())
+    except (FileNotFoundError, ValueError) as e:
+        typer.echo(f"Error: {e}", err=True)
+        raise typer.Exit(1)
+
+    agents = [gen.name for gen in commands.resolve_generators(agent)]
+
+    results = generate_fleet(tenants, agents, yolo=yolo, workers=workers)
+
+    failed = [r for r in results if not r.ok]
+    for r in failed:
+        typer.echo(f"{r.tenant}: FAILED: {r.error}", err=True)
+    if summary:
+        write_summary(results, summary.expanduser())
+        typer.echo(f"Wrote: {summary}")
+    typer.echo(f"Fleet: {len(results) - len(failed)} ok, {len(failed)} failed")
+
+    if failed:
+        raise typer.Exit(1)
+
+
+@fleet_app.command("diff")
+def fleet_diff(
+    homes: Optional[list[str]] = typer.Argument(
+        None, help="Home dirs or quoted glob patterns, e.g. '/home/*'"
+    ),
+    homes_from: Optional[Path] = typer.Option(
+        None, "--homes-from", help="File with one home dir or glob per line (- = stdin)"
+    ),
+    manifest: Optional[Path] = typer.Option(
+        None, "--manifest", "-m", help="Fleet manifest TOML ([[tenant]] list)"
+    ),
+    tenant_config: str = typer.Option(
+        "~/.config/twsrt/config.toml",
+        "--tenant-config",
+        help="Config path of each home ('~' is the home)",
+    ),
+    agent: str = typer.Option(
+        "all", "--agent", "-a", help="Target agent: claude, copilot, or all"
+    ),
+    yolo: bool = typer.Option(
+        False, "--yolo", help="YOLO mode: diff against yolo-specific config files"
+    ),
+    workers: Optional[int] = typer.Option(
+        None, "--workers", "-j", help="Worker processes (default: CPU count)"
+    ),
+    report: Optional[Path] = typer.Option(
+        None, "--report", help="Write the JSONL report here instead of stdout"
+    ),
+    summary: Optional[Path] = typer.Option(
+        None, "--summary", help="Write the drift histogram JSON here"
+    ),
+) -> None:
+    """Check the targets of many homes for drift; one JSONL record per target."""
+    import sys
+
+    from twsrt.lib.fleet import (
+        diff_fleet,
+        read_manifest,
+        summarize_diffs,
+        tenants_from_homes,
+    )
+
+    patterns = list(homes or [])
+    if homes_from is not None:
+        try:
+            text = (
+                sys.stdin.read()
+                if str(homes_from) == "-"
+                else homes_from.expanduser().read_text()
+            )
+        except OSError as e:
+            typer.echo(f"Error: {e}", err=True)
+            raise typer.Exit(1)
+        patterns.extend(line.strip() for line in text.splitlines() if line.strip())
+    tenants = tenants_from_homes(patterns, tenant_config)
+    if manifest is not None:
+        try:
+            tenants.extend(read_manifest(manifest.expanduser()))
+        except (FileNotFoundError, ValueError) as e:
+            typer.echo(f"Error: {e}", err=True)
+            raise typer.Exit(1)
+    if not tenants:
+        typer.echo(
+            "Error: No homes given (HOMES, --homes-from or --manifest)", err=True
+        )
+        raise typer.Exit(1)
+
+    agents = [gen.name for gen in commands.resolve_generators(agent)]
+    records = diff_fleet(tenants, agents, yolo=yolo, workers=workers)
+
+    lines = "".join(json.dumps(record) + "\n" for record in records)
+    if report is not None:
+        report = report.expanduser()
+        report.parent.mkdir(parents=True, exist_ok=True)
+        report.write_text(lines)
+    else:
+        typer.echo(lines, nl=False)
+
+    histogram = summarize_diffs(records)
+    if summary is not None:
+        summary = summary.expanduser()
+        summary.parent.mkdir(parents=True, exist_ok=True)
+        summary.write_text(json.dumps(histogram, indent=2) + "\n")
+
+    status = histogram["status"]
+    typer.echo(
+        f"Fleet diff: {histogram['tenants']} homes, {status['matched']} matched, "
+        f"{status['drift']} drift, {status['failed']} failed",
+        err=True,
+    )
+    for kind, sign in (("missing", "+"), ("extra", "-"), ("changed", "~")):
+        for key, count in list(histogram[kind].items())[:5]:
+            typer.echo(f"  {sign} {key}: {count}", err=True)
+
+    if status["failed"]:
+        raise typer.Exit(2)
+    if status["drift"]:
+        raise typer.Exit(1)
+
+
+projects_app = typer.Typer(
+    help="Per-project Claude settings for the projects of a monorepo.",
+    no_args_is_help=True,
+)
+app.add_typer(projects_app, name="projects")
+
+
+@projects_app.command("generate")
+def projects_generate(
+    ctx: typer.Context,
+    root: Path = typer.Argument(..., help="Monorepo root to search for overlays"),
+    overlay: str = typer.Option(
+        ".twsrt.toml", "--overlay", help="Overlay file name marking a project"
+    ),
+    yolo: bool = typer.Option(
+        False, "--yolo", help="YOLO mode: deny-only config, no ask rules"
+    ),
+    workers: Optional[int] = typer.Option(
+        None, "--workers", "-j", help="Worker processes (default: CPU count)"
+    ),
+    dry_run: bool = typer.Option(
+        False, "--dry-run", "-n", help="Report what would be written"
+    ),
+) -> None:
+    """Write <project>/.claude/settings.json for every project with an overlay."""
+    from collections import Counter
+
+    from twsrt.lib.config import load_config
+    from twsrt.lib.projects import (
+        FAILED,
+        UNCHANGED,
+        WROTE,
+        find_projects,
+        generate_projects,
+    )
+    from twsrt.lib.sources import load_sources
+
+    config = load_config(ctx.obj["config_path"])
+    try:
+        rules = load_sources(config)
+    except (FileNotFoundError, ValueError) as e:
+        typer.echo(f"Error: {e}", err=True)
+        raise typer.Exit(1)
+
+    projects = find_projects(root.expanduser(), overlay)
+    results = generate_projects(
+        projects,
+        rules,
+        config.for_profile("yolo" if yolo else "full"),
+        overlay_name=overlay,
+        workers=workers,
+        dry_run=dry_run,
+    )
+
+    for r in results:
+        if r.status == WROTE:
+            typer.echo(f"{'Would write' if dry_run else 'Wrote'}: {r.target}")
+        elif r.status == FAILED:
+            typer.echo(f"{r.project}: FAILED: {r.error}", err=True)
+    counts = Counter(r.status for r in results)
+    typer.echo(
+        f"Projects: {counts[WROTE]} written, {counts[UNCHANGED]} unchanged, "
+        f"{counts[FAILED]} failed"
+    )
+
+    if counts[FAILED]:
+        raise typer.Exit(1)
+
+
 @app.command(hidden=True)
 def version() -> None:
     """Print version string."""
@@ -0,0 +1,638 @@
+"""Command implementations that run without typer (generate, diff, status).
+
+Importing typer (with click and rich) costs more than these commands' own
+work when they run from a shell prompt or a hook. The implementations here
+use only the stdlib and twsrt.lib, so the fast entry point (fast.py) can
+run them directly; the typer commands in cli.py wrap the same functions.
+
+ctx is a typer.Context or a Session: both carry obj and support
+with_resource() and call_on_close().
+"""
+
+import json
+import sys
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any
+
+from twsrt import __version__
+from twsrt.lib.models import AppConfig
+
+
+class Exit(SystemExit):
+    """End the command with an exit code.
+
+    A SystemExit, so it needs no handler: click closes the context (and
+    with it the command's resources) on the way out, just as for
+    typer.Exit.
+    """
+
+
+class Session(ExitStack):
+    """Minimal stand-in for typer.Context: obj plus resources closed on exit."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.obj: dict[str, Any] = {}
+
+    def with_resource(self, cm: Any) -> Any:
+        return self.enter_context(cm)
+
+    def call_on_close(self, f: Any) -> Any:
+        return self.callback(f)
+
+
+def echo(message: str = "", err: bool = False, nl: bool = True) -> None:
+    """Write message to stdout (or stderr) and flush, like typer.echo."""
+    stream = sys.stderr if err else sys.stdout
+    stream.write(message + "\n" if nl else message)
+    stream.flush()
+
+
+def start(
+    ctx: Any,
+    config: Path,
+    diagnostics_format: str = "text",
+    verbose: bool = False,
+    timings: str | None = None,
+    cprofile: Path | None = None,
+) -> None:
+    """Global options: config path, diagnostics and timings summaries at the
+    end, logging, profiling.
+    """
+    from twsrt.lib.diagnostics import DIAGNOSTICS_FORMATS, collect
+
+    if verbose:
+        import logging
+
+        logging.basicConfig(level=logging.DEBUG)
+    ctx.obj["config_path"] = config.expanduser()
+    ctx.obj["config_option"] = config
+
+    if diagnostics_format not in DIAGNOSTICS_FORMATS:
+        echo(
+            f"Error: Unknown diagnostics format '{diagnostics_format}'. "
+            f"Available: {', '.join(DIAGNOSTICS_FORMATS)}",
+            err=True,
+        )
+        raise Exit(1)
+    if timings is not None or cprofile is not None:
+        record_timings(ctx, timings, cprofile)
+    # Generators report warnings during the run; summarize once at the end
+    collected = ctx.with_resource(collect())
+
+    def emit_diagnostics() -> None:
+        if collected:
+            echo(collected.render(diagnostics_format), err=True)
+
+    ctx.call_on_close(emit_diagnostics)
+
+
+def record_timings(ctx: Any, fmt: str | None, cprofile: Path | None) -> None:
+    """Time the run's stages until the command ends; exits 1 on unknown formats.
+
+    The table (or JSON) goes to stderr in fmt, if given; cProfile stats are
+    written to cprofile, if given.
+    """
+    from twsrt.lib.timings import TIMINGS_FORMATS, record
+
+    if fmt is not None and fmt not in TIMINGS_FORMATS:
+        echo(
+            f"Error: Unknown timings format '{fmt}'. "
+            f"Available: {', '.join(TIMINGS_FORMATS)}",
+            err=True,
+        )
+        raise Exit(1)
+
+    def emit_timings() -> None:
+        if fmt is not None:
+            echo(recorded.render(fmt), err=True)
+        if cprofile is not None:
+            try:
+                recorded.profiler.dump_stats(cprofile.expanduser())
+            except OSError as e:
+                echo(f"Error: Cannot write profile: {e}", err=True)
+
+    # Registered first so it runs after recording has stopped (LIFO)
+    ctx.call_on_close(emit_timings)
+    recorded = ctx.with_resource(
+        record(trace_memory=fmt is not None, profile=cprofile is not None)
+    )
+
+
+def generate(
+    ctx: Any,
+    agent: str = "all",
+    write: bool = False,
+    dry_run: bool = False,
+    yolo: bool = False,
+    profile: list[str] | None = None,
+    compact: bool = False,
+    copilot_format: str | None = None,
+    no_cache: bool = False,
+    lock_timeout: float = 30.0,
+    metrics: Path | None = None,
+) -> None:
+    """Generate agent-specific security config from canonical sources."""
+    from twsrt.lib.cache import OutputCache, fingerprint
+    from twsrt.lib.config import load_config
+    from twsrt.lib.models import COPILOT_FORMATS
+    from twsrt.lib.targets import (
+        migrate_claude_anchor,
+        resolve_target,
+        write_claude,
+        write_copilot,
+    )
+    from twsrt.lib.timings import stage
+
+    run_metrics = start_metrics(ctx) if metrics is not None else None
+    config_path = ctx.obj["config_path"]
+    with stage("config"):
+        config = load_config(config_path)
+
+    if compact:
+        config.compact = True
+    if copilot_format is not None:
+        if copilot_format not in COPILOT_FORMATS:
+            echo(
+                f"Error: Unknown copilot format '{copilot_format}'. "
+                f"Available: {', '.join(COPILOT_FORMATS)}",
+                err=True,
+            )
+            raise Exit(1)
+        config.copilot_format = copilot_format
+
+    generators = resolve_generators(agent)
+    if write and not dry_run:
+        # Taken before building: a run that waited reuses the cached documents
+        lock_targets(ctx, config, lock_timeout)
+    documents = build_documents(
+        config,
+        generators,
+        profile,
+        yolo,
+        None if no_cache else OutputCache(),
+        run_metrics,
+    )
+    multi = len(documents) > len(generators)
+    if multi and write and not dry_run and any(g.name == "claude" for g in generators):
+        # Profiles are written without touching the anchor: migrate it first
+        try:
+            for msg in migrate_claude_anchor(config):
+                echo(msg)
+        except FileExistsError as e:
+            echo(str(e), err=True)
+            raise Exit(1)
+
+    for gen, profile_name, profile_config, document in documents:
+        label = f"{gen.name} ({profile_name})" if multi else gen.name
+        if run_metrics is not None:
+            run_metrics.add_document(gen.name, profile_name, document)
+
+        if write and not dry_run:
+            if gen.name == "claude":
+                try:
+                    with stage("claude.write"):
+                        messages = write_claude(
+                            document,
+                            profile_config,
+                            link=not multi,
+                            fingerprint=fingerprint(
+                                profile_config, gen.name, __version__
+                            ),
+                        )
+                except FileExistsError as e:
+                    echo(str(e), err=True)
+                    raise Exit(1)
+                for msg in messages:
+                    echo(msg)
+            elif gen.name == "copilot":
+                with stage("copilot.write"):
+                    messages = write_copilot(
+                        document,
+                        profile_config,
+                        fingerprint=fingerprint(profile_config, gen.name, __version__),
+                    )
+                if messages is None:
+                    echo_document(gen, document, profile_config)
+                for msg in messages or []:
+                    echo(msg)
+            else:
+                # Plugin agents have no managed target: print instead
+                echo_document(gen, document, profile_config)
+            target = resolve_target(gen.name, profile_config)
+            if run_metrics is not None and target is not None and target.exists():
+                run_metrics.set(
+                    "twsrt_target_bytes",
+                    target.stat().st_size,
+                    agent=gen.name,
+                    profile=profile_name,
+                    target=str(target),
+                )
+        elif dry_run and write:
+            echo(f"--- Dry run: {label} ---")
+            target = resolve_target(gen.name, profile_config)
+            if target:
+                echo(f"Would write to: {target}")
+            echo_document(gen, document, profile_config)
+        else:
+            if len(generators) > 1 or multi:
+                echo(f"--- {label} ---")
+            echo_document(gen, document, profile_config)
+
+    if run_metrics is not None:
+        write_metrics(run_metrics, metrics, "generate")
+
+
+def diff(
+    ctx: Any,
+    agent: str = "all",
+    yolo: bool = False,
+    profile: list[str] | None = None,
+    no_cache: bool = False,
+    archive: Path | None = None,
+    archive_home: Path | None = None,
+    output_format: str = "text",
+    metrics: Path | None = None,
+) -> None:
+    """Compare generated config against existing agent config files."""
+    from twsrt.lib import vfs
+    from twsrt.lib.cache import OutputCache
+    from twsrt.lib.config import load_config
+    from twsrt.lib.diff import DIFF_FORMATS
+    from twsrt.lib.models import expand_home
+    from twsrt.lib.targets import merge_base, resolve_target
+    from twsrt.lib.timings import stage
+
+    if output_format not in DIFF_FORMATS:
+        echo(
+            f"Error: Unknown format '{output_format}'. "
+            f"Available: {', '.join(DIFF_FORMATS)}",
+            err=True,
+        )
+        raise Exit(1)
+
+    run_metrics = start_metrics(ctx) if metrics is not None else None
+    config_path = ctx.obj["config_path"]
+    home = None
+    if archive is not None:
+        # Sources, config and targets are read from the archive, unextracted
+        home = archive_home or Path.home()
+        try:
+            snapshot = vfs.ArchiveFileSystem(archive, mount=home)
+        except (OSError, ValueError) as e:
+            echo(f"Error: {e}", err=True)
+            raise Exit(1)
+        ctx.call_on_close(snapshot.close)
+        ctx.with_resource(vfs.use(snapshot))
+        config_path = expand_home(ctx.obj["config_option"], home)
+    with stage("config"):
+        config = load_config(config_path, home=home)
+
+    generators = resolve_generators(agent)
+    documents = build_documents(
+        config,
+        generators,
+        profile,
+        yolo,
+        None if no_cache else OutputCache(),
+        run_metrics,
+    )
+    multi = len(documents) > len(generators)
+
+    has_drift = False
+    report: list[dict[str, Any]] = []
+    for gen, profile_name, profile_config, document in documents:
+        label = f"{gen.name} ({profile_name})" if multi else gen.name
+        target = resolve_target(gen.name, profile_config)
+        if target is None:
+            # Plugin agents, Copilot without copilot_output: nothing to compare
+            echo(f"{label}: no target, skipped", err=True)
+            continue
+        if not vfs.current().exists(target):
+            echo(f"Error: Target file not found for {label}: {target}", err=True)
+            raise Exit(2)
+
+        # The history (and with it the merge base) is not part of an archive
+        base = (
+            None
+            if archive is not None
+            else merge_base(gen.name, target, profile_config)
+        )
+        with stage(f"{gen.name}.compare"):
+            if base is None:
+                result = gen.compare(document, target)
+            else:
+                result = gen.compare(document, target, base)
+        has_drift = has_drift or not result.matched
+        if run_metrics is not None:
+            run_metrics.add_document(gen.name, profile_name, document)
+            run_metrics.add_diff(gen.name, profile_name, result)
+
+        if output_format == "json":
+            report.append(
+                {
+                    "agent": gen.name,
+                    "profile": profile_name,
+                    "target": str(target),
+                    "matched": result.matched,
+                    "changes": [c.as_dict() for c in result.changes],
+                    "kept": result.kept,
+                }
+            )
+        else:
+            print_diff(label, result)
+
+    if output_format == "json":
+        echo(json.dumps({"matched": not has_drift, "results": report}, indent=2))
+    if run_metrics is not None:
+        # Drift is a successful diff: its metrics are what alerts are built on
+        write_metrics(run_metrics, metrics, "diff")
+    if has_drift:
+        raise Exit(1)
+
+
+def status(
+    ctx: Any,
+    agent: str = "all",
+    yolo: bool = False,
+    profile: list[str] | None = None,
+    quiet: bool = False,
+) -> None:
+    """Check written targets against their stamps, without regenerating.
+
+    Exit 0 if every target is current, 1 if any is stale, modified or
+    unstamped, 2 if a target is missing. quiet prints nothing but errors.
+    """
+    from twsrt.lib.cache import fingerprint
+    from twsrt.lib.config import load_config
+    from twsrt.lib.stamps import CURRENT, MISSING, target_status
+    from twsrt.lib.targets import resolve_target
+
+    config = load_config(ctx.obj["config_path"])
+    generators = resolve_generators(agent)
+    profiles = resolve_profiles(config, profile, yolo)
+    multi = len(profiles) > 1
+
+    states: list[str] = []
+    for gen in generators:
+        for profile_name, profile_config in profiles:
+            label = f"{gen.name} ({profile_name})" if multi else gen.name
+            target = resolve_target(gen.name, profile_config)
+            if target is None:
+                if not quiet:
+                    echo(f"{label}: no target")
+                continue
+            try:
+                key = fingerprint(profile_config, gen.name, __version__)
+            except FileNotFoundError as e:
+                echo(f"Error: {e}", err=True)
+                raise Exit(1)
+            state = target_status(gen.name, target, key)
+            states.append(state)
+            if not quiet:
+                echo(f"{label}: {state}")
+
+    if MISSING in states:
+        raise Exit(2)
+    if any(state != CURRENT for state in states):
+        raise Exit(1)
+
+
+def lock_targets(ctx: Any, config: AppConfig, timeout: float | None = None) -> None:
+    """Hold the target lock until the command ends; exit 1 on timeout."""
+    from twsrt.lib.lock import DEFAULT_TIMEOUT, LockTimeout, lock_path, target_lock
+
+    def waiting(owner: int | None) -> None:
+        holder = f" (pid {owner})" if owner else ""
+        echo(f"Waiting for concurrent twsrt run{holder}...", err=True)
+
+    lock = target_lock(
+        lock_path(config), DEFAULT_TIMEOUT if timeout is None else timeout, waiting
+    )
+    try:
+        ctx.with_resource(lock)
+    except LockTimeout as e:
+        echo(f"Error: {e}", err=True)
+        raise Exit(1)
+
+
+def build_documents(
+    config: AppConfig,
+    generators: list,
+    profile_names: list[str] | None,
+    yolo: bool,
+    cache,
+    metrics=None,
+) -> list[tuple]:
+    """Generate (generator, profile name, profile config, document) for each pair.
+
+    Documents are looked up in the output cache by fingerprint first; sources
+    are parsed, and each generator's prepare stage run, only for misses.
+    Rule counts are added to metrics, if given. Exits 1 on source errors or
+    unknown profiles.
+    """
+    from twsrt.lib.cache import fingerprint
+    from twsrt.lib.sources import load_sources
+    from twsrt.lib.timings import stage
+
+    profiles = resolve_profiles(config, profile_names, yolo)
+    keys: dict[tuple[str, str], str] = {}
+    documents: dict[tuple[str, str], Any] = {}
+    rules = None
+    if cache is not None:
+        try:
+            with stage("cache.lookup"):
+                for gen in generators:
+                    for name, profile_config in profiles:
+                        key = fingerprint(profile_config, gen.name, __version__)
+                        keys[gen.name, name] = key
+                        cached = cache.get(key)
+                        if cached is not None:
+                            documents[gen.name, name] = cached
+        except FileNotFoundError:
+            keys.clear()  # missing source, reported by load_sources below
+
+    if len(documents) < len(generators) * len(profiles):
+        try:
+            with stage("sources"):
+                rules = load_sources(config)
+        except (FileNotFoundError, ValueError) as e:
+            echo(f"Error: {e}", err=True)
+            raise Exit(1)
+        # Re-derive so profile sandbox overrides land on the parsed SRT values
+        profiles = resolve_profiles(config, profile_names, yolo)
+
+        for gen in generators:
+            pending = [(n, c) for n, c in profiles if (gen.name, n) not in documents]
+            if not pending:
+                continue
+            with stage(f"{gen.name}.prepare"):
+                prepared = gen.prepare(rules, config)
+            for name, profile_config in pending:
+                with stage(f"{gen.name}.finish"):
+                    document = gen.finish(prepared, profile_config)
+                documents[gen.name, name] = document
+                if (gen.name, name) in keys:
+                    with stage("cache.store"):
+                        cache.put(keys[gen.name, name], document)
+
+    if metrics is not None:
+        metrics.add_rules(count_rules(config, cache, rules))
+
+    return [
+        (gen, name, profile_config, documents[gen.name, name])
+        for gen in generators
+        for name, profile_config in profiles
+    ]
+
+
+def count_rules(config: AppConfig, cache, rules: list | None) -> list[list]:
+    """Rule counts per source, scope and action (metrics.rule_counts).
+
+    Cached by source content like documents, so a run served from the cache
+    still reports them without parsing; rules are parsed if not given.
+    """
+    from twsrt.lib.cache import fingerprint
+    from twsrt.lib.metrics import rule_counts
+    from twsrt.lib.sources import load_sources
+
+    key = None
+    if cache is not None:
+        key = fingerprint(config, "rules", __version__)
+        counts = cache.get(key)
+        if counts is not None:
+            return counts
+    counts = rule_counts(load_sources(config) if rules is None else rules)
+    if key is not None:
+        cache.put(key, counts)
+    return counts
+
+
+def start_metrics(ctx: Any) -> Any:
+    """Metrics of this command; stage timings are recorded (untraced) for them
+    unless --timings or --cprofile already does.
+    """
+    from twsrt.lib import timings
+    from twsrt.lib.metrics import Metrics
+
+    if timings.active() is None:
+        ctx.with_resource(timings.record(trace_memory=False))
+    return Metrics()
+
+
+def write_metrics(run_metrics: Any, path: Path, command: str) -> None:
+    """Add stage durations and write the textfile; exits 1 if it cannot be written."""
+    from twsrt.lib import timings
+
+    recorder = timings.active()
+    if recorder is not None:
+        run_metrics.add_stages(recorder)
+    try:
+        run_metrics.write(path.expanduser(), command)
+    except OSError as e:
+        echo(f"Error: Cannot write metrics: {e}", err=True)
+        raise Exit(1)
+
+
+def echo_document(gen, document, config: AppConfig) -> None:
+    """Print a generated document; Copilot flags in config.copilot_format."""
+    from twsrt.lib.timings import stage
+
+    with stage(f"{gen.name}.render"):
+        if gen.name == "copilot":
+            fmt = config.copilot_format
+            # NUL-separated argv is consumed verbatim (xargs -0): no trailing newline
+            output, nl = gen.render(document, fmt), fmt != "nul"
+        else:
+            output, nl = gen.render(document), True
+    echo(output, nl=nl)
+
+
+def resolve_generators(agent: str) -> list:
+    """Select generators for an agent argument; exits 1 on unknown agents.
+
+    Only the selected generators' modules are imported. A named agent that
+    fails to load exits 1; under "all" it is reported and skipped, so one
+    broken plugin does not stop the others.
+    """
+    from twsrt.lib import diagnostics
+    from twsrt.lib.agent import GENERATORS
+
+    if agent != "all" and agent not in GENERATORS:
+        echo(
+            f"Error: Unknown agent '{agent}'. Available: {', '.join(GENERATORS)}",
+            err=True,
+        )
+        raise Exit(1)
+    if agent != "all":
+        try:
+            return [GENERATORS[agent]]
+        except ValueError as e:
+            echo(f"Error: {e}", err=True)
+            raise Exit(1)
+
+    generators = []
+    for name in GENERATORS:
+        try:
+            generators.append(GENERATORS[name])
+        except ValueError as e:
+            diagnostics.report("agent.load-failed", str(e), level="warning")
+    return generators
+
+
+def resolve_profiles(
+    config: AppConfig, names: list[str] | None, yolo: bool
+) -> list[tuple[str, AppConfig]]:
+    """Expand --profile/--yolo into (name, profile config) pairs; exits 1 if unknown.
+
+    No profile given means the built-in "full" mode (or "yolo" with --yolo).
+    "all" selects the built-in modes plus every [profiles.*] entry.
+    """
+    from twsrt.lib.models import BUILTIN_PROFILES
+
+    selected = list(names or [])
+    if yolo and "yolo" not in selected:
+        selected.append("yolo")
+    if not selected:
+        selected = ["full"]
+    if "all" in selected:
+        selected = [*BUILTIN_PROFILES, *config.profiles]
+
+    try:
+        return [(name, config.for_profile(name)) for name in dict.fromkeys(selected)]
+    except ValueError as e:
+        echo(f"Error: {e}", err=True)
+        raise Exit(1)
+
+
+def print_diff(label: str, result: Any) -> None:
+    """Text report of one DiffResult: + missing, - extra, ~ changed values."""
+    from collections import Counter
+
+    kept = getattr(result, "kept", [])
+    if result.matched:
+        echo(f"{label}: no drift" + (f" ({len(kept)} kept by hand)" if kept else ""))
+        _print_kept(kept)
+        return
+    counts = Counter(change.kind for change in result.changes)
+    summary = f"{label}: {counts['missing']} missing, {counts['extra']} extra"
+    if counts["changed"]:
+        summary += f", {counts['changed']} changed"
+    echo(summary)
+    order = {"missing": 0, "extra": 1, "changed": 2}
+    for change in sorted(result.changes, key=lambda c: (order[c.kind], c.key)):
+        if change.kind == "missing":
+            echo(f"  + {change.key} (missing from existing)")
+        elif change.kind == "extra":
+            echo(f"  - {change.key} (in existing, not in sources)")
+        else:
+            echo(
+                f"  ~ {change.key}: {json.dumps(change.old)} → {json.dumps(change.new)}"
+            )
+    _print_kept(kept)
+
+
+def _print_kept(kept: list[str]) -> None:
+    for key in sorted(kept):
+        echo(f"  = {key} (added by hand, kept)")
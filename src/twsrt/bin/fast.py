@@ -0,0 +1,141 @@
+"""twsrt entry point: hot commands without importing typer.
+
+generate, diff and status are run directly from commands.py when their
+arguments are fully understood here. Everything else (help, --version,
+other commands, option spellings not listed below, usage errors) is handed
+to the typer CLI unchanged, so behavior is the same either way; only the
+typer/click/rich import is skipped on the fast path.
+
+The option tables mirror the typer signatures in cli.py (a test keeps them
+in sync).
+"""
+
+import sys
+from pathlib import Path
+from typing import Any
+
+# Option kinds
+FLAG = "flag"
+VALUE = "value"
+MULTIPLE = "multiple"  # repeatable, collected into a list
+
+# option string → (parameter, kind, value type)
+GLOBAL_OPTIONS: dict[str, tuple[str, str, type]] = {
+    "--verbose": ("verbose", FLAG, bool),
+    "-v": ("verbose", FLAG, bool),
+    "--config": ("config", VALUE, Path),
+    "-c": ("config", VALUE, Path),
+    "--diagnostics-format": ("diagnostics_format", VALUE, str),
+    "--timings": ("timings", VALUE, str),
+    "--cprofile": ("cprofile", VALUE, Path),
+}
+
+_PROFILE = {
+    "--profile": ("profile", MULTIPLE, str),
+    "-p": ("profile", MULTIPLE, str),
+    "--yolo": ("yolo", FLAG, bool),
+}
+
+COMMAND_OPTIONS: dict[str, dict[str, tuple[str, str, type]]] = {
+    "generate": {
+        **_PROFILE,
+        "--write": ("write", FLAG, bool),
+        "-w": ("write", FLAG, bool),
+        "--dry-run": ("dry_run", FLAG, bool),
+        "-n": ("dry_run", FLAG, bool),
+        "--compact": ("compact", FLAG, bool),
+        "--copilot-format": ("copilot_format", VALUE, str),
+        "--no-cache": ("no_cache", FLAG, bool),
+        "--lock-timeout": ("lock_timeout", VALUE, float),
+        "--metrics": ("metrics", VALUE, Path),
+    },
+    "diff": {
+        **_PROFILE,
+        "--no-cache": ("no_cache", FLAG, bool),
+        "--archive": ("archive", VALUE, Path),
+        "--archive-home": ("archive_home", VALUE, Path),
+        "--format": ("output_format", VALUE, str),
+        "--metrics": ("metrics", VALUE, Path),
+    },
+    "status": {
+        **_PROFILE,
+        "--quiet": ("quiet", FLAG, bool),
+        "-q": ("quiet", FLAG, bool),
+    },
+}
+
+DEFAULT_CONFIG = Path("~/.config/twsrt/config.toml")
+
+
+def parse(args: list[str]) -> tuple[str, dict, dict] | None:
+    """(command, global options, command options) for a fast-path command
+    line, None if the typer CLI has to handle it.
+    """
+    options: dict[str, Any] = {}
+    globals_: dict[str, Any] = {}
+    args = list(args)
+    command = None
+    while args:
+        arg = args.pop(0)
+        if arg in COMMAND_OPTIONS and command is None:
+            command = arg
+            globals_, options = options, {}
+            continue
+        table = COMMAND_OPTIONS[command] if command else GLOBAL_OPTIONS
+        name, inline = arg, None
+        if arg.startswith("--") and "=" in arg:
+            name, inline = arg.split("=", 1)
+        if name in table:
+            param, kind, cast = table[name]
+            if kind == FLAG:
+                if inline is not None:
+                    return None
+                options[param] = True
+                continue
+            if inline is None:
+                if not args:
+                    return None
+                inline = args.pop(0)
+            try:
+                value = cast(inline)
+            except ValueError:
+                return None
+            if kind == MULTIPLE:
+                options.setdefault(param, []).append(value)
+            else:
+                options[param] = value
+        elif command and not arg.startswith("-") and "agent" not in options:
+            options["agent"] = arg
+        else:
+            return None
+    if command is None:
+        return None
+    return command, globals_, options
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = sys.argv[1:] if argv is None else list(argv)
+    parsed = parse(args)
+    if parsed is None:
+        from twsrt.bin.cli import app
+
+        app(args=args, prog_name="twsrt")
+        return
+
+    from twsrt.bin import commands
+
+    command, globals_, options = parsed
+    try:
+        with commands.Session() as ctx:
+            commands.start(
+                ctx,
+                globals_.get("config", DEFAULT_CONFIG),
+                globals_.get("diagnostics_format", "text"),
+                globals_.get("verbose", False),
+                globals_.get("timings"),
+                globals_.get("cprofile"),
+            )
+            getattr(commands, command)(ctx, **options)
+    except KeyboardInterrupt:
+        commands.echo("Aborted!", err=True)
+        raise commands.Exit(1)
@@ -1,10 +1,17 @@
 """AgentGenerator Protocol and registry."""
 
+import importlib
+import logging
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass
+from importlib.metadata import entry_points
 from pathlib import Path
-from typing import Protocol
+from typing import Any, Protocol
 
 from twsrt.lib.models import AppConfig, DiffResult, SecurityRule
 
+log = logging.getLogger("twsrt")
+
 
 class AgentGenerator(Protocol):
     @property
@@ -14,22 +21,118 @@ class AgentGenerator(Protocol):
         """Generate agent-specific config from security rules."""
         ...
 
+    def build(self, rules: list[SecurityRule], config: AppConfig) -> Any:
+        """Generate the structured document (settings dict / list of flags)."""
+        ...
+
+    def render(self, document: Any) -> str:
+        """Serialize a structured document to the agent's text format."""
+        ...
+
+    def prepare(self, rules: list[SecurityRule], config: AppConfig) -> Any:
+        """Profile-independent stage: translate rules once for all profiles."""
+        ...
+
+    def finish(self, prepared: Any, config: AppConfig) -> Any:
+        """Per-profile stage: apply yolo, ask policy and sandbox config."""
+        ...
+
     def diff(
         self, rules: list[SecurityRule], target: Path, config: AppConfig
     ) -> DiffResult:
         """Compare generated config against existing target file."""
         ...
 
+    def compare(self, document: Any, target: Path) -> DiffResult:
+        """Compare a structured document against existing target file."""
+        ...
+
+
+# Entry point group third-party packages register generators under:
+#   [project.entry-points."twsrt.generators"]
+#   myagent = "mypkg.generator:MyAgentGenerator"
+ENTRY_POINT_GROUP = "twsrt.generators"
+
+# Built-in generators; always available, even without installed metadata
+_BUILTIN: dict[str, str] = {
+    "claude": "twsrt.lib.claude:ClaudeGenerator",
+    "copilot": "twsrt.lib.copilot:CopilotGenerator",
+}
+
+
+@dataclass(frozen=True)
+class GeneratorInfo:
+    name: str
+    value: str  # "module:attr" of the generator class
+    distribution: str | None = None  # providing package; None for built-ins
+
+    @property
+    def module(self) -> str:
+        return self.value.partition(":")[0]
+
+
+class GeneratorRegistry(Mapping[str, AgentGenerator]):
+    """Lazy name → generator mapping.
+
+    Names and GeneratorInfo come from the built-in table plus the
+    "twsrt.generators" entry points, without importing any generator. A
+    generator module is imported, and its class instantiated, on first
+    lookup. Built-in names are looked up without scanning entry points.
+    """
+
+    def __init__(self, builtin: dict[str, str], group: str = ENTRY_POINT_GROUP):
+        self._builtin = builtin
+        self._group = group
+        self._infos: dict[str, GeneratorInfo] | None = None
+        self._instances: dict[str, AgentGenerator] = {}
+
+    def infos(self) -> dict[str, GeneratorInfo]:
+        """All known generators by name (built-ins first), without importing."""
+        if self._infos is None:
+            infos = {
+                name: GeneratorInfo(name, value)
+                for name, value in self._builtin.items()
+            }
+            for ep in entry_points(group=self._group):
+                if ep.name in infos:
+                    if ep.value != infos[ep.name].value:
+                        log.debug("Ignoring entry point %s: name taken", ep.name)
+                    continue
+                dist = ep.dist.name if ep.dist is not None else None
+                infos[ep.name] = GeneratorInfo(ep.name, ep.value, dist)
+            self._infos = infos
+        return self._infos
+
+    def info(self, name: str) -> GeneratorInfo:
+        if name in self._builtin and self._infos is None:
+            return GeneratorInfo(name, self._builtin[name])
+        return self.infos()[name]
+
+    def __getitem__(self, name: str) -> AgentGenerator:
+        if name not in self._instances:
+            self._instances[name] = _load(self.info(name))
+        return self._instances[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.infos())
+
+    def __len__(self) -> int:
+        return len(self.infos())
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._builtin or name in self.infos()
 
-def _build_registry() -> dict[str, AgentGenerator]:
-    """Build the generators registry. Import here to avoid circular imports."""
-    from twsrt.lib.claude import ClaudeGenerator
-    from twsrt.lib.copilot import CopilotGenerator
 
-    return {
-        "claude": ClaudeGenerator(),
-        "copilot": CopilotGenerator(),
-    }
+def _load(info: GeneratorInfo) -> AgentGenerator:
+    """Import the generator class named by info and instantiate it."""
+    module_name, _, attr = info.value.partition(":")
+    try:
+        cls = getattr(importlib.import_module(module_name), attr)
+    except (ImportError, AttributeError) as e:
+        raise ValueError(
+            f"Cannot load generator '{info.name}' from {info.value}: {e}"
+        ) from e
+    return cls()
 
 
-GENERATORS: dict[str, AgentGenerator] = _build_registry()
+GENERATORS = GeneratorRegistry(_BUILTIN)
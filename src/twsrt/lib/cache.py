@@ -0,0 +1,172 @@
+"""Fingerprint-keyed cache of generated agent outputs.
+
+A fingerprint identifies everything a generator's output depends on: the
+content of both canonical sources, the config fields that shape generation,
+the generator name and the twsrt version. Network, filesystem and sandbox
+config are parsed from the SRT file, so its content hash covers them.
+
+Claude output also depends on the filesystem: a denyRead path that is a
+file gets no /** entries (claude.home_facts). Claude fingerprints include
+those facts, so creating or removing such a path invalidates the entry (and
+marks written targets stale) like a source change does.
+
+A run asks for fingerprints once per (agent, profile), and again when it
+stamps what it wrote. Source digests and the parsed denyRead rules are
+therefore remembered per file identity (inode, size, mtime): a repeated
+lookup costs a stat() instead of a read and hash, and only the home facts
+(one stat per denyRead path) are checked every time.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from twsrt.lib import jsonio
+from twsrt.lib.models import AppConfig
+
+CACHE_DIR_ENV = "TWSRT_CACHE_DIR"
+
+# Size cap of the cache directory; least recently used entries go first
+MAX_BYTES = 32 * 1024 * 1024
+
+log = logging.getLogger("twsrt")
+
+
+def default_cache_dir() -> Path:
+    """$TWSRT_CACHE_DIR, else $XDG_CACHE_HOME/twsrt, else ~/.cache/twsrt."""
+    if os.environ.get(CACHE_DIR_ENV):
+        return Path(os.environ[CACHE_DIR_ENV]).expanduser()
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    base = Path(xdg).expanduser() if xdg else Path("~/.cache").expanduser()
+    return base / "twsrt"
+
+
+# (kind, path, st_ino, st_size, st_mtime_ns) → source digest / denyRead rules
+_source_memo: dict[tuple, Any] = {}
+_SOURCE_MEMO_MAX = 1024
+
+
+def _memoized(kind: str, path: Path, compute: Callable[[], Any]) -> Any:
+    """compute(), remembered while path's identity and size are unchanged.
+
+    Only for the OS filesystem; archive and in-memory sources have no
+    meaningful stat and are computed every time.
+    """
+    from twsrt.lib import vfs
+
+    if not isinstance(vfs.current(), vfs.OSFileSystem):
+        return compute()
+    try:
+        st = os.stat(path)
+    except OSError:
+        return compute()  # missing: let compute raise or report
+    key = (kind, str(path), st.st_ino, st.st_size, st.st_mtime_ns)
+    if key not in _source_memo:
+        if len(_source_memo) >= _SOURCE_MEMO_MAX:
+            _source_memo.clear()
+        _source_memo[key] = compute()
+    return _source_memo[key]
+
+
+def fingerprint(config: AppConfig, gen_name: str, version: str) -> str:
+    """Cache key for gen_name's output under config; hashes both source files.
+
+    Raises FileNotFoundError if a source is missing.
+    """
+    from twsrt.lib.sources import deny_read_rules, source_digest
+
+    profile = config.profiles.get(config.profile) if config.profile else None
+    material = {
+        "version": version,
+        "generator": gen_name,
+        "srt": _memoized(
+            "digest", config.srt_path, lambda: source_digest(config.srt_path)
+        ),
+        "bash_rules": _memoized(
+            "digest",
+            config.bash_rules_path,
+            lambda: source_digest(config.bash_rules_path),
+        ),
+        "yolo": config.yolo,
+        "profile": config.profile,
+        "ask_policy": config.ask_policy.value if config.ask_policy else None,
+        "sandbox_overrides": config.sandbox_overrides,
+        "profile_sandbox_overrides": profile.sandbox_overrides if profile else None,
+        "home": str(config.home) if config.home else None,
+    }
+    if gen_name == "claude":
+        from twsrt.lib.claude import home_facts
+
+        rules = _memoized(
+            "deny_read", config.srt_path, lambda: deny_read_rules(config.srt_path)
+        )
+        material["home_facts"] = home_facts(rules, config.home)
+    encoded = json.dumps(material, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class OutputCache:
+    """Directory of <fingerprint>.json entries, each one generated document.
+
+    Least-recently-used entries are evicted once the directory exceeds
+    max_bytes; a hit refreshes the entry's mtime, which is its LRU position.
+    Entries are written to a temp file and renamed into place, so concurrent
+    processes see either no entry or a complete one, and an entry evicted
+    by another process is just a miss.
+    """
+
+    def __init__(self, root: Path | None = None, max_bytes: int = MAX_BYTES) -> None:
+        self.root = root or default_cache_dir()
+        self.max_bytes = max_bytes
+
+    def path(self, key: str) -> Path:
+        return self.root / f"{key}.json"
+
+    def get(self, key: str) -> Any | None:
+        """Cached value for key; None on a miss or an unreadable entry."""
+        path = self.path(key)
+        try:
+            value = jsonio.loads(path.read_bytes())
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        """Store value (JSON-serializable) under key, then enforce the size cap.
+
+        A cache that cannot be written (read-only, full disk) is skipped.
+        """
+        try:
+            jsonio.write_json_stream(value, self.path(key), compact=True)
+        except OSError as e:
+            log.debug("Cache write failed for %s: %s", key, e)
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove least-recently-used entries until within max_bytes."""
+        entries = []
+        for path in self.root.glob("*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime_ns, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            total -= size
@@ -1,15 +1,39 @@
 """ClaudeGenerator — translate SecurityRules to Claude Code settings.json format."""
 
-import json
+from collections import Counter
+from dataclasses import dataclass, field
 from pathlib import Path
 
+from twsrt.lib import jsonio, timings, vfs
 from twsrt.lib.models import (
     Action,
     AppConfig,
+    AskPolicy,
     DiffResult,
     Scope,
     SecurityRule,
+    expand_home,
 )
+from twsrt.lib.vfs import FileSystem
+
+
+@dataclass
+class ClaudeEntries:
+    """Profile-independent permission entries translated from rules."""
+
+    deny: list[str] = field(default_factory=list)
+    ask: list[str] = field(default_factory=list)
+    allow: list[str] = field(default_factory=list)
+    domains: list[str] = field(default_factory=list)
+
+    def __add__(self, other: "ClaudeEntries") -> "ClaudeEntries":
+        """Entries of both, in order (e.g. global rules + a project overlay)."""
+        return ClaudeEntries(
+            deny=self.deny + other.deny,
+            ask=self.ask + other.ask,
+            allow=self.allow + other.allow,
+            domains=self.domains + other.domains,
+        )
 
 
 class ClaudeGenerator:
@@ -19,25 +43,41 @@ class ClaudeGenerator:
 
     def generate(self, rules: list[SecurityRule], config: AppConfig) -> str:
         """Generate Claude Code permission sections as JSON string."""
-        deny: list[str] = []
-        ask: list[str] = []
-        allow: list[str] = []
-        domains: list[str] = []
+        return self.render(self.build(rules, config))
+
+    def build(self, rules: list[SecurityRule], config: AppConfig) -> dict:
+        """Generate Claude Code permission sections as a settings dict."""
+        return self.finish(self.prepare(rules, config), config)
+
+    def render(self, document: dict) -> str:
+        """Serialize a settings dict as JSON string."""
+        return jsonio.dumps(document)
+
+    def prepare(self, rules: list[SecurityRule], config: AppConfig) -> ClaudeEntries:
+        """Translate rules into permission entries (shared across profiles)."""
+        entries = ClaudeEntries()
+        # The only filesystem access: one check per denyRead pattern
+        with timings.stage("claude.stat"):
+            directories = {
+                rule.pattern: _is_directory_pattern(rule.pattern, config.home)
+                for rule in rules
+                if rule.scope == Scope.READ and rule.action == Action.DENY
+            }
 
         for rule in rules:
             if rule.scope == Scope.READ and rule.action == Action.DENY:
                 # FR-006: denyRead → deny ALL file tools
                 # Bare pattern always included; /** only for directories
                 for tool in ("Read", "Write", "Edit", "MultiEdit"):
-                    deny.append(f"{tool}({rule.pattern})")
-                    if _is_directory_pattern(rule.pattern):
-                        deny.append(f"{tool}({rule.pattern}/**)")
+                    entries.deny.append(f"{tool}({rule.pattern})")
+                    if directories[rule.pattern]:
+                        entries.deny.append(f"{tool}({rule.pattern}/**)")
 
             elif rule.scope == Scope.WRITE and rule.action == Action.DENY:
                 # FR-007: denyWrite → deny write tools only
-                deny.append(f"Write({rule.pattern})")
-                deny.append(f"Edit({rule.pattern})")
-                deny.append(f"MultiEdit({rule.pattern})")
+                entries.deny.append(f"Write({rule.pattern})")
+                entries.deny.append(f"Edit({rule.pattern})")
+                entries.deny.append(f"MultiEdit({rule.pattern})")
 
             elif rule.scope == Scope.WRITE and rule.action == Action.ALLOW:
                 # FR-008: allowWrite → no Claude output (SRT enforces)
@@ -45,25 +85,36 @@ class ClaudeGenerator:
 
             elif rule.scope == Scope.NETWORK and rule.action == Action.ALLOW:
                 # FR-009: allowedDomains → WebFetch + sandbox.network
-                allow.append(f"WebFetch(domain:{rule.pattern})")
-                domains.append(rule.pattern)
+                entries.allow.append(f"WebFetch(domain:{rule.pattern})")
+                entries.domains.append(rule.pattern)
 
             elif rule.scope == Scope.NETWORK and rule.action == Action.DENY:
                 # FR-006: deniedDomains → WebFetch deny only (no sandbox.network)
-                deny.append(f"WebFetch(domain:{rule.pattern})")
+                entries.deny.append(f"WebFetch(domain:{rule.pattern})")
 
             elif rule.scope == Scope.EXECUTE and rule.action == Action.DENY:
                 # FR-010: Bash deny — bare command + wildcard
-                deny.append(f"Bash({rule.pattern})")
-                deny.append(f"Bash({rule.pattern} *)")
+                entries.deny.append(f"Bash({rule.pattern})")
+                entries.deny.append(f"Bash({rule.pattern} *)")
 
             elif rule.scope == Scope.EXECUTE and rule.action == Action.ASK:
-                # FR-011: Bash ask — bare command + wildcard (skip in yolo mode)
-                if not config.yolo:
-                    ask.append(f"Bash({rule.pattern})")
-                    ask.append(f"Bash({rule.pattern} *)")
+                # FR-011: Bash ask — bare command + wildcard (placed by ask policy)
+                entries.ask.append(f"Bash({rule.pattern})")
+                entries.ask.append(f"Bash({rule.pattern} *)")
 
-        network: dict = {"allowedDomains": domains}
+        return entries
+
+    def finish(self, entries: ClaudeEntries, config: AppConfig) -> dict:
+        """Apply ask policy, yolo and sandbox config to prepared entries."""
+        deny = list(entries.deny)
+        ask: list[str] = []
+        policy = config.effective_ask_policy
+        if policy == AskPolicy.ASK:
+            ask = list(entries.ask)
+        elif policy == AskPolicy.DENY:
+            deny.extend(entries.ask)
+
+        network: dict = {"allowedDomains": list(entries.domains)}
         network.update(config.network_config)
 
         sandbox: dict = {"network": network}
@@ -73,124 +124,115 @@ class ClaudeGenerator:
 
         sandbox.update(config.sandbox_config)
 
-        permissions: dict = {"deny": deny, "allow": allow}
-        if not config.yolo:
+        permissions: dict = {"deny": deny, "allow": list(entries.allow)}
+        # Yolo drops the ask key unless a profile explicitly asks for prompts
+        if not config.yolo or config.ask_policy == AskPolicy.ASK:
             permissions["ask"] = ask
 
-        output = {
+        return {
             "permissions": permissions,
             "sandbox": sandbox,
         }
-        return json.dumps(output, indent=2)
 
     def diff(
         self, rules: list[SecurityRule], target: Path, config: AppConfig
     ) -> DiffResult:
         """Compare generated config against existing Claude settings.json."""
-        generated = json.loads(self.generate(rules, config))
-        existing = json.loads(target.read_text())
+        return self.compare(self.build(rules, config), target)
 
-        missing: list[str] = []
-        extra: list[str] = []
-
-        # Compare deny, ask, allow sections
-        for section in ("deny", "ask", "allow"):
-            gen_set = set(generated["permissions"].get(section, []))
-            ext_set = set(existing.get("permissions", {}).get(section, []))
-
-            if section == "allow":
-                # Only compare WebFetch entries (others are unmanaged)
-                gen_set = {e for e in gen_set if _is_webfetch_entry(e)}
-                ext_set = {e for e in ext_set if _is_webfetch_entry(e)}
-
-            for entry in gen_set - ext_set:
-                missing.append(entry)
-            for entry in ext_set - gen_set:
-                extra.append(entry)
-
-        # Compare sandbox.network.allowedDomains
-        gen_domains = set(
-            generated.get("sandbox", {}).get("network", {}).get("allowedDomains", [])
-        )
-        ext_domains = set(
-            existing.get("sandbox", {}).get("network", {}).get("allowedDomains", [])
+    def compare(
+        self,
+        generated: dict,
+        target: Path,
+        base: dict[str, list[str]] | None = None,
+    ) -> DiffResult:
+        """Compare a generated settings dict against existing Claude settings.json.
+
+        With a base (hand_edits = "keep", see targets.merge_base) deny and ask
+        entries added by hand are what the next write keeps: they are listed
+        in DiffResult.kept instead of as drift.
+        """
+        from twsrt.lib.diff import diff_documents
+
+        existing = jsonio.loads(vfs.current().read_bytes(target))
+        kept: list[str] = []
+        if base is not None:
+            existing, kept = _without_hand_edits(existing, generated, base)
+        result = DiffResult.from_changes(
+            self.name, diff_documents(_diff_schema(), generated, existing)
         )
-        for d in gen_domains - ext_domains:
-            missing.append(f"network:{d}")
-        for d in ext_domains - gen_domains:
-            extra.append(f"network:{d}")
-
-        # Compare pass-through network config keys
-        from twsrt.lib.sources import (
-            _FILESYSTEM_CONFIG_KEYS,
-            _NETWORK_CONFIG_KEYS,
-            _SANDBOX_CONFIG_KEYS,
+        result.kept = kept
+        return result
+
+
+def _without_hand_edits(
+    existing: dict, generated: dict, base: dict[str, list[str]]
+) -> tuple[dict, list[str]]:
+    """existing without the deny/ask entries a keep merge would leave in place."""
+    permissions = existing.get("permissions")
+    if not isinstance(permissions, dict):
+        return existing, []
+    gen_permissions = generated.get("permissions", {})
+    permissions = dict(permissions)
+    kept: list[str] = []
+    for section in KEPT_SECTIONS:
+        if section not in gen_permissions or not isinstance(
+            permissions.get(section), list
+        ):
+            continue
+        _, by_hand, _ = merge_entries(
+            base.get(section, []), gen_permissions[section], permissions[section]
         )
-
-        gen_network = generated.get("sandbox", {}).get("network", {})
-        ext_network = existing.get("sandbox", {}).get("network", {})
-        for key in _NETWORK_CONFIG_KEYS:
-            gen_val = gen_network.get(key)
-            ext_val = ext_network.get(key)
-            if gen_val != ext_val:
-                if gen_val is not None and ext_val is None:
-                    missing.append(f"network.config:{key}")
-                elif gen_val is None and ext_val is not None:
-                    extra.append(f"network.config:{key}")
-                else:
-                    missing.append(f"network.config:{key}")
-                    extra.append(f"network.config:{key}")
-
-        # Compare pass-through filesystem config keys
-        gen_filesystem = generated.get("sandbox", {}).get("filesystem", {})
-        ext_filesystem = existing.get("sandbox", {}).get("filesystem", {})
-        for key in _FILESYSTEM_CONFIG_KEYS:
-            gen_val = gen_filesystem.get(key)
-            ext_val = ext_filesystem.get(key)
-            if gen_val != ext_val:
-                if gen_val is not None and ext_val is None:
-                    missing.append(f"filesystem.config:{key}")
-                elif gen_val is None and ext_val is not None:
-                    extra.append(f"filesystem.config:{key}")
-                else:
-                    missing.append(f"filesystem.config:{key}")
-                    extra.append(f"filesystem.config:{key}")
-
-        # Compare pass-through top-level sandbox config keys
-        gen_sandbox = generated.get("sandbox", {})
-        ext_sandbox = existing.get("sandbox", {})
-        for key in _SANDBOX_CONFIG_KEYS:
-            gen_val = gen_sandbox.get(key)
-            ext_val = ext_sandbox.get(key)
-            if gen_val != ext_val:
-                if gen_val is not None and ext_val is None:
-                    missing.append(f"sandbox.config:{key}")
-                elif gen_val is None and ext_val is not None:
-                    extra.append(f"sandbox.config:{key}")
-                else:
-                    missing.append(f"sandbox.config:{key}")
-                    extra.append(f"sandbox.config:{key}")
-
-        return DiffResult(
-            agent=self.name,
-            missing=sorted(missing),
-            extra=sorted(extra),
-            matched=len(missing) == 0 and len(extra) == 0,
-        )
-
-
-def _is_directory_pattern(pattern: str) -> bool:
+        if by_hand:
+            # Drop exactly the hand-added copies; the rest is compared as usual
+            rest = Counter(permissions[section]) - Counter(by_hand)
+            permissions[section] = _take(permissions[section], rest)
+            kept += by_hand
+    return {**existing, "permissions": permissions}, kept
+
+
+def _diff_schema() -> tuple:
+    """Managed paths of settings.json (see twsrt.lib.diff)."""
+    from twsrt.lib.diff import Multiset, Value
+    from twsrt.lib.sources import (
+        _FILESYSTEM_CONFIG_KEYS,
+        _NETWORK_CONFIG_KEYS,
+        _SANDBOX_CONFIG_KEYS,
+    )
+
+    return (
+        Multiset(("permissions", "deny")),
+        Multiset(("permissions", "ask")),
+        # Only WebFetch allows are managed; others are the user's
+        Multiset(("permissions", "allow"), keep=_is_webfetch_entry),
+        Multiset(("sandbox", "network", "allowedDomains"), prefix="network:"),
+        *(
+            Value(("sandbox", "network", k), f"network.config:{k}")
+            for k in _NETWORK_CONFIG_KEYS
+        ),
+        *(
+            Value(("sandbox", "filesystem", k), f"filesystem.config:{k}")
+            for k in _FILESYSTEM_CONFIG_KEYS
+        ),
+        *(Value(("sandbox", k), f"sandbox.config:{k}") for k in _SANDBOX_CONFIG_KEYS),
+    )
+
+
+def _is_directory_pattern(
+    pattern: str, home: Path | None = None, fs: FileSystem | None = None
+) -> bool:
     """Determine if a deny pattern refers to a directory (needs /** expansion).
 
     Glob patterns (containing * or ?) are treated as-is (no expansion).
     Concrete paths are checked on the filesystem; unknown or inaccessible
     paths default to directory (safer — more restrictive).
+    A leading '~' is resolved against home (tenant home) when given.
     """
     if "*" in pattern or "?" in pattern:
         return False
     try:
-        expanded = Path(pattern).expanduser()
-        if expanded.is_file():
+        expanded = expand_home(pattern, home)
+        if (fs or vfs.current()).is_file(expanded):
             return False
     except OSError:
         pass
@@ -198,39 +240,160 @@ def _is_directory_pattern(pattern: str) -> bool:
     return True
 
 
+def home_facts(rules: list[SecurityRule], home: Path | None) -> tuple[bool, ...]:
+    """What prepare() reads below home: which denyRead patterns are directories.
+
+    Documents built from the same rules and config are identical for homes
+    with equal facts, so fleet runs can generate them once.
+    """
+    return tuple(
+        _is_directory_pattern(rule.pattern, home)
+        for rule in rules
+        if rule.scope == Scope.READ and rule.action == Action.DENY
+    )
+
+
+# Managed sections whose hand edits hand_edits = "keep" keeps. WebFetch
+# allows are twsrt's by prefix: one added by hand is always dropped.
+KEPT_SECTIONS = ("deny", "ask")
+
+
 def _is_webfetch_entry(entry: str) -> bool:
     """Check if an allow entry is a WebFetch(domain:...) entry managed by twsrt."""
     return entry.startswith("WebFetch(domain:")
 
 
-def selective_merge(target: Path, generated: dict) -> dict:
+def managed_entries(settings: dict) -> dict[str, list[str]]:
+    """The permission lists twsrt owns: deny, ask and WebFetch allows.
+
+    Saved after each write as the base of the next three-way merge.
+    """
+    permissions = settings.get("permissions", {})
+    return {
+        "deny": list(permissions.get("deny", [])),
+        "ask": list(permissions.get("ask", [])),
+        "allow": [e for e in permissions.get("allow", []) if _is_webfetch_entry(e)],
+    }
+
+
+def merge_entries(
+    base: list[str], generated: list[str], current: list[str], keep: bool = True
+) -> tuple[list[str], list[str], list[str]]:
+    """Three-way merge of one managed list; returns (merged, by_hand, restored).
+
+    base is what twsrt generated last time, current what is on disk now.
+    Entries twsrt dropped since base are removed from current and new ones
+    appended; current is otherwise left as is. by_hand are entries added
+    outside twsrt (kept with keep, else dropped: merged == generated);
+    restored are generated entries someone deleted by hand, which come back.
+
+    Lists are merged as multisets, like diff compares them: generated lists
+    may hold an entry twice (a path both denyRead and denyWrite), and each
+    copy is added, restored or reported on its own.
+    """
+    base_counts = Counter(base)
+    generated_counts = Counter(generated)
+    current_counts = Counter(current)
+    # Copies on disk beyond what base and generation account for (unary +
+    # drops the counts that are not positive)
+    hand_counts = +Counter(
+        {
+            e: n - max(base_counts[e], generated_counts[e])
+            for e, n in current_counts.items()
+        }
+    )
+    # Copies generated before and now, missing on disk
+    restored_counts = +Counter(
+        {
+            e: min(base_counts[e], n) - current_counts[e]
+            for e, n in generated_counts.items()
+        }
+    )
+    by_hand = _take(current, hand_counts, from_end=True)
+    restored = _take(generated, restored_counts)
+    if not keep:
+        return list(generated), by_hand, restored
+    budget = generated_counts + hand_counts
+    merged = _take(current, budget)
+    merged += _take(generated, budget - Counter(merged))
+    return merged, by_hand, restored
+
+
+def _take(entries: list[str], counts: Counter, from_end: bool = False) -> list[str]:
+    """entries in order, each kept at most counts[e] times (the last ones
+    with from_end).
+    """
+    left = Counter(counts)
+    ordered = reversed(entries) if from_end else entries
+    taken: list[str] = []
+    for e in ordered:
+        if left[e] > 0:
+            left[e] -= 1
+            taken.append(e)
+    return taken[::-1] if from_end else taken
+
+
+def selective_merge(
+    target: Path,
+    generated: dict,
+    base: dict[str, list[str]] | None = None,
+    keep_hand_edits: bool = True,
+    fs: FileSystem | None = None,
+) -> dict:
     """Merge generated permissions into existing settings.json.
 
     Selective merge rules:
-    - permissions.deny: fully replaced
-    - permissions.ask: fully replaced
-    - permissions.allow: WebFetch(domain:*) entries replaced,
+    - permissions.deny: fully replaced (three-way merged with a base)
+    - permissions.ask: fully replaced (three-way merged with a base)
+    - permissions.allow: WebFetch(domain:*) entries replaced (merged with a base),
       blanket allows, mcp__ allows, and project-specific allows preserved
     - sandbox.network: key-by-key merge (preserves unmanaged keys)
     - sandbox.filesystem: key-by-key merge (preserves unmanaged keys)
     - sandbox top-level keys: dict.update() (preserves Claude-only keys)
     - hooks, plugins, additionalDirectories: preserved unchanged
+
+    With a base (managed_entries of the previous write) deny, ask and the
+    WebFetch allows are three-way merged instead of replaced (merge_entries):
+    deny and ask entries added by hand are kept, or dropped without
+    keep_hand_edits, and reported either way. WebFetch allows added by hand
+    are always dropped (KEPT_SECTIONS).
     """
-    existing = json.loads(target.read_text())
+    existing = jsonio.loads((fs or vfs.current()).read_bytes(target))
 
-    # Replace deny and ask fully
     existing.setdefault("permissions", {})
-    existing["permissions"]["deny"] = generated["permissions"]["deny"]
-    if "ask" in generated["permissions"]:
-        existing["permissions"]["ask"] = generated["permissions"]["ask"]
-    else:
-        existing["permissions"].pop("ask", None)
-
-    # Selective merge for allow: strip WebFetch entries, keep everything else
-    existing_allow = existing["permissions"].get("allow", [])
+    permissions = existing["permissions"]
+    gen_permissions = generated["permissions"]
+    existing_allow = permissions.get("allow", [])
     preserved = [e for e in existing_allow if not _is_webfetch_entry(e)]
-    generated_allow = generated["permissions"].get("allow", [])
-    existing["permissions"]["allow"] = preserved + generated_allow
+
+    if base is None:
+        # Replace deny, ask and WebFetch allows fully
+        permissions["deny"] = gen_permissions["deny"]
+        if "ask" in gen_permissions:
+            permissions["ask"] = gen_permissions["ask"]
+        else:
+            permissions.pop("ask", None)
+        permissions["allow"] = preserved + gen_permissions.get("allow", [])
+    else:
+        current = managed_entries(existing)
+        kept: list[str] = []
+        dropped: list[str] = []
+        restored: list[str] = []
+        for section in ("deny", "ask", "allow"):
+            if section == "ask" and "ask" not in gen_permissions:
+                permissions.pop("ask", None)
+                continue
+            keep = keep_hand_edits and section in KEPT_SECTIONS
+            merged, added, removed = merge_entries(
+                base.get(section, []),
+                gen_permissions.get(section, []),
+                current[section],
+                keep,
+            )
+            permissions[section] = preserved + merged if section == "allow" else merged
+            (kept if keep else dropped).extend(added)
+            restored += removed
+        _report_hand_edits(target, kept, dropped, restored)
 
     # Merge sandbox sections key-by-key (preserves unmanaged/Claude-only keys)
     existing.setdefault("sandbox", {})
@@ -249,3 +412,30 @@ def selective_merge(target: Path, generated: dict) -> dict:
             existing["sandbox"][key] = value
 
     return existing
+
+
+def _report_hand_edits(
+    target: Path, kept: list[str], dropped: list[str], restored: list[str]
+) -> None:
+    from twsrt.lib import diagnostics
+
+    if kept:
+        diagnostics.report(
+            "claude.hand-edits",
+            f"Kept entries added outside twsrt in {target}",
+            kept,
+        )
+    if dropped:
+        diagnostics.report(
+            "claude.hand-edits",
+            f"Dropped entries added outside twsrt in {target}",
+            dropped,
+            level="warning",
+        )
+    if restored:
+        diagnostics.report(
+            "claude.hand-edits",
+            f"Restored generated entries removed outside twsrt in {target}",
+            restored,
+            level="warning",
+        )
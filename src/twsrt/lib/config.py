@@ -3,45 +3,63 @@
 import tomllib
 from pathlib import Path
 
-from twsrt.lib.models import AppConfig
+from twsrt.lib import vfs
+from twsrt.lib.models import (
+    BUILTIN_PROFILES,
+    COPILOT_FORMATS,
+    HAND_EDIT_POLICIES,
+    AppConfig,
+    AskPolicy,
+    Profile,
+    expand_home,
+)
+from twsrt.lib.vfs import FileSystem
 
 
-def load_config(config_path: Path) -> AppConfig:
-    """Load AppConfig from a TOML file. Falls back to defaults if file is missing."""
-    if not config_path.exists():
-        return AppConfig()
+def load_config(
+    config_path: Path, home: Path | None = None, fs: FileSystem | None = None
+) -> AppConfig:
+    """Load AppConfig from a TOML file. Falls back to defaults if file is missing.
+
+    With home set, every '~' (including the defaults) expands against that
+    directory instead of the current user's home — used for fleet tenants.
+    """
+    fs = fs or vfs.current()
+    config = AppConfig() if home is None else _defaults_for_home(home)
+
+    if not fs.exists(config_path):
+        return config
 
     try:
-        with open(config_path, "rb") as f:
-            data = tomllib.load(f)
-    except tomllib.TOMLDecodeError as e:
+        data = tomllib.loads(fs.read_bytes(config_path).decode())
+    except (tomllib.TOMLDecodeError, UnicodeDecodeError) as e:
         raise ValueError(f"Invalid TOML in {config_path}: {e}") from e
 
     sources = data.get("sources", {})
     targets = data.get("targets", {})
 
-    srt_path = Path(sources["srt"]).expanduser() if "srt" in sources else None
+    srt_path = expand_home(sources["srt"], home) if "srt" in sources else None
     bash_rules_path = (
-        Path(sources["bash_rules"]).expanduser() if "bash_rules" in sources else None
+        expand_home(sources["bash_rules"], home) if "bash_rules" in sources else None
     )
     claude_settings_path = (
-        Path(targets["claude_settings"]).expanduser()
+        expand_home(targets["claude_settings"], home)
         if "claude_settings" in targets
         else None
     )
     copilot_output_path = (
-        Path(targets["copilot_output"]).expanduser()
+        expand_home(targets["copilot_output"], home)
         if "copilot_output" in targets
         else None
     )
 
     claude_yolo_path = (
-        Path(targets["claude_settings_yolo"]).expanduser()
+        expand_home(targets["claude_settings_yolo"], home)
         if "claude_settings_yolo" in targets
         else None
     )
     copilot_yolo_path = (
-        Path(targets["copilot_output_yolo"]).expanduser()
+        expand_home(targets["copilot_output_yolo"], home)
         if "copilot_output_yolo" in targets
         else None
     )
@@ -56,8 +74,8 @@ def load_config(config_path: Path) -> AppConfig:
         )
 
     sandbox_overrides = data.get("sandbox_overrides", {})
+    profiles = _load_profiles(data.get("profiles", {}), home, config_path)
 
-    config = AppConfig()
     if srt_path is not None:
         config.srt_path = srt_path
     if bash_rules_path is not None:
@@ -72,5 +90,94 @@ def load_config(config_path: Path) -> AppConfig:
         config.copilot_yolo_path = copilot_yolo_path
     if sandbox_overrides:
         config.sandbox_overrides = sandbox_overrides
+    if profiles:
+        config.profiles = profiles
+    if "compact" in targets:
+        config.compact = bool(targets["compact"])
+    if "copilot_format" in targets:
+        copilot_format = targets["copilot_format"]
+        if copilot_format not in COPILOT_FORMATS:
+            raise ValueError(
+                f"Invalid copilot_format '{copilot_format}' in {config_path}. "
+                f"Expected one of: {', '.join(COPILOT_FORMATS)}"
+            )
+        config.copilot_format = copilot_format
+    if "hand_edits" in targets:
+        hand_edits = targets["hand_edits"]
+        if hand_edits not in HAND_EDIT_POLICIES:
+            raise ValueError(
+                f"Invalid hand_edits '{hand_edits}' in {config_path}. "
+                f"Expected one of: {', '.join(HAND_EDIT_POLICIES)}"
+            )
+        config.hand_edits = hand_edits
+    for agent in ("claude", "copilot"):
+        key = f"{agent}_destinations"
+        if key in targets:
+            destinations = targets[key]
+            if not isinstance(destinations, list) or not all(
+                isinstance(d, str) for d in destinations
+            ):
+                raise ValueError(
+                    f"Invalid {key} in {config_path}: expected a list of paths"
+                )
+            config.destinations[agent] = [expand_home(d, home) for d in destinations]
 
     return config
+
+
+def _load_profiles(
+    data: dict, home: Path | None, config_path: Path
+) -> dict[str, Profile]:
+    """Parse [profiles.<name>] tables into Profiles."""
+    profiles: dict[str, Profile] = {}
+    for name, table in data.items():
+        if name in BUILTIN_PROFILES:
+            raise ValueError(
+                f"Profile name '{name}' in {config_path} is reserved for the "
+                f"built-in mode; use [sandbox_overrides.{name}] instead."
+            )
+        ask = table.get("ask")
+        try:
+            ask_policy = AskPolicy(ask) if ask is not None else None
+        except ValueError:
+            choices = ", ".join(p.value for p in AskPolicy)
+            raise ValueError(
+                f"Invalid ask policy '{ask}' for profile '{name}' in {config_path}. "
+                f"Expected one of: {choices}"
+            ) from None
+        claude_settings_path = (
+            expand_home(table["claude_settings"], home)
+            if "claude_settings" in table
+            else None
+        )
+        if (
+            claude_settings_path is not None
+            and claude_settings_path.name == "settings.json"
+        ):
+            raise ValueError(
+                f"Profile '{name}': claude_settings must not be 'settings.json' — "
+                "that path is reserved for the symlink anchor."
+            )
+        profiles[name] = Profile(
+            name=name,
+            yolo=table.get("yolo", False),
+            ask_policy=ask_policy,
+            sandbox_overrides=table.get("sandbox_overrides", {}),
+            claude_settings_path=claude_settings_path,
+            copilot_output_path=(
+                expand_home(table["copilot_output"], home)
+                if "copilot_output" in table
+                else None
+            ),
+        )
+    return profiles
+
+
+def _defaults_for_home(home: Path) -> AppConfig:
+    """AppConfig with default source/target paths rooted at home."""
+    return AppConfig(
+        srt_path=expand_home("~/.srt-settings.json", home),
+        bash_rules_path=expand_home("~/.config/twsrt/bash-rules.json", home),
+        claude_settings_path=expand_home("~/.claude/settings.full.json", home),
+        home=home,
+    )
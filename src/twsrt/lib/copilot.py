@@ -1,16 +1,20 @@
 """CopilotGenerator — translate SecurityRules to Copilot CLI flags."""
 
-import sys
 from pathlib import Path
 
+from twsrt.lib import diagnostics, jsonio, vfs
 from twsrt.lib.models import (
     Action,
     AppConfig,
+    AskPolicy,
     DiffResult,
     Scope,
     SecurityRule,
 )
 
+# Flags that take a value argument (everything else is a bare switch)
+_VALUE_OPTIONS = ("--allow-tool", "--deny-tool", "--allow-url", "--deny-url")
+
 
 class CopilotGenerator:
     @property
@@ -19,29 +23,74 @@ class CopilotGenerator:
 
     def generate(self, rules: list[SecurityRule], config: AppConfig) -> str:
         """Generate Copilot CLI flags from security rules."""
+        return self.render(self.build(rules, config), config.copilot_format)
+
+    def build(self, rules: list[SecurityRule], config: AppConfig) -> list[str]:
+        """Generate Copilot CLI flags as a list, one flag per entry."""
+        return self.finish(self.prepare(rules, config), config)
+
+    def render(self, flags: list[str], fmt: str = "shell") -> str:
+        """Render flags in an output format (see COPILOT_FORMATS).
+
+        shell: backslash-continued snippet to paste into a launch command
+        nul:   NUL-terminated argv tokens (xargs -0), no shell re-tokenizing
+        json:  JSON array of argv tokens
+        """
+        if fmt == "shell":
+            return "\n".join(f"{flag} \\" for flag in flags)
+        if fmt == "nul":
+            return "".join(f"{arg}\0" for arg in self.argv(flags))
+        if fmt == "json":
+            return jsonio.dumps(self.argv(flags))
+        raise ValueError(f"Unknown copilot format '{fmt}'")
+
+    def argv(self, flags: list[str]) -> list[str]:
+        """Split generated flags into argv tokens: "--opt 'v'" → ["--opt", "v"]."""
+        args: list[str] = []
+        for flag in flags:
+            option, _, value = flag.partition(" ")
+            args.append(option)
+            if value:
+                args.append(value[1:-1])
+        return args
+
+    def prepare(
+        self, rules: list[SecurityRule], config: AppConfig
+    ) -> list[SecurityRule]:
+        """Select the rules Copilot maps to flags, in order (shared across profiles)."""
+        # READ/DENY, WRITE/DENY: SRT handles at OS level
+        return [
+            rule
+            for rule in rules
+            if rule.scope in (Scope.EXECUTE, Scope.NETWORK)
+            or (rule.scope == Scope.WRITE and rule.action == Action.ALLOW)
+        ]
+
+    def finish(self, prepared: list[SecurityRule], config: AppConfig) -> list[str]:
+        """Apply yolo and ask policy to prepared rules."""
         flags: list[str] = []
 
         if config.yolo:
             flags.append("--yolo")
 
+        policy = config.effective_ask_policy
         allow_write_seen = False
+        lossy: list[str] = []
 
-        for rule in rules:
+        for rule in prepared:
             if rule.scope == Scope.EXECUTE and rule.action == Action.DENY:
                 flags.append(f"--deny-tool 'shell({rule.pattern})'")
 
             elif rule.scope == Scope.EXECUTE and rule.action == Action.ASK:
-                if config.yolo:
+                if policy == AskPolicy.SKIP:
                     # Yolo mode: skip ASK rules entirely (--yolo subsumes them)
                     pass
+                elif policy == AskPolicy.DENY:
+                    flags.append(f"--deny-tool 'shell({rule.pattern})'")
                 else:
                     # FR-012: lossy mapping — ask → deny-tool with warning
                     flags.append(f"--deny-tool 'shell({rule.pattern})'")
-                    print(
-                        f"INFO: Bash ask rule '{rule.pattern}' mapped to "
-                        f"--deny-tool for copilot (no ask equivalent)",
-                        file=sys.stderr,
-                    )
+                    lossy.append(rule.pattern)
 
             elif rule.scope == Scope.WRITE and rule.action == Action.ALLOW:
                 if not config.yolo:
@@ -60,32 +109,54 @@ class CopilotGenerator:
             elif rule.scope == Scope.NETWORK and rule.action == Action.DENY:
                 flags.append(f"--deny-url '{rule.pattern}'")
 
-            # READ/DENY, WRITE/DENY: SRT handles at OS level
-
-        return "\n".join(f"{flag} \\" for flag in flags)
+        if lossy:
+            diagnostics.report(
+                "copilot.ask-as-deny",
+                "Bash ask rules mapped to --deny-tool for copilot (no ask equivalent)",
+                lossy,
+            )
+        return flags
 
     def diff(
         self, rules: list[SecurityRule], target: Path, config: AppConfig
     ) -> DiffResult:
         """Compare generated flags against existing target file."""
-        generated_text = self.generate(rules, config)
-        gen_lines = {
-            line.strip().rstrip(" \\")
-            for line in generated_text.strip().split("\n")
-            if line.strip()
-        }
-        ext_lines = {
-            line.strip().rstrip(" \\")
-            for line in target.read_text().strip().split("\n")
-            if line.strip()
-        }
-
-        missing = sorted(gen_lines - ext_lines)
-        extra = sorted(ext_lines - gen_lines)
-
-        return DiffResult(
-            agent=self.name,
-            missing=missing,
-            extra=extra,
-            matched=len(missing) == 0 and len(extra) == 0,
+        return self.compare(self.build(rules, config), target)
+
+    def compare(self, flags: list[str], target: Path) -> DiffResult:
+        """Compare generated flags against existing target file (any format)."""
+        from twsrt.lib.diff import Multiset, diff_documents
+
+        existing = parse_flags(vfs.current().read_bytes(target).decode())
+        return DiffResult.from_changes(
+            self.name,
+            diff_documents(
+                (Multiset(("flags",)),), {"flags": flags}, {"flags": existing}
+            ),
         )
+
+
+def parse_flags(text: str) -> list[str]:
+    """Parse a flags file in shell, nul or json format into canonical flags.
+
+    Comment lines (the shell format's twsrt stamp) are ignored.
+    """
+    if "\0" in text:
+        return _flags_from_argv(text.split("\0"))
+    stripped = text.strip()
+    if stripped.startswith("["):
+        return _flags_from_argv(jsonio.loads(stripped))
+    lines = (line.strip() for line in stripped.split("\n"))
+    return [line.rstrip(" \\") for line in lines if line and not line.startswith("#")]
+
+
+def _flags_from_argv(args: list[str]) -> list[str]:
+    """Rejoin argv tokens into canonical "--opt 'value'" flags."""
+    flags: list[str] = []
+    it = iter(arg for arg in args if arg)
+    for arg in it:
+        if arg in _VALUE_OPTIONS:
+            flags.append(f"{arg} '{next(it, '')}'")
+        else:
+            flags.append(arg)
+    return flags
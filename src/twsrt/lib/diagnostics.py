@@ -0,0 +1,139 @@
+"""Aggregated diagnostics reported by generators.
+
+Generators report warnings through report() instead of printing them. Inside
+a collect() block (one CLI run) reports are aggregated: identical warnings
+are merged, their subjects deduplicated and counted, and the caller emits a
+single summary at the end. Outside collect() each report is printed to stderr
+at once — still one line per report call, never one per rule.
+"""
+
+import json
+import sys
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+DIAGNOSTICS_FORMATS = ("text", "json")
+
+# Subjects listed per diagnostic in text output / JSON output
+TEXT_EXAMPLES = 3
+JSON_EXAMPLES = 20
+
+
+@dataclass
+class Diagnostic:
+    level: str
+    code: str
+    message: str
+    count: int = 0
+    subjects: dict[str, None] = field(default_factory=dict)  # ordered set
+
+    def text(self) -> str:
+        line = f"{self.level.upper()}: {self.message}"
+        if not self.subjects:
+            return line if self.count == 1 else f"{line} ({self.count}x)"
+        shown = ", ".join(f"'{s}'" for s in list(self.subjects)[:TEXT_EXAMPLES])
+        more = len(self.subjects) - TEXT_EXAMPLES
+        if more > 0:
+            shown += f" and {more} more"
+        return f"{line}: {shown}"
+
+    def as_dict(self, limit: int | None = JSON_EXAMPLES) -> dict:
+        """Serializable form; limit=None keeps every subject (lossless merge)."""
+        return {
+            "level": self.level,
+            "code": self.code,
+            "message": self.message,
+            "count": self.count,
+            "unique": len(self.subjects),
+            "examples": list(self.subjects)[:limit],
+        }
+
+
+class Diagnostics:
+    """Collector merging reports with the same level, code and message."""
+
+    def __init__(self) -> None:
+        self._entries: dict[tuple[str, str, str], Diagnostic] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def entries(self) -> list[Diagnostic]:
+        return list(self._entries.values())
+
+    def report(
+        self,
+        code: str,
+        message: str,
+        subjects: Iterable[str] = (),
+        level: str = "info",
+    ) -> None:
+        """Record one occurrence per subject (one if there are none)."""
+        key = (level, code, message)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = Diagnostic(level, code, message)
+        added = 0
+        for subject in subjects:
+            entry.subjects[subject] = None
+            added += 1
+        entry.count += added or 1
+
+    def merge(self, entries: Iterable[dict]) -> None:
+        """Fold in entries from as_dict(limit=None), e.g. from worker processes."""
+        for data in entries:
+            key = (data["level"], data["code"], data["message"])
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = Diagnostic(*key)
+            entry.count += data["count"]
+            entry.subjects.update(dict.fromkeys(data["examples"]))
+
+    def render(self, fmt: str = "text") -> str:
+        """Summary: one line per diagnostic, or a JSON document."""
+        if fmt == "json":
+            return json.dumps(
+                {"diagnostics": [e.as_dict() for e in self._entries.values()]},
+                indent=2,
+            )
+        return "\n".join(e.text() for e in self._entries.values())
+
+
+_active: Diagnostics | None = None
+
+
+def report(
+    code: str, message: str, subjects: Iterable[str] = (), level: str = "info"
+) -> None:
+    """Report to the active collector, or straight to stderr if none."""
+    if _active is not None:
+        _active.report(code, message, subjects, level)
+        return
+    single = Diagnostics()
+    single.report(code, message, subjects, level)
+    print(single.render(), file=sys.stderr)
+
+
+def merge(entries: list[dict]) -> None:
+    """Merge serialized entries into the active collector, or print them."""
+    if not entries:
+        return
+    if _active is not None:
+        _active.merge(entries)
+        return
+    collector = Diagnostics()
+    collector.merge(entries)
+    print(collector.render(), file=sys.stderr)
+
+
+@contextmanager
+def collect() -> Iterator[Diagnostics]:
+    """Aggregate all reports made inside the block into one collector."""
+    global _active
+    previous, _active = _active, Diagnostics()
+    try:
+        yield _active
+    finally:
+        _active = previous
@@ -0,0 +1,110 @@
+"""Structural diff of a generated document against an existing one.
+
+Generators describe what they manage as a schema of paths instead of
+comparing sections by hand:
+
+- Multiset: a list compared as a multiset (order ignored, duplicates
+  counted); entries only in the generated list are missing, entries only in
+  the existing one are extra. An optional keep filter restricts the
+  comparison to managed entries (e.g. WebFetch allows).
+- Value: a scalar or dict compared by value; absent (or null) on one side
+  is missing/extra, different on both is changed.
+
+diff_documents walks the schema once, looking each path up in both
+documents, and yields DiffEntry objects as it goes; DiffResult.from_changes
+collects them. Adding a managed key is one schema line.
+"""
+
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from typing import Any
+
+from twsrt.lib import jsonio
+from twsrt.lib.models import DiffEntry
+
+# DiffEntry kinds
+MISSING = "missing"  # in generated, not in existing
+EXTRA = "extra"  # in existing, not in generated
+CHANGED = "changed"  # in both, with different values
+
+DIFF_FORMATS = ("text", "json")
+
+
+@dataclass(frozen=True)
+class Multiset:
+    path: tuple[str, ...]
+    prefix: str = ""  # prepended to entries to form their keys
+    keep: Callable[[Any], bool] | None = None
+
+    def diff(self, generated: Any, existing: Any) -> Iterator[DiffEntry]:
+        where = ".".join(self.path)
+        gen = self._entries(generated)
+        ext = self._entries(existing)
+        gen_counts = Counter(_hashable(e) for e in gen)
+        ext_counts = Counter(_hashable(e) for e in ext)
+        for kind, entries, surplus in (
+            (MISSING, gen, gen_counts - ext_counts),
+            (EXTRA, ext, ext_counts - gen_counts),
+        ):
+            for entry in entries:
+                h = _hashable(entry)
+                if surplus[h] > 0:
+                    surplus[h] -= 1
+                    key = self.prefix + (h if isinstance(h, str) else str(h))
+                    if kind == MISSING:
+                        yield DiffEntry(kind, where, key, new=entry)
+                    else:
+                        yield DiffEntry(kind, where, key, old=entry)
+
+    def _entries(self, document: Any) -> list[Any]:
+        value = lookup(document, self.path)
+        if value is None:
+            return []
+        entries = value if isinstance(value, list) else [value]
+        if self.keep is None:
+            return entries
+        return [e for e in entries if self.keep(e)]
+
+
+@dataclass(frozen=True)
+class Value:
+    path: tuple[str, ...]
+    key: str  # reported key, e.g. "network.config:httpProxyPort"
+
+    def diff(self, generated: Any, existing: Any) -> Iterator[DiffEntry]:
+        new = lookup(generated, self.path)
+        old = lookup(existing, self.path)
+        if new == old:
+            return
+        where = ".".join(self.path)
+        if old is None:
+            yield DiffEntry(MISSING, where, self.key, new=new)
+        elif new is None:
+            yield DiffEntry(EXTRA, where, self.key, old=old)
+        else:
+            yield DiffEntry(CHANGED, where, self.key, old=old, new=new)
+
+
+def diff_documents(
+    schema: Iterable[Multiset | Value], generated: Any, existing: Any
+) -> Iterator[DiffEntry]:
+    """Differences at the schema's paths, in schema order."""
+    for managed in schema:
+        yield from managed.diff(generated, existing)
+
+
+def lookup(document: Any, path: tuple[str, ...]) -> Any:
+    """Value at path, None if absent or if an intermediate is not a dict."""
+    for part in path:
+        if not isinstance(document, dict):
+            return None
+        document = document.get(part)
+    return document
+
+
+def _hashable(value: Any) -> Any:
+    """value itself if hashable, else its canonical JSON (dicts, lists)."""
+    if isinstance(value, (dict, list)):
+        return jsonio.dumps(value, compact=True)
+    return value
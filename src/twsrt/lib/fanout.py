@@ -0,0 +1,118 @@
+"""Placement of a written target at extra destinations ([targets] fan-out).
+
+The target is generated and written once; every destination then receives
+the same bytes, cheapest method first:
+
+- reflink: copy-on-write clone sharing the target's blocks (Btrfs, XFS)
+- copy: plain byte copy, the fallback for everything else
+
+Hard links are not used: a destination sharing the target's inode would
+pass an in-place edit at one name (an editor saving over the file) on to
+the target and every other destination. A destination left hardlinked by
+an earlier version is replaced by a copy.
+
+Like ensure_symlink, each placement goes to a temp name in the destination
+directory and is moved into place with os.replace(), so readers never see a
+partial file. Destinations whose content already matches are skipped.
+"""
+
+import filecmp
+import os
+import shutil
+import sys
+from pathlib import Path
+
+from twsrt.lib import diagnostics
+from twsrt.lib.fileio import discard, temp_for
+
+# Placement methods, in order of preference
+REFLINK = "reflink"
+COPY = "copy"
+UNCHANGED = "unchanged"
+
+# Linux FICLONE ioctl: _IOW(0x94, 9, int)
+_FICLONE = 0x40049409
+
+
+def same_content(source: Path, dest: Path) -> bool:
+    """True if dest exists and holds exactly source's bytes."""
+    try:
+        if os.path.samefile(source, dest):
+            return True
+        return filecmp.cmp(source, dest, shallow=False)
+    except OSError:
+        return False
+
+
+def place(source: Path, dest: Path) -> str:
+    """Atomically place source's content at dest; returns the method used.
+
+    Raises OSError if dest cannot be written at all.
+    """
+    if same_content(source, dest) and not _same_inode(source, dest):
+        return UNCHANGED
+
+    fd, tmp = temp_for(dest)
+    os.close(fd)
+    try:
+        method = _materialize(source, Path(tmp))
+        os.replace(tmp, dest)
+    except BaseException:
+        discard(tmp)
+        raise
+    return method
+
+
+def fan_out(source: Path, destinations: list[Path]) -> list[str]:
+    """Place source at every destination; returns the messages to report.
+
+    A destination that cannot be written is reported as a warning diagnostic
+    and does not stop the others.
+    """
+    messages: list[str] = []
+    failed: list[str] = []
+    for dest in destinations:
+        try:
+            method = place(source, dest)
+        except OSError as e:
+            failed.append(f"{dest} ({e.strerror or e})")
+            continue
+        if method == UNCHANGED:
+            messages.append(f"Unchanged: {dest}")
+        else:
+            messages.append(f"Placed: {dest} ({method})")
+    if failed:
+        diagnostics.report(
+            "fanout.failed", "Cannot place target at destination", failed, "warning"
+        )
+    return messages
+
+
+def _materialize(source: Path, tmp: Path) -> str:
+    """Fill the (existing, empty) temp file tmp from source, cheapest first."""
+    try:
+        _reflink(source, tmp)
+        return REFLINK
+    except OSError:
+        pass
+
+    shutil.copy2(source, tmp)
+    return COPY
+
+
+def _same_inode(source: Path, dest: Path) -> bool:
+    try:
+        return os.path.samefile(source, dest)
+    except OSError:
+        return False
+
+
+def _reflink(source: Path, tmp: Path) -> None:
+    """Clone source's blocks into tmp; OSError where unsupported."""
+    if not sys.platform.startswith("linux"):
+        raise OSError("reflink not supported on this platform")
+    import fcntl
+
+    with open(source, "rb") as src, open(tmp, "r+b") as dst:
+        fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+    shutil.copystat(source, tmp)
@@ -0,0 +1,124 @@
+"""Atomic, durable, write-if-changed file replacement.
+
+Targets are read by agents that may start at any moment and are watched by
+editors that reload on every mtime change. New content therefore goes to a
+temp file in the target's directory, is compared with the current target,
+and only if it differs is it fsync'd and renamed over the target (followed
+by an fsync of the directory, so the rename itself survives a crash).
+Readers see the old file or the new one, never a partial write, and an
+unchanged target keeps its mtime. A target that is a symlink (settings kept
+in a dotfiles repo) is written through: the file it points to is replaced,
+and the link stays.
+"""
+
+import filecmp
+import os
+import secrets
+from pathlib import Path
+
+
+_TEMP_ATTEMPTS = 100
+
+
+def temp_for(target: Path) -> tuple[int, str]:
+    """Create a temp file next to target (creating its directory); (fd, path).
+
+    Created with mode 0o666 for the kernel to apply the umask to, as for any
+    new file (mkstemp would use 0o600), so a new target gets the usual mode
+    without reading the process-wide umask.
+    """
+    target.parent.mkdir(parents=True, exist_ok=True)
+    flags = os.O_RDWR | os.O_CREAT | os.O_EXCL | getattr(os, "O_CLOEXEC", 0)
+    for _ in range(_TEMP_ATTEMPTS):
+        path = target.parent / f".{target.name}.{secrets.token_hex(4)}.tmp"
+        try:
+            return os.open(path, flags, 0o666), str(path)
+        except FileExistsError:
+            continue
+    raise FileExistsError(f"No free temp name for {target}")
+
+
+def real_target(target: Path) -> Path:
+    """The file a write to target lands in: target, or where its link points."""
+    return target.resolve() if target.is_symlink() else target
+
+
+def install(tmp: str, target: Path) -> bool:
+    """Move the completed temp file tmp over target unless their bytes match.
+
+    Returns True if target was replaced; on a match tmp is removed and
+    target is left untouched. Keeps target's permission bits. A symlinked
+    target is replaced where it points; tmp must have been created there
+    (temp_for(real_target(target))).
+    """
+    target = real_target(target)
+    try:
+        if target.exists() and filecmp.cmp(tmp, target, shallow=False):
+            os.remove(tmp)
+            return False
+        _fsync_path(tmp)
+        mode = _file_mode(target)
+        if mode is not None:
+            os.chmod(tmp, mode)
+        os.replace(tmp, target)
+    except BaseException:
+        discard(tmp)
+        raise
+    _fsync_dir(target.parent)
+    return True
+
+
+def write_if_changed(target: Path, data: bytes) -> bool:
+    """Atomically replace target with data; False (no write) if identical."""
+    try:
+        if target.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    fd, tmp = temp_for(real_target(target))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+    except BaseException:
+        discard(tmp)
+        raise
+    return install(tmp, target)
+
+
+def discard(tmp: str) -> None:
+    try:
+        os.remove(tmp)
+    except OSError:
+        pass
+
+
+def _fsync_path(path: str) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _fsync_dir(directory: Path) -> None:
+    """Persist a rename; not possible on every platform (Windows)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _file_mode(target: Path) -> int | None:
+    """target's mode for its replacement; None for a new target (temp_for's
+    creation mode, with the umask applied, stands).
+    """
+    try:
+        return target.stat().st_mode & 0o7777
+    except OSError:
+        return None
@@ -0,0 +1,409 @@
+"""Fleet operations — generate or diff agent configs for many tenants at once.
+
+A tenant is a (home dir, config.toml) pair. '~' in a tenant's config expands
+against its home. Sources are parsed once per distinct content hash and the
+per-tenant work is fanned out over a process pool:
+
+- generate_fleet: generate + write per tenant
+- diff_fleet: each distinct document is generated once in this process; the
+  pool only reads and compares targets, one record per tenant and agent
+"""
+
+import glob
+import json
+import os
+import tomllib
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from twsrt.lib import diagnostics, jsonio
+from twsrt.lib.models import AppConfig, SecurityRule, SrtResult, expand_home
+
+DEFAULT_TENANT_CONFIG = "~/.config/twsrt/config.toml"
+
+# fleet diff record statuses
+MATCHED = "matched"
+DRIFT = "drift"
+FAILED = "failed"
+
+
+@dataclass
+class Tenant:
+    name: str
+    home: Path
+    config_path: Path
+
+
+@dataclass
+class TenantResult:
+    tenant: str
+    ok: bool
+    messages: list[str] = field(default_factory=list)
+    error: str | None = None
+    diagnostics: list[dict] = field(default_factory=list)
+
+
+@dataclass
+class _Job:
+    tenant: Tenant
+    config: AppConfig
+    srt_key: str
+    bash_key: str
+
+
+@dataclass
+class _Check:
+    agent: str
+    target: str
+    document_key: str
+    base: dict[str, list[str]] | None = None  # targets.merge_base
+
+
+@dataclass
+class _DiffJob:
+    tenant: str
+    home: str
+    checks: list[_Check]
+
+
+# Parsed sources (or generated documents) keyed by content hash, installed
+# once per worker process
+_shared: dict[str, Any] = {}
+
+
+def read_manifest(manifest_path: Path) -> list[Tenant]:
+    """Parse a fleet manifest TOML into tenants.
+
+    [[tenant]]
+    home = "/home/alice"
+    config = "~/.config/twsrt/config.toml"  # optional; '~' is the tenant home
+    name = "alice"                          # optional; defaults to home dir name
+    """
+    if not manifest_path.exists():
+        raise FileNotFoundError(f"Fleet manifest not found: {manifest_path}")
+
+    try:
+        with open(manifest_path, "rb") as f:
+            data = tomllib.load(f)
+    except tomllib.TOMLDecodeError as e:
+        raise ValueError(f"Invalid TOML in {manifest_path}: {e}") from e
+
+    tenants: list[Tenant] = []
+    for i, entry in enumerate(data.get("tenant", [])):
+        if "home" not in entry:
+            raise ValueError(f"Tenant #{i + 1} in {manifest_path} has no 'home'")
+        home = Path(entry["home"]).expanduser()
+        tenants.append(
+            Tenant(
+                name=entry.get("name", home.name),
+                home=home,
+                config_path=expand_home(
+                    entry.get("config", DEFAULT_TENANT_CONFIG), home
+                ),
+            )
+        )
+    return tenants
+
+
+def tenants_from_homes(
+    patterns: list[str], config: str = DEFAULT_TENANT_CONFIG
+) -> list[Tenant]:
+    """Tenants for home dirs given as paths or glob patterns ("/home/*").
+
+    Globs are expanded here, so thousands of homes need not fit into argv.
+    Each home is taken once, in pattern order (sorted within a glob).
+    """
+    homes: dict[Path, None] = {}
+    for pattern in patterns:
+        expanded = os.path.expanduser(pattern)
+        if any(c in expanded for c in "*?["):
+            matches = sorted(Path(p) for p in glob.glob(expanded) if os.path.isdir(p))
+        else:
+            matches = [Path(expanded)]
+        homes.update(dict.fromkeys(matches))
+    return [
+        Tenant(name=home.name, home=home, config_path=expand_home(config, home))
+        for home in homes
+    ]
+
+
+def generate_fleet(
+    tenants: list[Tenant],
+    agents: list[str],
+    yolo: bool = False,
+    workers: int | None = None,
+) -> list[TenantResult]:
+    """Generate and write configs for all tenants; one result per tenant, in order.
+
+    Config loading and source hashing/parsing happen in this process so that
+    tenants sharing identical source files share one parse. Generation and
+    writes run in a process pool (in-process when workers <= 1).
+    """
+    from twsrt.lib.config import load_config
+
+    parsed: dict[str, SrtResult | list[SecurityRule]] = {}
+    results: dict[int, TenantResult] = {}
+    jobs: list[tuple[int, _Job]] = []
+
+    for i, tenant in enumerate(tenants):
+        try:
+            config = load_config(tenant.config_path, home=tenant.home)
+            srt_key, bash_key = _parse_sources(config, parsed)
+        except (FileNotFoundError, ValueError) as e:
+            results[i] = TenantResult(tenant=tenant.name, ok=False, error=str(e))
+            continue
+        jobs.append((i, _Job(tenant, config, srt_key, bash_key)))
+
+    workers = workers or os.cpu_count() or 1
+    job_list = [job for _, job in jobs]
+    if workers <= 1 or len(job_list) <= 1:
+        _init_worker(parsed, agents, yolo)
+        done = [_run_tenant(job) for job in job_list]
+    else:
+        chunksize = max(1, len(job_list) // (workers * 4))
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(parsed, agents, yolo),
+        ) as pool:
+            done = list(pool.map(_run_tenant, job_list, chunksize=chunksize))
+
+    for (i, _), result in zip(jobs, done):
+        results[i] = result
+        diagnostics.merge(result.diagnostics)
+    return [results[i] for i in range(len(tenants))]
+
+
+def diff_fleet(
+    tenants: list[Tenant],
+    agents: list[str],
+    yolo: bool = False,
+    workers: int | None = None,
+) -> list[dict[str, Any]]:
+    """Drift of every tenant's targets; records in tenant order.
+
+    Records are JSON-ready dicts: tenant, home, agent, target, status
+    (matched, drift or failed), the missing/extra keys and the changes
+    with old/new values, or an error. A tenant whose config or sources
+    cannot be read gets one failed record with agent None.
+
+    Tenants with equal sources, options and home facts (claude.home_facts)
+    share one generated document.
+    """
+    from twsrt.lib.agent import GENERATORS
+    from twsrt.lib.config import load_config
+    from twsrt.lib.targets import merge_base, resolve_target
+
+    parsed: dict[str, SrtResult | list[SecurityRule]] = {}
+    documents: dict[str, Any] = {}
+    records: dict[int, list[dict[str, Any]]] = {}
+    jobs: list[tuple[int, _DiffJob]] = []
+
+    for i, tenant in enumerate(tenants):
+        try:
+            config = load_config(tenant.config_path, home=tenant.home)
+            srt_key, bash_key = _parse_sources(config, parsed)
+        except (FileNotFoundError, ValueError) as e:
+            records[i] = [
+                {
+                    "tenant": tenant.name,
+                    "home": str(tenant.home),
+                    "agent": None,
+                    "status": FAILED,
+                    "error": str(e),
+                }
+            ]
+            continue
+        srt_result: SrtResult = parsed[srt_key]  # type: ignore[assignment]
+        rules = srt_result.rules + parsed[bash_key]  # type: ignore[operator]
+        _apply_sources(config, srt_result, yolo)
+
+        checks: list[_Check] = []
+        for name in agents:
+            target = resolve_target(name, config)
+            if target is None:
+                continue  # agent not configured for this tenant
+            key = _document_key(name, srt_key, bash_key, rules, config)
+            if key not in documents:
+                documents[key] = GENERATORS[name].build(rules, config)
+            base = merge_base(name, target, config)
+            checks.append(_Check(name, str(target), key, base))
+        jobs.append((i, _DiffJob(tenant.name, str(tenant.home), checks)))
+
+    workers = workers or os.cpu_count() or 1
+    job_list = [job for _, job in jobs]
+    if workers <= 1 or len(job_list) <= 1:
+        _init_worker(documents, agents, yolo)
+        done = [_diff_tenant(job) for job in job_list]
+    else:
+        chunksize = max(1, len(job_list) // (workers * 4))
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(documents, agents, yolo),
+        ) as pool:
+            done = list(pool.map(_diff_tenant, job_list, chunksize=chunksize))
+
+    for (i, _), tenant_records in zip(jobs, done):
+        records[i] = tenant_records
+    return [record for i in range(len(tenants)) for record in records[i]]
+
+
+def summarize_diffs(records: list[dict[str, Any]]) -> dict[str, Any]:
+    """Fleet-wide histogram: record statuses and, per drifted key, how many
+    targets miss it, have it extra or have it changed (most frequent first).
+    """
+    status = Counter(r["status"] for r in records)
+    kinds: dict[str, Counter[str]] = {
+        "missing": Counter(),
+        "extra": Counter(),
+        "changed": Counter(),
+    }
+    for record in records:
+        for change in record.get("changes", []):
+            kinds[change["kind"]][change["key"]] += 1
+    return {
+        "tenants": len({r["home"] for r in records}),
+        "targets": sum(1 for r in records if r["agent"] is not None),
+        "status": {s: status[s] for s in (MATCHED, DRIFT, FAILED)},
+        **{kind: dict(counts.most_common()) for kind, counts in kinds.items()},
+    }
+
+
+def write_summary(results: list[TenantResult], summary_path: Path) -> None:
+    """Write the per-tenant result summary as JSON."""
+    failed = sum(1 for r in results if not r.ok)
+    summary = {
+        "tenants": len(results),
+        "ok": len(results) - failed,
+        "failed": failed,
+        "results": [asdict(r) for r in results],
+    }
+    summary_path.parent.mkdir(parents=True, exist_ok=True)
+    summary_path.write_text(jsonio.dumps(summary) + "\n")
+
+
+def _parse_sources(
+    config: AppConfig, parsed: dict[str, SrtResult | list[SecurityRule]]
+) -> tuple[str, str]:
+    """Parse config's sources into parsed unless already there; their keys."""
+    from twsrt.lib.sources import read_bash_rules, read_srt, source_digest
+
+    srt_key = f"srt:{source_digest(config.srt_path)}"
+    bash_key = f"bash:{source_digest(config.bash_rules_path)}"
+    if srt_key not in parsed:
+        parsed[srt_key] = read_srt(config.srt_path)
+    if bash_key not in parsed:
+        parsed[bash_key] = read_bash_rules(config.bash_rules_path)
+    return srt_key, bash_key
+
+
+def _apply_sources(config: AppConfig, srt_result: SrtResult, yolo: bool) -> None:
+    # Copies: parsed sources are shared between tenants, overrides mutate
+    config.network_config = dict(srt_result.network_config)
+    config.filesystem_config = dict(srt_result.filesystem_config)
+    config.sandbox_config = dict(srt_result.sandbox_config)
+    config.yolo = yolo
+    config.apply_sandbox_overrides()
+
+
+def _document_key(
+    agent: str,
+    srt_key: str,
+    bash_key: str,
+    rules: list[SecurityRule],
+    config: AppConfig,
+) -> str:
+    """Identity of the document agent's build() makes for config."""
+    from twsrt.lib.claude import home_facts
+
+    material = {
+        "agent": agent,
+        "sources": [srt_key, bash_key],
+        "yolo": config.yolo,
+        "ask_policy": config.effective_ask_policy.value,
+        "network": config.network_config,
+        "filesystem": config.filesystem_config,
+        "sandbox": config.sandbox_config,
+        "home": home_facts(rules, config.home) if agent == "claude" else None,
+    }
+    return json.dumps(material, sort_keys=True, default=str)
+
+
+def _init_worker(parsed: dict[str, Any], agents: list[str], yolo: bool) -> None:
+    _shared["parsed"] = parsed
+    _shared["agents"] = agents
+    _shared["yolo"] = yolo
+
+
+def _run_tenant(job: _Job) -> TenantResult:
+    """Generate + write all requested agents for one tenant."""
+    from twsrt.lib.agent import GENERATORS
+    from twsrt.lib.targets import write_claude, write_copilot
+
+    srt_result: SrtResult = _shared["parsed"][job.srt_key]
+    bash_rules: list[SecurityRule] = _shared["parsed"][job.bash_key]
+
+    config = job.config
+    _apply_sources(config, srt_result, _shared["yolo"])
+    all_rules = srt_result.rules + bash_rules
+
+    result = TenantResult(tenant=job.tenant.name, ok=True)
+    with diagnostics.collect() as collected:
+        try:
+            for name in _shared["agents"]:
+                gen = GENERATORS[name]
+                document = gen.build(all_rules, config)
+                if gen.name == "claude":
+                    result.messages.extend(write_claude(document, config))
+                elif gen.name == "copilot":
+                    messages = write_copilot(document, config)
+                    if messages is not None:
+                        result.messages.extend(messages)
+                    else:
+                        result.messages.append(
+                            "Skipped copilot: no copilot_output target"
+                        )
+        except (OSError, ValueError) as e:
+            # ValueError: unparseable existing target (JSONDecodeError)
+            result.ok = False
+            result.error = str(e)
+    result.diagnostics = [entry.as_dict(limit=None) for entry in collected.entries]
+    return result
+
+
+def _diff_tenant(job: _DiffJob) -> list[dict[str, Any]]:
+    """Compare one tenant's targets against their generated documents."""
+    from twsrt.lib.agent import GENERATORS
+
+    records: list[dict[str, Any]] = []
+    for check in job.checks:
+        record: dict[str, Any] = {
+            "tenant": job.tenant,
+            "home": job.home,
+            "agent": check.agent,
+            "target": check.target,
+        }
+        try:
+            document = _shared["parsed"][check.document_key]
+            if check.base is None:
+                result = GENERATORS[check.agent].compare(document, Path(check.target))
+            else:
+                result = GENERATORS[check.agent].compare(
+                    document, Path(check.target), check.base
+                )
+        except (OSError, ValueError) as e:
+            record.update(status=FAILED, error=str(e))
+        else:
+            record.update(
+                status=MATCHED if result.matched else DRIFT,
+                missing=result.missing,
+                extra=result.extra,
+                changes=[change.as_dict() for change in result.changes],
+                kept=result.kept,
+            )
+        records.append(record)
+    return records
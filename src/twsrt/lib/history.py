@@ -0,0 +1,385 @@
+"""Content-addressed history of written targets (twsrt history / rollback).
+
+Every content a target is written with is kept as a zlib-compressed blob
+named by the SHA-256 of the uncompressed bytes, so identical contents are
+stored once:
+
+    <history dir>/objects/ab/cdef...   compressed content
+    <history dir>/index.jsonl          one line per version, oldest first
+    <history dir>/heads/<target hash>  latest version and version count
+    <history dir>/bases/<target hash>  managed entries of the last generation
+
+An index line records when a target got which blob and from which source
+fingerprint, and the blobs of its stamp sidecar (stamps.py) and merge base
+if it had them, so a rollback restores stamp and base with the content.
+Before a target is
+overwritten, content that does not match its last recorded version (hand
+edits, files predating twsrt) is recorded first, so what a write replaces
+can always be restored; the head file answers that without reading the
+index.
+
+The index is appended to; listing reads it backwards from the end in
+chunks, so showing recent versions does not depend on its length. Once a
+target has twice the retained number of versions ($TWSRT_HISTORY_KEEP,
+default HISTORY_KEEP, 0 keeps everything) the index is rewritten with the
+newest HISTORY_KEEP versions of each target, and blobs no longer referenced
+are deleted: amortized, a write stays O(1). Recording and pruning hold the
+store's lock (lock.py), so a prune never drops a concurrently appended line
+or a blob stored for it.
+"""
+
+import hashlib
+import os
+import time
+import zlib
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from twsrt.lib import jsonio
+from twsrt.lib.fileio import write_if_changed
+
+HISTORY_DIR_ENV = "TWSRT_HISTORY_DIR"
+HISTORY_KEEP_ENV = "TWSRT_HISTORY_KEEP"
+HISTORY_KEEP = 50  # versions retained per target
+INDEX_NAME = "index.jsonl"
+LOCK_NAME = ".lock"
+
+# Index entry events
+WRITE = "write"
+EXTERNAL = "external"  # content found on disk that twsrt did not record
+ROLLBACK = "rollback"
+
+_READ_CHUNK = 64 * 1024
+
+
+@dataclass
+class Version:
+    timestamp: float
+    target: str
+    blob: str
+    fingerprint: str | None = None
+    event: str = WRITE
+    sidecar: str | None = None  # blob of the stamp sidecar, if there was one
+    base: str | None = None  # blob of the three-way merge base, if there was one
+
+    @property
+    def when(self) -> str:
+        return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.timestamp))
+
+
+def default_history_dir(home: Path | None = None) -> Path:
+    """$TWSRT_HISTORY_DIR, else $XDG_DATA_HOME/twsrt/history, else
+    ~/.local/share/twsrt/history. With home (fleet tenants) always below home.
+    """
+    if os.environ.get(HISTORY_DIR_ENV):
+        return Path(os.environ[HISTORY_DIR_ENV]).expanduser()
+    if home is not None:
+        return home / ".local" / "share" / "twsrt" / "history"
+    xdg = os.environ.get("XDG_DATA_HOME")
+    base = Path(xdg).expanduser() if xdg else Path("~/.local/share").expanduser()
+    return base / "twsrt" / "history"
+
+
+def history_keep() -> int:
+    """Versions retained per target: $TWSRT_HISTORY_KEEP, else HISTORY_KEEP."""
+    try:
+        return max(0, int(os.environ[HISTORY_KEEP_ENV]))
+    except (KeyError, ValueError):
+        return HISTORY_KEEP
+
+
+class History:
+    """Blob store plus version index rooted at one directory."""
+
+    def __init__(self, root: Path | None = None, keep: int | None = None) -> None:
+        self.root = root or default_history_dir()
+        self.index = self.root / INDEX_NAME
+        self.keep = history_keep() if keep is None else keep
+
+    def blob_path(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / digest[2:]
+
+    def put_blob(self, data: bytes) -> str:
+        """Store data (once per distinct content); returns its digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest)
+        if not path.exists():
+            write_if_changed(path, zlib.compress(data))
+        return digest
+
+    def get_blob(self, digest: str) -> bytes:
+        """Content of a blob; raises FileNotFoundError or ValueError."""
+        try:
+            return zlib.decompress(self.blob_path(digest).read_bytes())
+        except zlib.error as e:
+            raise ValueError(f"Corrupt history blob {digest}: {e}") from e
+
+    def base_path(self, target: Path) -> Path:
+        return self.root / "bases" / f"{_target_key(target)}.json"
+
+    def head_path(self, target: Path) -> Path:
+        return self.root / "heads" / f"{_target_key(target)}.json"
+
+    def head(self, target: Path) -> dict | None:
+        """{"blob", "sidecar", "count"} of target's latest version; None if
+        there is none, or the store predates head files.
+        """
+        try:
+            head = jsonio.loads(self.head_path(target).read_bytes())
+        except (OSError, ValueError):
+            return None
+        return head if isinstance(head, dict) else None
+
+    def _put_head(self, target: Path, version: Version, count: int) -> None:
+        head = {"blob": version.blob, "sidecar": version.sidecar, "count": count}
+        write_if_changed(
+            self.head_path(target), (jsonio.dumps(head, compact=True) + "\n").encode()
+        )
+
+    def get_base(self, target: Path) -> dict[str, list[str]] | None:
+        """Managed entries twsrt last generated for target (three-way merge base)."""
+        try:
+            base = jsonio.loads(self.base_path(target).read_bytes())
+        except (OSError, ValueError):
+            return None
+        return base if isinstance(base, dict) else None
+
+    def put_base(self, target: Path, entries: dict[str, list[str]]) -> None:
+        data = (jsonio.dumps(entries, compact=True) + "\n").encode()
+        write_if_changed(self.base_path(target), data)
+
+    def record(
+        self,
+        target: Path,
+        data: bytes,
+        fingerprint: str | None = None,
+        event: str = WRITE,
+        sidecar: bytes | None = None,
+    ) -> Version:
+        """Store data (and sidecar content, if any) as target's newest version,
+        with target's current merge base.
+        """
+        with self._locked():
+            try:
+                base = self.base_path(target).read_bytes()
+            except OSError:
+                base = None
+            version = Version(
+                timestamp=time.time(),
+                target=str(target.absolute()),
+                blob=self.put_blob(data),
+                fingerprint=fingerprint,
+                event=event,
+                sidecar=self.put_blob(sidecar) if sidecar is not None else None,
+                base=self.put_blob(base) if base is not None else None,
+            )
+            line = jsonio.dumps(asdict(version), compact=True) + "\n"
+            # One O_APPEND write per entry: readers never see interleaved lines
+            fd = os.open(self.index, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line.encode())
+            finally:
+                os.close(fd)
+            head = self.head(target)
+            if head is not None:
+                count = int(head.get("count", 0)) + 1
+            else:
+                # Store without heads (older versions): count once, then keep count
+                count = sum(1 for _ in self.versions(target))
+            self._put_head(target, version, count)
+            if self.keep and count >= 2 * self.keep:
+                self._prune()
+        return version
+
+    def record_existing(self, target: Path) -> None:
+        """Record target's current content unless it is its latest version."""
+        try:
+            data = target.read_bytes()
+        except OSError:
+            return
+        head = self.head(target)
+        if head is not None:
+            latest_blob = head.get("blob")
+        else:
+            latest = next(self.versions(target), None)
+            latest_blob = latest.blob if latest is not None else None
+        if latest_blob != hashlib.sha256(data).hexdigest():
+            self.record(target, data, event=EXTERNAL, sidecar=_read_sidecar(target))
+
+    def prune(self) -> None:
+        """Keep the newest self.keep versions of each target; delete the blobs
+        only dropped versions referenced.
+        """
+        with self._locked():
+            self._prune()
+
+    def _prune(self) -> None:
+        if not self.keep:
+            return
+        try:
+            indexed = self.index.stat().st_mtime
+        except OSError:
+            return
+        versions = list(self.versions())  # newest first
+        counts: dict[str, int] = {}
+        kept: list[Version] = []
+        for version in versions:
+            counts[version.target] = counts.get(version.target, 0) + 1
+            if counts[version.target] <= self.keep:
+                kept.append(version)
+        kept.reverse()
+        data = "".join(
+            jsonio.dumps(asdict(v), compact=True) + "\n" for v in kept
+        ).encode()
+        write_if_changed(self.index, data)
+
+        latest: dict[str, Version] = {}
+        for version in kept:
+            latest[version.target] = version
+        for name, version in latest.items():
+            self._put_head(Path(name), version, min(counts[name], self.keep))
+
+        referenced = {
+            digest
+            for v in kept
+            for digest in (v.blob, v.sidecar, v.base)
+            if digest is not None
+        }
+        for path in (self.root / "objects").glob("*/*"):
+            if path.parent.name + path.name in referenced:
+                continue
+            try:
+                # Stored after the index was read: not indexed yet, not ours
+                if path.stat().st_mtime > indexed:
+                    continue
+                path.unlink()
+            except OSError:
+                pass
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        from twsrt.lib.lock import DEFAULT_TIMEOUT, target_lock
+
+        with target_lock(self.root / LOCK_NAME, DEFAULT_TIMEOUT):
+            yield
+
+    def versions(self, target: Path | None = None) -> Iterator[Version]:
+        """Recorded versions, newest first; only target's if given."""
+        wanted = str(target.absolute()) if target is not None else None
+        for line in _lines_reversed(self.index):
+            try:
+                version = Version(**jsonio.loads(line))
+            except (ValueError, TypeError):
+                continue  # torn or foreign line
+            if wanted is None or version.target == wanted:
+                yield version
+
+    def rollback(self, target: Path, steps: int = 1) -> Version:
+        """Restore target to its version `steps` back (0 = latest recorded).
+
+        Unrecorded content on disk is recorded before it is replaced. The
+        restore is an atomic replace and is itself recorded, so a rollback
+        can be rolled back. Raises IndexError if there is no such version.
+        """
+        for n, version in enumerate(self.versions(target)):
+            if n == steps:
+                break
+        else:
+            raise IndexError(f"No version {steps} recorded for {target}")
+        data = self.get_blob(version.blob)
+        sidecar = self.get_blob(version.sidecar) if version.sidecar else None
+        base = self.get_blob(version.base) if version.base else None
+        self.record_existing(target)
+        write_if_changed(target, data)
+        _restore_sidecar(target, sidecar)
+        self._restore_base(target, data, base)
+        self.record(target, data, version.fingerprint, ROLLBACK, sidecar)
+        return version
+
+    def _restore_base(self, target: Path, data: bytes, base: bytes | None) -> None:
+        """Put back the merge base a version was recorded with. A version
+        recorded before bases were kept with it gets one derived from its
+        managed entries, if target has a base at all.
+        """
+        from twsrt.lib.claude import managed_entries
+
+        if base is not None:
+            write_if_changed(self.base_path(target), base)
+            return
+        if not self.base_path(target).exists():
+            return
+        try:
+            document = jsonio.loads(data)
+        except ValueError:
+            return
+        if isinstance(document, dict):
+            self.put_base(target, managed_entries(document))
+
+
+def record_write(
+    target: Path, fingerprint: str | None, home: Path | None = None
+) -> None:
+    """Add a just-written target to the history (best effort)."""
+    try:
+        History(default_history_dir(home)).record(
+            target, target.read_bytes(), fingerprint, sidecar=_read_sidecar(target)
+        )
+    except OSError:
+        pass
+
+
+def record_before_write(target: Path, home: Path | None = None) -> None:
+    """Keep target's current content restorable before it is overwritten."""
+    try:
+        History(default_history_dir(home)).record_existing(target)
+    except OSError:
+        pass
+
+
+def _target_key(target: Path) -> str:
+    return hashlib.sha256(str(target.absolute()).encode()).hexdigest()
+
+
+def _read_sidecar(target: Path) -> bytes | None:
+    from twsrt.lib.stamps import sidecar_path
+
+    try:
+        return sidecar_path(target).read_bytes()
+    except OSError:
+        return None
+
+
+def _restore_sidecar(target: Path, data: bytes | None) -> None:
+    """Put back the sidecar a version was recorded with; none if it had none."""
+    from twsrt.lib.stamps import sidecar_path
+
+    path = sidecar_path(target)
+    if data is not None:
+        write_if_changed(path, data)
+    elif path.exists():
+        path.unlink()
+
+
+def _lines_reversed(path: Path) -> Iterator[bytes]:
+    """Non-empty lines of path from last to first, reading from the end."""
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return
+    with f:
+        position = f.seek(0, os.SEEK_END)
+        tail = b""
+        while position > 0:
+            size = min(_READ_CHUNK, position)
+            position -= size
+            f.seek(position)
+            chunk = f.read(size) + tail
+            lines = chunk.split(b"\n")
+            tail = lines.pop(0)  # possibly cut: completed by the next chunk
+            for line in reversed(lines):
+                if line:
+                    yield line
+        if tail:
+            yield tail
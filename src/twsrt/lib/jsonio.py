@@ -0,0 +1,240 @@
+"""JSON codec layer and streaming JSON output.
+
+All JSON parsing and encoding in twsrt goes through get_codec(). The stdlib
+`json` module is the reference; when `orjson` is installed (extra: twsrt[fast])
+it is used instead, with output kept byte-identical to the stdlib encoding:
+anything orjson would format differently falls back to `json`.
+Set TWSRT_JSON_CODEC=json to force the stdlib codec.
+"""
+
+import json
+import logging
+import math
+import os
+import re
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any, Protocol
+
+from twsrt.lib.fileio import discard, install, real_target, temp_for
+
+log = logging.getLogger("twsrt")
+
+# Flush encoded fragments to disk once this many characters are buffered
+CHUNK_SIZE = 64 * 1024
+
+
+class JsonCodec(Protocol):
+    @property
+    def name(self) -> str: ...
+
+    def loads(self, data: str | bytes) -> Any:
+        """Parse a JSON document; raises json.JSONDecodeError on invalid input."""
+        ...
+
+    def dumps(self, obj: Any, compact: bool = False) -> str:
+        """Encode as indent=2 JSON, or without whitespace when compact."""
+        ...
+
+    def iterencode(self, obj: Any, compact: bool = False) -> Iterator[str]:
+        """Encode in fragments whose concatenation equals dumps()."""
+        ...
+
+
+_INDENTED = json.JSONEncoder(indent=2)
+_COMPACT = json.JSONEncoder(separators=(",", ":"))
+
+
+class StdlibCodec:
+    """Reference codec: the stdlib json module."""
+
+    @property
+    def name(self) -> str:
+        return "json"
+
+    def loads(self, data: str | bytes) -> Any:
+        return json.loads(data)
+
+    def dumps(self, obj: Any, compact: bool = False) -> str:
+        return (_COMPACT if compact else _INDENTED).encode(obj)
+
+    def iterencode(self, obj: Any, compact: bool = False) -> Iterator[str]:
+        return (_COMPACT if compact else _INDENTED).iterencode(obj)
+
+
+# A number token with a fraction or exponent: orjson formats some floats
+# differently from float.__repr__ (1e-07 vs 1e-7). Matches inside strings
+# too, which only costs a fallback.
+_FLOAT_TOKEN = re.compile(rb"(?:^|[\s:,\[])-?\d+[.eE]")
+
+# An integer token of 19 or more digits: orjson parses integers outside the
+# i64/u64 range as floats instead of failing, so these go to json to stay
+# ints. Matches inside strings too, which only costs a fallback.
+_BIG_INT_TOKEN = re.compile(rb"(?:^|[\s:,\[])-?\d{19,}")
+_BIG_INT_TEXT = re.compile(_BIG_INT_TOKEN.pattern.decode())
+
+# List items encoded per orjson call in iterencode
+LIST_CHUNK = 256
+
+
+class OrjsonCodec:
+    """Accelerated codec backed by orjson, byte-identical to StdlibCodec.
+
+    Decoding falls back to json on any orjson error (NaN literals, lone
+    surrogates), so accepted input and error messages match the stdlib, and
+    on integers of 19 digits or more, which orjson would turn into floats.
+    Encoding falls back when orjson output could differ: non-ASCII text and
+    DEL (json escapes both), floats, non-finite numbers, non-str keys, huge
+    ints.
+    """
+
+    def __init__(self, orjson: Any) -> None:
+        self._orjson = orjson
+        self._fallback = StdlibCodec()
+
+    @property
+    def name(self) -> str:
+        return "orjson"
+
+    def loads(self, data: str | bytes) -> Any:
+        big_int = _BIG_INT_TEXT if isinstance(data, str) else _BIG_INT_TOKEN
+        if big_int.search(data):
+            return self._fallback.loads(data)
+        try:
+            return self._orjson.loads(data)
+        except self._orjson.JSONDecodeError:
+            return self._fallback.loads(data)
+
+    def dumps(self, obj: Any, compact: bool = False) -> str:
+        option = 0 if compact else self._orjson.OPT_INDENT_2
+        try:
+            data = self._orjson.dumps(obj, option=option)
+        except TypeError:
+            return self._fallback.dumps(obj, compact)
+        if not data.isascii() or b"\x7f" in data or _FLOAT_TOKEN.search(data):
+            return self._fallback.dumps(obj, compact)
+        if b"null" in data and _has_non_finite(obj):
+            return self._fallback.dumps(obj, compact)
+        return data.decode("ascii")
+
+    def iterencode(self, obj: Any, compact: bool = False) -> Iterator[str]:
+        """Encode dicts member by member and lists LIST_CHUNK items at a time,
+        at every depth, so no fragment holds a large section whole.
+        """
+        return self._iterencode(obj, compact, "")
+
+    def _iterencode(self, obj: Any, compact: bool, indent: str) -> Iterator[str]:
+        # indent: prefix of this value's lines after the first (indented mode)
+        if isinstance(obj, dict) and obj:
+            if not all(isinstance(key, str) for key in obj):
+                for fragment in self._fallback.iterencode(obj, compact):
+                    yield fragment if compact else fragment.replace("\n", "\n" + indent)
+                return
+            inner = indent + "  "
+            yield "{"
+            for i, (key, value) in enumerate(obj.items()):
+                sep = "," if i else ""
+                if compact:
+                    yield f"{sep}{self.dumps(key, True)}:"
+                else:
+                    yield f"{sep}\n{inner}{self.dumps(key)}: "
+                yield from self._iterencode(value, compact, inner)
+            yield "}" if compact else f"\n{indent}}}"
+        elif isinstance(obj, list) and len(obj) > LIST_CHUNK:
+            # Each chunk is a complete list: keep its items, drop the brackets
+            yield "["
+            for start in range(0, len(obj), LIST_CHUNK):
+                encoded = self.dumps(obj[start : start + LIST_CHUNK], compact)
+                if compact:
+                    items = encoded[1:-1]
+                else:
+                    items = encoded[1:-2].replace("\n", "\n" + indent)
+                yield ("," if start else "") + items
+            yield "]" if compact else f"\n{indent}]"
+        else:
+            encoded = self.dumps(obj, compact)
+            yield encoded if compact else encoded.replace("\n", "\n" + indent)
+
+
+def _has_non_finite(obj: Any) -> bool:
+    """True if obj contains NaN/Infinity (orjson writes null, json writes NaN)."""
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    if isinstance(obj, dict):
+        return any(_has_non_finite(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return any(_has_non_finite(v) for v in obj)
+    return False
+
+
+_codec: JsonCodec | None = None
+
+
+def get_codec() -> JsonCodec:
+    """Return the process-wide codec, selecting it on first use."""
+    global _codec
+    if _codec is None:
+        _codec = select_codec(os.environ.get("TWSRT_JSON_CODEC"))
+    return _codec
+
+
+def select_codec(preference: str | None = None) -> JsonCodec:
+    """Pick a codec: "json" forces stdlib, otherwise orjson when installed."""
+    if preference != "json":
+        try:
+            import orjson
+        except ImportError:
+            if preference == "orjson":
+                log.debug("orjson requested but not installed, using json")
+        else:
+            return OrjsonCodec(orjson)
+    return StdlibCodec()
+
+
+def loads(data: str | bytes) -> Any:
+    """Parse JSON with the active codec."""
+    return get_codec().loads(data)
+
+
+def dumps(obj: Any, compact: bool = False) -> str:
+    """Encode JSON (indent=2 unless compact) with the active codec."""
+    return get_codec().dumps(obj, compact)
+
+
+def write_json_stream(
+    document: Any,
+    target: Path,
+    compact: bool = False,
+    chunk_size: int = CHUNK_SIZE,
+    codec: JsonCodec | None = None,
+) -> bool:
+    """Encode document incrementally and stream it to target via a temp file.
+
+    The full JSON string is never held in memory: fragments from the codec's
+    iterencode are buffered up to chunk_size and written to a temp file in
+    the target directory, which then replaces target (fileio.install) unless
+    target already holds the same bytes. Returns True if target was written.
+    Indented output is byte-identical to json.dumps(document, indent=2);
+    compact output drops indentation and whitespace after separators.
+    Always ends with a trailing newline.
+    """
+    codec = codec or get_codec()
+
+    fd, tmp = temp_for(real_target(target))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            buffer: list[str] = []
+            buffered = 0
+            for fragment in codec.iterencode(document, compact):
+                buffer.append(fragment)
+                buffered += len(fragment)
+                if buffered >= chunk_size:
+                    f.write("".join(buffer))
+                    buffer.clear()
+                    buffered = 0
+            buffer.append("\n")
+            f.write("".join(buffer))
+    except BaseException:
+        discard(tmp)
+        raise
+    return install(tmp, target)
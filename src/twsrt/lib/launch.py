@@ -0,0 +1,58 @@
+"""Launch an agent with generated security flags (twsrt exec).
+
+The flag vector is cached under the source fingerprint, so a warm launch
+hashes two small files, reads one cache entry and execs the agent.
+"""
+
+import os
+import shlex
+
+from twsrt.lib.cache import OutputCache, fingerprint
+from twsrt.lib.models import AppConfig
+
+# Agents configured through command-line flags, mapped to their executable
+AGENT_COMMANDS = {"copilot": "copilot"}
+
+
+def agent_flags(
+    agent: str,
+    config: AppConfig,
+    profile: str,
+    version: str,
+    cache: OutputCache | None = None,
+) -> list[str]:
+    """argv flags for agent under profile; regenerated only when sources changed.
+
+    config is the loaded (source-less) AppConfig. The cache holds the same
+    flags document as `generate`, so either command warms it for the other.
+    Raises FileNotFoundError or ValueError for missing/invalid sources and
+    ValueError for unknown profiles.
+    """
+    from twsrt.lib.agent import GENERATORS
+
+    gen = GENERATORS[agent]
+    key = fingerprint(config.for_profile(profile), agent, version)
+    flags = cache.get(key) if cache is not None else None
+    if not isinstance(flags, list):
+        from twsrt.lib.sources import load_sources
+
+        rules = load_sources(config)
+        flags = gen.build(rules, config.for_profile(profile))
+        if cache is not None:
+            cache.put(key, flags)
+    return gen.argv(flags)
+
+
+def launch_command(
+    agent: str, flags: list[str], args: list[str], srt: bool = False
+) -> list[str]:
+    """Full argv: agent executable, flags, user args; optionally via `srt -c`."""
+    command = [AGENT_COMMANDS[agent], *flags, *args]
+    if srt:
+        return ["srt", "-c", shlex.join(command)]
+    return command
+
+
+def exec_command(command: list[str]) -> None:
+    """Replace the current process with command (does not return)."""
+    os.execvp(command[0], command)
@@ -0,0 +1,172 @@
+"""Cross-process lock around target writes (generate -w, mode).
+
+Concurrent runs (login hooks, IDE launchers, tmux panes) would otherwise
+race on target migration, the target write and the settings.json symlink
+swap. One advisory lock per Claude settings directory serializes them.
+
+Coalescing falls out of the lock: a run that had to wait builds its
+documents only after the leader finished, so it finds them in the output
+cache under the same fingerprint, and write-if-changed leaves the leader's
+targets untouched ("Unchanged").
+
+The lock is fcntl.flock on a lock file, released by the kernel when its
+holder dies, so a crashed run never leaves a stale lock. Where flock is
+unavailable (Windows, some network filesystems) an exclusively created pid
+file is used instead; it counts as stale once its pid is gone, and is then
+taken over. A live owner keeps the lock however long it runs; only a pid
+file whose owner cannot be checked (unreadable, or on Windows) is taken over
+by age, once older than STALE_AFTER seconds.
+"""
+
+import os
+import sys
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+from twsrt.lib.models import AppConfig
+
+LOCK_NAME = ".twsrt.lock"
+DEFAULT_TIMEOUT = 30.0
+
+# Pid-file fallback: age after which a lock of unknown liveness is taken over
+STALE_AFTER = 300.0
+
+POLL_INTERVAL = 0.05
+
+
+class LockTimeout(TimeoutError):
+    def __init__(self, path: Path, owner: int | None) -> None:
+        holder = f" (held by pid {owner})" if owner else ""
+        super().__init__(f"Timed out waiting for lock {path}{holder}")
+        self.path = path
+        self.owner = owner
+
+
+def lock_path(config: AppConfig) -> Path:
+    """Lock guarding config's targets: next to the settings.json anchor."""
+    return config.symlink_anchor.parent / LOCK_NAME
+
+
+@contextmanager
+def target_lock(
+    path: Path,
+    timeout: float = DEFAULT_TIMEOUT,
+    on_wait: Callable[[int | None], None] | None = None,
+) -> Iterator[bool]:
+    """Hold the lock at path; yields True if another run held it first.
+
+    on_wait is called once, with the holder's pid if known, when the lock
+    is contended. Raises LockTimeout after timeout seconds of waiting.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        import fcntl
+    except ImportError:
+        fcntl = None
+
+    if fcntl is not None:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            waited = _acquire_flock(fcntl, fd, path, timeout, on_wait)
+        except OSError:
+            os.close(fd)
+            raise
+        if waited is not None:
+            try:
+                os.ftruncate(fd, 0)
+                os.write(fd, f"{os.getpid()}\n".encode())
+                yield waited
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+            return
+        os.close(fd)  # flock unsupported here: fall back to a pid file
+
+    pid_file = path.with_name(path.name + ".pid")
+    waited = _acquire_pid_file(pid_file, timeout, on_wait)
+    try:
+        yield waited
+    finally:
+        try:
+            os.remove(pid_file)
+        except OSError:
+            pass
+
+
+def _acquire_flock(
+    fcntl: Any, fd: int, path: Path, timeout: float, on_wait: Any
+) -> bool | None:
+    """Poll for the flock; whether we waited, None if flock is unsupported."""
+    deadline = time.monotonic() + timeout
+    waited = False
+    while True:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return waited
+        except BlockingIOError:
+            pass
+        except OSError:
+            return None
+        if not waited:
+            waited = True
+            if on_wait:
+                on_wait(_owner(path))
+        if time.monotonic() >= deadline:
+            raise LockTimeout(path, _owner(path))
+        time.sleep(POLL_INTERVAL)
+
+
+def _acquire_pid_file(pid_file: Path, timeout: float, on_wait: Any) -> bool:
+    """Create pid_file exclusively, taking over stale ones; whether we waited."""
+    deadline = time.monotonic() + timeout
+    waited = False
+    while True:
+        try:
+            fd = os.open(pid_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            if _is_stale(pid_file):
+                try:
+                    os.remove(pid_file)
+                except OSError:
+                    pass
+                continue
+        else:
+            with os.fdopen(fd, "w") as f:
+                f.write(f"{os.getpid()}\n")
+            return waited
+        if not waited:
+            waited = True
+            if on_wait:
+                on_wait(_owner(pid_file))
+        if time.monotonic() >= deadline:
+            raise LockTimeout(pid_file, _owner(pid_file))
+        time.sleep(POLL_INTERVAL)
+
+
+def _owner(path: Path) -> int | None:
+    try:
+        return int(path.read_text().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def _is_stale(pid_file: Path) -> bool:
+    try:
+        age = time.time() - pid_file.stat().st_mtime
+    except OSError:
+        return True  # already released: retry at once
+    owner = _owner(pid_file)
+    if owner is None or sys.platform == "win32":
+        # Being written right now, or left half-written by a crash; on Windows
+        # os.kill would terminate owner. Age is all there is to go by.
+        return age > STALE_AFTER
+    try:
+        os.kill(owner, 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        pass  # alive, owned by someone else
+    return False
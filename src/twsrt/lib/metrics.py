@@ -0,0 +1,152 @@
+"""OpenMetrics textfile export of generation and drift metrics.
+
+generate --metrics / diff --metrics collect samples into a Metrics object
+during the run and write it at the end of a successful run, for the
+node_exporter textfile collector (or anything else reading the OpenMetrics
+text format):
+
+- twsrt_rules: rules parsed, per source, scope and action
+- twsrt_entries: entries per generated document section (agent, profile)
+- twsrt_target_bytes: size of each written target
+- twsrt_drift_entries / twsrt_drift: diff results per agent and profile
+- twsrt_stage_duration_seconds: wall time per pipeline stage (timings.py)
+- twsrt_last_success_timestamp_seconds: end of the run, per command
+
+The file is replaced atomically (fileio.py): the temp file is a dot file
+without the .prom suffix, so a scrape sees the previous file or the new one,
+never a partial write. A failed run leaves the previous file, and with it
+the last success timestamp, in place.
+"""
+
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+from twsrt.lib.fileio import write_if_changed
+from twsrt.lib.models import SecurityRule
+
+# name → (type, help), in output order
+METRICS = {
+    "twsrt_rules": ("gauge", "Rules parsed from the canonical sources."),
+    "twsrt_entries": ("gauge", "Entries in a generated document section."),
+    "twsrt_target_bytes": ("gauge", "Size of a target after the write."),
+    "twsrt_drift_entries": (
+        "gauge",
+        "Differences between the generated document and the target.",
+    ),
+    "twsrt_drift": ("gauge", "1 if the target differs from the generated document."),
+    "twsrt_stage_duration_seconds": ("gauge", "Wall time of a pipeline stage."),
+    "twsrt_last_success_timestamp_seconds": (
+        "gauge",
+        "Unix time at the end of the last successful run.",
+    ),
+}
+
+
+class Metrics:
+    """Samples of one run, rendered in the OpenMetrics text format."""
+
+    def __init__(self) -> None:
+        self._samples: dict[str, dict[tuple, float]] = {name: {} for name in METRICS}
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        """Set the sample of name with these labels (replacing an earlier one)."""
+        self._samples[name][tuple(labels.items())] = value
+
+    def add_rules(self, counts: list[list]) -> None:
+        """Samples from rule_counts()."""
+        for source, scope, action, count in counts:
+            self.set("twsrt_rules", count, source=source, scope=scope, action=action)
+
+    def add_document(self, agent: str, profile: str, document: Any) -> None:
+        for section, count in sections(document).items():
+            self.set(
+                "twsrt_entries", count, agent=agent, profile=profile, section=section
+            )
+
+    def add_diff(self, agent: str, profile: str, result: Any) -> None:
+        """Samples from a DiffResult: drift flag, counts per change kind."""
+        counts = Counter(change.kind for change in result.changes)
+        for kind in ("missing", "extra", "changed"):
+            self.set(
+                "twsrt_drift_entries",
+                counts[kind],
+                agent=agent,
+                profile=profile,
+                kind=kind,
+            )
+        self.set("twsrt_drift", int(not result.matched), agent=agent, profile=profile)
+
+    def add_stages(self, timings: Any) -> None:
+        """Wall time of every completed stage of a timings.Timings recorder."""
+        for stage in timings.stages:
+            if stage.calls:
+                self.set("twsrt_stage_duration_seconds", stage.wall, stage=stage.name)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for name, (kind, help_text) in METRICS.items():
+            samples = self._samples[name]
+            if not samples:
+                continue
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"# HELP {name} {help_text}")
+            for labels, value in samples.items():
+                lines.append(f"{name}{_labels(labels)} {_value(value)}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path, command: str) -> None:
+        """Stamp the run as successful and atomically replace path."""
+        self.set("twsrt_last_success_timestamp_seconds", time.time(), command=command)
+        write_if_changed(path, self.render().encode())
+
+
+def rule_counts(rules: list[SecurityRule]) -> list[list]:
+    """[source, scope, action, count] per combination present, JSON-serializable."""
+    counts = Counter(
+        (rule.source.value.lower(), rule.scope.value.lower(), rule.action.value.lower())
+        for rule in rules
+    )
+    return [[*key, count] for key, count in sorted(counts.items())]
+
+
+def sections(document: Any) -> dict[str, int]:
+    """Entries per section: list lengths by dotted path in a settings dict, or
+    flags by option in a flag list (e.g. "--deny-tool").
+    """
+    counts: dict[str, int] = {}
+    if isinstance(document, list):
+        for entry in document:
+            option = str(entry).split(" ", 1)[0]
+            counts[option] = counts.get(option, 0) + 1
+        return counts
+
+    def walk(value: Any, path: str) -> None:
+        if isinstance(value, dict):
+            for key, child in value.items():
+                walk(child, f"{path}.{key}" if path else str(key))
+        elif isinstance(value, list):
+            counts[path] = len(value)
+
+    walk(document, "")
+    return counts
+
+
+def _labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _value(value: float) -> str:
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
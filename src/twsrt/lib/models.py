@@ -1,5 +1,7 @@
 """Core data models for twsrt."""
 
+import copy
+from collections.abc import Iterable
 from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
@@ -19,6 +21,14 @@ class Action(Enum):
     ALLOW = "ALLOW"
 
 
+class AskPolicy(Enum):
+    """How a profile handles Bash ask rules."""
+
+    ASK = "ask"  # keep as ask (Copilot: lossy → deny)
+    DENY = "deny"  # promote to deny (non-interactive runs)
+    SKIP = "skip"  # drop entirely (yolo default)
+
+
 class Source(Enum):
     SRT_FILESYSTEM = "SRT_FILESYSTEM"
     SRT_NETWORK = "SRT_NETWORK"
@@ -58,6 +68,32 @@ class SrtResult:
     sandbox_config: dict[str, Any] = field(default_factory=dict)
 
 
+def expand_home(path: str | Path, home: Path | None = None) -> Path:
+    """Expand a leading '~' against home, or the current user's home if None.
+
+    Lets one process resolve config and rule paths for many tenants.
+    """
+    p = Path(path)
+    if home is None:
+        return p.expanduser()
+    if p.parts and p.parts[0] == "~":
+        return home.joinpath(*p.parts[1:])
+    return p
+
+
+def variant_path(original: Path, variant: str) -> Path:
+    """Derive a variant path: replace all suffixes except the last with '.<variant>'.
+
+    settings.full.json, "ci" → settings.ci.json
+    copilot-flags.txt, "ci"  → copilot-flags.ci.txt
+    config, "ci"             → config.ci
+    """
+    if not original.suffix:
+        return original.with_name(f"{original.name}.{variant}")
+    root_stem = original.name.removesuffix("".join(original.suffixes))
+    return original.with_name(f"{root_stem}.{variant}{original.suffix}")
+
+
 def yolo_path(original: Path) -> Path:
     """Derive a yolo variant path: replace all suffixes except the last with '.yolo'.
 
@@ -66,10 +102,29 @@ def yolo_path(original: Path) -> Path:
     copilot-flags.txt  → copilot-flags.yolo.txt
     config             → config.yolo
     """
-    if not original.suffix:
-        return original.with_name(f"{original.name}.yolo")
-    root_stem = original.name.removesuffix("".join(original.suffixes))
-    return original.with_name(f"{root_stem}.yolo{original.suffix}")
+    return variant_path(original, "yolo")
+
+
+# Copilot flag output formats (see CopilotGenerator.render)
+COPILOT_FORMATS = ("shell", "nul", "json")
+
+# What a Claude write does with managed entries added by hand
+HAND_EDIT_POLICIES = ("keep", "discard")
+
+# Built-in modes, configured via [sandbox_overrides.<mode>] and *_yolo targets
+BUILTIN_PROFILES = ("full", "yolo")
+
+
+@dataclass
+class Profile:
+    """Named policy profile from [profiles.<name>] in config.toml."""
+
+    name: str
+    yolo: bool = False
+    ask_policy: AskPolicy | None = None
+    sandbox_overrides: dict[str, Any] = field(default_factory=dict)
+    claude_settings_path: Path | None = None
+    copilot_output_path: Path | None = None
 
 
 @dataclass
@@ -91,6 +146,15 @@ class AppConfig:
     sandbox_config: dict[str, Any] = field(default_factory=dict)
     sandbox_overrides: dict[str, dict[str, Any]] = field(default_factory=dict)
     yolo: bool = False
+    home: Path | None = None
+    profiles: dict[str, Profile] = field(default_factory=dict)
+    profile: str | None = None
+    ask_policy: AskPolicy | None = None
+    compact: bool = False
+    copilot_format: str = "shell"
+    hand_edits: str = "keep"
+    # Extra locations receiving a copy of each agent's written target
+    destinations: dict[str, list[Path]] = field(default_factory=dict)
 
     def apply_sandbox_overrides(self) -> None:
         """Merge mode-specific sandbox overrides into sandbox_config.
@@ -102,15 +166,75 @@ class AppConfig:
         overrides = self.sandbox_overrides.get(mode, {})
         self.sandbox_config.update(overrides)
 
+    def for_profile(self, name: str) -> "AppConfig":
+        """Return a copy of this config with profile `name` applied.
+
+        "full" and "yolo" are the built-in modes; any other name must be a
+        [profiles.<name>] entry. Sandbox overrides land on top of SRT values.
+        """
+        config = copy.deepcopy(self)
+        if name in BUILTIN_PROFILES:
+            config.yolo = name == "yolo"
+            config.apply_sandbox_overrides()
+            return config
+
+        if name not in self.profiles:
+            available = ", ".join([*BUILTIN_PROFILES, *self.profiles])
+            raise ValueError(f"Unknown profile '{name}'. Available: {available}")
+
+        profile = self.profiles[name]
+        config.profile = name
+        config.yolo = profile.yolo
+        config.ask_policy = profile.ask_policy
+        config.sandbox_config.update(profile.sandbox_overrides)
+        return config
+
+    @property
+    def effective_ask_policy(self) -> AskPolicy:
+        """Ask handling: explicit profile policy, else skip in yolo, ask otherwise."""
+        if self.ask_policy is not None:
+            return self.ask_policy
+        return AskPolicy.SKIP if self.yolo else AskPolicy.ASK
+
     @property
     def symlink_anchor(self) -> Path:
         """The fixed path Claude Code reads — always settings.json in the target dir."""
         return self.claude_settings_path.parent / "settings.json"
 
 
+@dataclass
+class DiffEntry:
+    """One difference at a managed path; old is the existing, new the generated."""
+
+    kind: str  # "missing", "extra" or "changed"
+    path: str
+    key: str
+    old: Any = None
+    new: Any = None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "path": self.path,
+            "key": self.key,
+            "old": self.old,
+            "new": self.new,
+        }
+
+
 @dataclass
 class DiffResult:
     agent: str
     missing: list[str]
     extra: list[str]
     matched: bool
+    changes: list[DiffEntry] = field(default_factory=list)
+    kept: list[str] = field(default_factory=list)  # hand edits a write keeps
+
+    @classmethod
+    def from_changes(cls, agent: str, changes: Iterable[DiffEntry]) -> "DiffResult":
+        """Collect streamed entries; a changed value is both missing and extra."""
+        entries = list(changes)
+        missing = sorted(e.key for e in entries if e.kind != "extra")
+        extra = sorted(e.key for e in entries if e.kind != "missing")
+        return cls(agent, missing, extra, matched=not entries, changes=entries)
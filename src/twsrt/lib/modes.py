@@ -0,0 +1,133 @@
+"""Full/yolo mode switching for Claude Code (twsrt mode).
+
+Both variants (settings.full.json, settings.yolo.json) stay generated on
+disk, each stamped with the fingerprint it was generated from (stamps.py). Switching
+checks the stamp of the requested variant, regenerates it only if stale,
+repoints the settings.json anchor with an atomic symlink replace and places
+the variant at any [targets] claude_destinations.
+"""
+
+import copy
+import os
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from twsrt.lib import jsonio
+from twsrt.lib.cache import fingerprint
+from twsrt.lib.models import BUILTIN_PROFILES, AppConfig
+from twsrt.lib.stamps import read_stamp
+from twsrt.lib.targets import distribute, resolve_claude_target, write_claude
+
+MODES = BUILTIN_PROFILES
+
+
+@dataclass
+class ModeSwitch:
+    mode: str
+    target: Path
+    regenerated: bool
+    messages: list[str] = field(default_factory=list)
+
+
+def current_mode(config: AppConfig) -> str | None:
+    """Mode the settings.json anchor points at; None if unmanaged or unknown."""
+    anchor = config.symlink_anchor
+    if not anchor.is_symlink():
+        return None
+    linked = (anchor.parent / os.readlink(anchor)).resolve()
+    for mode in MODES:
+        if resolve_claude_target(config.for_profile(mode)).resolve() == linked:
+            return mode
+    return None
+
+
+def refresh_variant(config: AppConfig, mode: str, version: str) -> list[str] | None:
+    """Regenerate the mode's variant if its stamp is stale; None if it was fresh.
+
+    Never touches the settings.json anchor.
+    """
+    mode_config = config.for_profile(mode)
+    key = fingerprint(mode_config, "claude", version)
+    if _stamped_fingerprint(resolve_claude_target(mode_config)) == key:
+        return None
+    return _regenerate(config, mode, key)
+
+
+def switch_mode(config: AppConfig, mode: str, version: str) -> ModeSwitch:
+    """Point settings.json at the mode's variant, regenerating it only if stale.
+
+    config is the loaded (source-less) AppConfig. Raises FileNotFoundError or
+    ValueError for bad sources, FileExistsError if settings.json is a regular
+    file alongside an existing variant, ValueError if the variant is invalid.
+    """
+    from twsrt.lib.symlink import ensure_symlink, prepare_claude_target
+
+    mode_config = config.for_profile(mode)
+    target = resolve_claude_target(mode_config)
+    anchor = config.symlink_anchor
+
+    messages: list[str] = []
+    migration_msg = prepare_claude_target(anchor, target)
+    if migration_msg:
+        messages.append(migration_msg)
+
+    key = fingerprint(mode_config, "claude", version)
+    regenerated = _stamped_fingerprint(target) != key
+    if regenerated:
+        messages.extend(_regenerate(config, mode, key))
+
+    _validate(target)
+    ensure_symlink(target, anchor)
+    messages.extend(distribute("claude", target, mode_config))
+    return ModeSwitch(
+        mode=mode, target=target, regenerated=regenerated, messages=messages
+    )
+
+
+def spawn_refresh(config_path: Path, mode: str) -> None:
+    """Refresh the mode's variant in a detached background process."""
+    subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "twsrt.bin.cli",
+            "-c",
+            str(config_path),
+            "mode",
+            mode,
+            "--refresh-only",
+        ],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def _stamped_fingerprint(target: Path) -> str | None:
+    stamp = read_stamp("claude", target)
+    return stamp.fingerprint if stamp else None
+
+
+def _regenerate(config: AppConfig, mode: str, key: str) -> list[str]:
+    """Parse sources and write the mode's variant (anchor untouched)."""
+    from twsrt.lib.agent import GENERATORS
+    from twsrt.lib.sources import load_sources
+
+    source_config = copy.deepcopy(config)
+    rules = load_sources(source_config)
+    mode_config = source_config.for_profile(mode)
+    document = GENERATORS["claude"].build(rules, mode_config)
+    return write_claude(document, mode_config, link=False, fingerprint=key)
+
+
+def _validate(target: Path) -> None:
+    """Refuse to link a variant that is not a JSON settings object."""
+    try:
+        data = jsonio.loads(target.read_bytes())
+    except ValueError as e:
+        raise ValueError(f"Invalid JSON in {target}: {e}") from e
+    if not isinstance(data, dict):
+        raise ValueError(f"{target} is not a settings object")
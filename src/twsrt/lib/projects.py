@@ -0,0 +1,149 @@
+"""Per-project Claude settings for a monorepo (twsrt projects generate).
+
+Every directory holding an overlay file (default .twsrt.toml) is a project.
+Its .claude/settings.json combines the global SRT/bash rules with the
+overlay's extra rules:
+
+    [network]
+    allowedDomains = ["api.internal.example.com"]
+    deniedDomains = []
+
+    [bash]
+    deny = []
+    ask = ["make deploy"]
+
+Overlays are found with one tree walk. Global rules are translated once and
+shared; per-project translate + selective merge + write runs in a process
+pool, and projects whose settings would not change are left untouched.
+"""
+
+import os
+import tomllib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from twsrt.lib import jsonio
+from twsrt.lib.models import Action, AppConfig, Scope, SecurityRule, Source
+
+DEFAULT_OVERLAY = ".twsrt.toml"
+
+# Directories never descended into while looking for overlays
+_PRUNE = frozenset({"node_modules", "__pycache__", "venv"})
+
+# Project result status values
+WROTE = "wrote"
+UNCHANGED = "unchanged"
+FAILED = "failed"
+
+
+@dataclass
+class ProjectResult:
+    project: Path
+    status: str
+    target: Path | None = None
+    error: str | None = None
+
+
+# Global state installed once per worker process
+_shared: dict[str, Any] = {}
+
+
+def find_projects(root: Path, overlay_name: str = DEFAULT_OVERLAY) -> list[Path]:
+    """Directories under root holding an overlay file, sorted; one walk.
+
+    Hidden directories and dependency/build caches (_PRUNE) are skipped.
+    """
+    projects: list[Path] = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith(".") and d not in _PRUNE]
+        if overlay_name in filenames:
+            projects.append(Path(dirpath))
+    return sorted(projects)
+
+
+def read_overlay(overlay_path: Path) -> list[SecurityRule]:
+    """Parse a project overlay TOML into SecurityRules."""
+    try:
+        with open(overlay_path, "rb") as f:
+            data = tomllib.load(f)
+    except tomllib.TOMLDecodeError as e:
+        raise ValueError(f"Invalid TOML in {overlay_path}: {e}") from e
+
+    network = data.get("network", {})
+    bash = data.get("bash", {})
+    sections = (
+        (Scope.NETWORK, Action.ALLOW, Source.SRT_NETWORK, network, "allowedDomains"),
+        (Scope.NETWORK, Action.DENY, Source.SRT_NETWORK, network, "deniedDomains"),
+        (Scope.EXECUTE, Action.DENY, Source.BASH_RULES, bash, "deny"),
+        (Scope.EXECUTE, Action.ASK, Source.BASH_RULES, bash, "ask"),
+    )
+    return [
+        SecurityRule(scope=scope, action=action, pattern=pattern, source=source)
+        for scope, action, source, table, key in sections
+        for pattern in table.get(key, [])
+    ]
+
+
+def generate_projects(
+    projects: list[Path],
+    rules: list[SecurityRule],
+    config: AppConfig,
+    overlay_name: str = DEFAULT_OVERLAY,
+    workers: int | None = None,
+    dry_run: bool = False,
+) -> list[ProjectResult]:
+    """Write each project's .claude/settings.json; one result per project, in order.
+
+    rules are the global rules and config the global (sources-populated,
+    profile-applied) config. Global rules are translated once here; workers
+    only translate their project's overlay.
+    """
+    from twsrt.lib.claude import ClaudeGenerator
+
+    entries = ClaudeGenerator().prepare(rules, config)
+    state = (entries, config, overlay_name, dry_run)
+
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(projects) <= 1:
+        _init_worker(*state)
+        return [_run_project(project) for project in projects]
+
+    chunksize = max(1, len(projects) // (workers * 4))
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=state
+    ) as pool:
+        return list(pool.map(_run_project, projects, chunksize=chunksize))
+
+
+def _init_worker(entries, config: AppConfig, overlay_name: str, dry_run: bool) -> None:
+    _shared["entries"] = entries
+    _shared["config"] = config
+    _shared["overlay_name"] = overlay_name
+    _shared["dry_run"] = dry_run
+
+
+def _run_project(project: Path) -> ProjectResult:
+    """Merge + write one project's settings unless its content is unchanged."""
+    from twsrt.lib.claude import ClaudeGenerator, selective_merge
+
+    gen = ClaudeGenerator()
+    config: AppConfig = _shared["config"]
+    target = project / ".claude" / "settings.json"
+    try:
+        overlay_rules = read_overlay(project / _shared["overlay_name"])
+        entries = _shared["entries"] + gen.prepare(overlay_rules, config)
+        document = gen.finish(entries, config)
+        existing = target.read_bytes() if target.exists() else None
+        if existing is not None:
+            document = selective_merge(target, document)
+
+        rendered = (jsonio.dumps(document, config.compact) + "\n").encode()
+        if rendered == existing:
+            return ProjectResult(project, UNCHANGED, target)
+        if not _shared["dry_run"]:
+            jsonio.write_json_stream(document, target, compact=config.compact)
+    except (OSError, ValueError) as e:
+        return ProjectResult(project, FAILED, target, error=str(e))
+    return ProjectResult(project, WROTE, target)
@@ -1,9 +1,19 @@
 """Read and validate canonical security sources."""
 
+import hashlib
 import json
 from pathlib import Path
 
-from twsrt.lib.models import Action, Scope, SecurityRule, Source, SrtResult
+from twsrt.lib import jsonio, timings, vfs
+from twsrt.lib.models import (
+    Action,
+    AppConfig,
+    Scope,
+    SecurityRule,
+    Source,
+    SrtResult,
+)
+from twsrt.lib.vfs import FileSystem
 
 # Pass-through network keys (not handled as SecurityRules)
 _NETWORK_CONFIG_KEYS = (
@@ -30,13 +40,38 @@ _SANDBOX_CONFIG_KEYS = (
 )
 
 
-def read_srt(srt_path: Path) -> SrtResult:
+def source_digest(path: Path, fs: FileSystem | None = None) -> str:
+    """SHA-256 hex digest of a source file's bytes (content identity)."""
+    fs = fs or vfs.current()
+    if not fs.exists(path):
+        raise FileNotFoundError(f"Source not found: {path}")
+    return hashlib.sha256(fs.read_bytes(path)).hexdigest()
+
+
+def deny_read_rules(srt_path: Path, fs: FileSystem | None = None) -> list[SecurityRule]:
+    """The SRT denyRead rules alone, without building the others.
+
+    Empty if the file is unreadable or not valid JSON (read_srt reports that).
+    """
+    try:
+        data = jsonio.loads((fs or vfs.current()).read_bytes(srt_path))
+        patterns = data.get("filesystem", {}).get("denyRead", [])
+    except (OSError, ValueError, AttributeError):
+        return []
+    return [
+        SecurityRule(Scope.READ, Action.DENY, pattern, Source.SRT_FILESYSTEM)
+        for pattern in patterns
+    ]
+
+
+def read_srt(srt_path: Path, fs: FileSystem | None = None) -> SrtResult:
     """Parse SRT JSON into SecurityRules and pass-through network config."""
-    if not srt_path.exists():
+    fs = fs or vfs.current()
+    if not fs.exists(srt_path):
         raise FileNotFoundError(f"SRT settings not found: {srt_path}")
 
     try:
-        data = json.loads(srt_path.read_text())
+        data = jsonio.loads(fs.read_bytes(srt_path))
     except json.JSONDecodeError as e:
         raise ValueError(f"Invalid JSON in {srt_path}: {e}") from e
 
@@ -119,13 +154,16 @@ def read_srt(srt_path: Path) -> SrtResult:
     )
 
 
-def read_bash_rules(bash_rules_path: Path) -> list[SecurityRule]:
+def read_bash_rules(
+    bash_rules_path: Path, fs: FileSystem | None = None
+) -> list[SecurityRule]:
     """Parse bash-rules JSON into SecurityRules."""
-    if not bash_rules_path.exists():
+    fs = fs or vfs.current()
+    if not fs.exists(bash_rules_path):
         raise FileNotFoundError(f"Bash rules not found: {bash_rules_path}")
 
     try:
-        data = json.loads(bash_rules_path.read_text())
+        data = jsonio.loads(fs.read_bytes(bash_rules_path))
     except json.JSONDecodeError as e:
         raise ValueError(f"Invalid JSON in {bash_rules_path}: {e}") from e
 
@@ -152,3 +190,18 @@ def read_bash_rules(bash_rules_path: Path) -> list[SecurityRule]:
         )
 
     return rules
+
+
+def load_sources(config: AppConfig, fs: FileSystem | None = None) -> list[SecurityRule]:
+    """Read both canonical sources; SRT pass-through config lands on config.
+
+    Returns all SecurityRules (SRT first, then bash rules).
+    """
+    with timings.stage("read_srt"):
+        srt_result = read_srt(config.srt_path, fs)
+    with timings.stage("read_bash_rules"):
+        bash_rules = read_bash_rules(config.bash_rules_path, fs)
+    config.network_config = srt_result.network_config
+    config.filesystem_config = srt_result.filesystem_config
+    config.sandbox_config = srt_result.sandbox_config
+    return srt_result.rules + bash_rules
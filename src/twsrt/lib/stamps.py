@@ -0,0 +1,149 @@
+"""Provenance stamps recorded in written targets (twsrt status).
+
+A stamp pairs the source fingerprint a target was generated from with a
+hash of its managed sections as written. Comparing both against the
+current fingerprint and the target's current managed sections classifies
+the target without regenerating anything:
+
+- Claude settings: reserved "_twsrt" key in the settings JSON
+- Copilot flags: ".<name>.twsrt" sidecar holding a "# twsrt: ..." line
+  (nul/json have no room for comments, and a comment would end the shell
+  snippet's line continuation); a trailing comment line in shell targets
+  written by earlier versions is still read
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from twsrt.lib import jsonio
+
+STAMP_KEY = "_twsrt"
+COMMENT_PREFIX = "# twsrt:"
+
+# Target status values
+CURRENT = "current"
+STALE = "sources changed"
+MODIFIED = "modified"
+UNSTAMPED = "unstamped"
+MISSING = "missing"
+
+
+@dataclass
+class Stamp:
+    fingerprint: str
+    managed: str
+
+
+def managed_hash(sections: Any) -> str:
+    """SHA-256 of the canonical JSON encoding of managed sections."""
+    encoded = json.dumps(sections, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def claude_managed(settings: dict) -> dict:
+    """The parts of a Claude settings document that twsrt owns."""
+    from twsrt.lib.claude import _is_webfetch_entry
+    from twsrt.lib.sources import (
+        _FILESYSTEM_CONFIG_KEYS,
+        _NETWORK_CONFIG_KEYS,
+        _SANDBOX_CONFIG_KEYS,
+    )
+
+    permissions = settings.get("permissions", {})
+    sandbox = settings.get("sandbox", {})
+    network = sandbox.get("network", {})
+    filesystem = sandbox.get("filesystem", {})
+    return {
+        "deny": permissions.get("deny", []),
+        "ask": permissions.get("ask"),
+        "allow": [e for e in permissions.get("allow", []) if _is_webfetch_entry(e)],
+        "allowedDomains": network.get("allowedDomains"),
+        "network": {k: network.get(k) for k in _NETWORK_CONFIG_KEYS},
+        "filesystem": {k: filesystem.get(k) for k in _FILESYSTEM_CONFIG_KEYS},
+        "sandbox": {k: sandbox.get(k) for k in _SANDBOX_CONFIG_KEYS},
+    }
+
+
+def stamp_claude(settings: dict, fingerprint: str) -> dict:
+    """Record the stamp for settings (as written) under the reserved key."""
+    settings.pop(STAMP_KEY, None)
+    stamp = Stamp(fingerprint, managed_hash(claude_managed(settings)))
+    settings[STAMP_KEY] = {"fingerprint": stamp.fingerprint, "managed": stamp.managed}
+    return settings
+
+
+def copilot_stamp(flags: list[str], fingerprint: str) -> Stamp:
+    return Stamp(fingerprint, managed_hash(flags))
+
+
+def stamp_comment(stamp: Stamp) -> str:
+    return f"{COMMENT_PREFIX} fingerprint={stamp.fingerprint} managed={stamp.managed}"
+
+
+def sidecar_path(target: Path) -> Path:
+    """Stamp file for targets that cannot carry a comment."""
+    return target.with_name(f".{target.name}.twsrt")
+
+
+def write_sidecar(target: Path, stamp: Stamp) -> bool:
+    """Write target's sidecar; False if it already held this stamp."""
+    from twsrt.lib.fileio import write_if_changed
+
+    return write_if_changed(
+        sidecar_path(target), (stamp_comment(stamp) + "\n").encode()
+    )
+
+
+def read_stamp(agent: str, target: Path) -> Stamp | None:
+    """Stamp recorded in (or next to) target; None if unstamped or unreadable."""
+    try:
+        if agent == "claude":
+            data = jsonio.loads(target.read_bytes()).get(STAMP_KEY, {})
+            return Stamp(data["fingerprint"], data["managed"])
+        sidecar = sidecar_path(target)
+        if sidecar.exists():
+            return _parse_comment(sidecar.read_text())
+        return _parse_comment(target.read_text())
+    except (OSError, ValueError, KeyError, AttributeError, TypeError):
+        pass
+    return None
+
+
+def target_status(agent: str, target: Path, fingerprint: str) -> str:
+    """Classify target against the current source fingerprint."""
+    if not target.exists():
+        return MISSING
+    stamp = read_stamp(agent, target)
+    if stamp is None:
+        return UNSTAMPED
+    if _current_managed_hash(agent, target) != stamp.managed:
+        return MODIFIED
+    if stamp.fingerprint != fingerprint:
+        return STALE
+    return CURRENT
+
+
+def _current_managed_hash(agent: str, target: Path) -> str | None:
+    try:
+        if agent == "claude":
+            return managed_hash(claude_managed(jsonio.loads(target.read_bytes())))
+        from twsrt.lib.copilot import parse_flags
+
+        return managed_hash(parse_flags(target.read_text()))
+    except (OSError, ValueError):
+        return None
+
+
+def _parse_comment(text: str) -> Stamp | None:
+    for line in reversed(text.splitlines()):
+        if line.startswith(COMMENT_PREFIX):
+            fields = dict(
+                part.split("=", 1)
+                for part in line[len(COMMENT_PREFIX) :].split()
+                if "=" in part
+            )
+            return Stamp(fields["fingerprint"], fields["managed"])
+    return None
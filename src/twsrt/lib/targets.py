@@ -0,0 +1,218 @@
+"""Target path resolution and writing of generated agent configs."""
+
+from pathlib import Path
+
+from twsrt.lib import timings
+from twsrt.lib.fileio import write_if_changed
+from twsrt.lib.history import (
+    History,
+    default_history_dir,
+    record_before_write,
+    record_write,
+)
+from twsrt.lib.jsonio import write_json_stream
+from twsrt.lib.models import AppConfig, variant_path, yolo_path
+from twsrt.lib.stamps import (
+    STAMP_KEY,
+    copilot_stamp,
+    sidecar_path,
+    stamp_claude,
+    write_sidecar,
+)
+
+
+def resolve_claude_target(config: AppConfig) -> Path:
+    """Resolve Claude target path: profile, yolo or standard path."""
+    if config.profile is not None:
+        profile = config.profiles[config.profile]
+        return profile.claude_settings_path or variant_path(
+            config.claude_settings_path, profile.name
+        )
+    if config.yolo:
+        return config.claude_yolo_path or yolo_path(config.claude_settings_path)
+    return config.claude_settings_path
+
+
+def resolve_copilot_target(config: AppConfig) -> Path | None:
+    """Resolve Copilot target path: profile, yolo or standard path."""
+    if config.profile is not None:
+        profile = config.profiles[config.profile]
+        if profile.copilot_output_path:
+            return profile.copilot_output_path
+        if config.copilot_output_path:
+            return variant_path(config.copilot_output_path, profile.name)
+        return None
+    if config.yolo:
+        if config.copilot_yolo_path:
+            return config.copilot_yolo_path
+        if config.copilot_output_path:
+            return yolo_path(config.copilot_output_path)
+        return None
+    return config.copilot_output_path
+
+
+def resolve_target(gen_name: str, config: AppConfig) -> Path | None:
+    """Resolve target path for an agent: yolo path in yolo mode, standard otherwise."""
+    if gen_name == "claude":
+        return resolve_claude_target(config)
+    elif gen_name == "copilot":
+        return resolve_copilot_target(config)
+    return None
+
+
+def merge_base(
+    gen_name: str, target: Path, config: AppConfig
+) -> dict[str, list[str]] | None:
+    """The three-way merge base diff needs to tell kept hand edits from drift.
+
+    Only Claude targets are merged, and only with hand_edits = "keep" do
+    entries added by hand survive a write; None otherwise.
+    """
+    if gen_name != "claude" or config.hand_edits != "keep":
+        return None
+    return History(default_history_dir(config.home)).get_base(target)
+
+
+def write_claude(
+    document: dict,
+    config: AppConfig,
+    link: bool = True,
+    fingerprint: str | None = None,
+) -> list[str]:
+    """Write generated Claude settings: migrate, selective merge, symlink anchor.
+
+    With link=False (several profiles in one run) the settings.json anchor is
+    neither migrated nor repointed, and the target is not placed at the
+    [targets] claude_destinations. With a fingerprint the target is stamped
+    (see stamps.py); without one a stamp left by an earlier write is dropped.
+    A target whose content would not change is not rewritten, and the anchor
+    is left alone if it already links to it. Written content is recorded in
+    the history (history.py), and the generated managed entries are kept as
+    the base of the next write's three-way merge.
+    Returns the messages to report (migration notice, written/unchanged path).
+    Raises FileExistsError if both anchor (regular file) and target exist.
+    """
+    from twsrt.lib.claude import managed_entries, selective_merge
+    from twsrt.lib.symlink import ensure_symlink, prepare_claude_target
+
+    messages: list[str] = []
+    target = resolve_claude_target(config)
+    anchor = config.symlink_anchor
+
+    if link:
+        migration_msg = prepare_claude_target(anchor, target)
+        if migration_msg:
+            messages.append(migration_msg)
+
+    history = History(default_history_dir(config.home))
+    base = managed_entries(document)
+    if target.exists():
+        with timings.stage("claude.merge"):
+            document = selective_merge(
+                target,
+                document,
+                history.get_base(target),
+                keep_hand_edits=config.hand_edits == "keep",
+            )
+    if fingerprint is not None:
+        document = stamp_claude(document, fingerprint)
+    else:
+        document.pop(STAMP_KEY, None)
+    record_before_write(target, config.home)
+    changed = write_json_stream(document, target, compact=config.compact)
+    try:
+        history.put_base(target, base)
+    except OSError:
+        pass
+    if changed:
+        # Recorded with its base, which a rollback restores
+        record_write(target, fingerprint, config.home)
+
+    messages.append(_written(target, changed))
+    if link:
+        if changed or not _links_to(anchor, target):
+            ensure_symlink(target, anchor)
+        messages.extend(distribute("claude", target, config))
+    return messages
+
+
+def migrate_claude_anchor(config: AppConfig) -> list[str]:
+    """Move a regular settings.json anchor to the default target and link it.
+
+    write_claude(link=False), used when several profiles are written in one
+    run, leaves the anchor alone; without this a hand-kept settings.json
+    (hooks, plugins) would never be migrated or merged. Run it once before
+    such a run. Returns the migration notice, if any.
+    Raises FileExistsError if both anchor (regular file) and target exist.
+    """
+    from twsrt.lib.symlink import ensure_symlink, prepare_claude_target
+
+    anchor = config.symlink_anchor
+    target = resolve_claude_target(config)
+    message = prepare_claude_target(anchor, target)
+    if message is None:
+        return []
+    ensure_symlink(target, anchor)
+    return [message]
+
+
+def write_copilot(
+    flags: list[str], config: AppConfig, fingerprint: str | None = None
+) -> list[str] | None:
+    """Write Copilot flags in config.copilot_format; None if no target configured.
+
+    With a fingerprint the stamp goes to a sidecar file in every format: a
+    comment line would end the shell snippet's line continuation (and with
+    it the command it is pasted into). A target whose content
+    would not change is not rewritten; written content is recorded in the
+    history (history.py).
+    Returns the messages to report (written/unchanged path, destinations).
+    """
+    from twsrt.lib.copilot import CopilotGenerator
+
+    target = resolve_copilot_target(config)
+    if target is None:
+        return None
+    fmt = config.copilot_format
+    output = CopilotGenerator().render(flags, fmt)
+    if fmt != "nul":
+        output += "\n"
+    stamp = copilot_stamp(flags, fingerprint) if fingerprint is not None else None
+
+    record_before_write(target, config.home)
+    changed = write_if_changed(target, output.encode())
+    sidecar = sidecar_path(target)
+    if stamp is not None:
+        restamped = write_sidecar(target, stamp)
+    else:
+        restamped = sidecar.exists()
+        if restamped:
+            sidecar.unlink()
+    if changed or restamped:
+        # Recorded with its sidecar, which a rollback restores
+        record_write(target, fingerprint, config.home)
+    return [_written(target, changed), *distribute("copilot", target, config)]
+
+
+def distribute(gen_name: str, target: Path, config: AppConfig) -> list[str]:
+    """Place a written target at the agent's extra [targets] destinations.
+
+    Only the active variant is distributed: for Claude the one settings.json
+    links to, for Copilot the base output (no profile, no yolo).
+    """
+    from twsrt.lib.fanout import fan_out
+
+    destinations = config.destinations.get(gen_name, [])
+    if not destinations:
+        return []
+    if gen_name == "copilot" and (config.profile is not None or config.yolo):
+        return []
+    return fan_out(target, destinations)
+
+
+def _written(target: Path, changed: bool) -> str:
+    return f"Wrote: {target}" if changed else f"Unchanged: {target}"
+
+
+def _links_to(anchor: Path, target: Path) -> bool:
+    return anchor.is_symlink() and anchor.resolve() == target.resolve()
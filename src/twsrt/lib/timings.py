@@ -0,0 +1,169 @@
+"""Per-stage wall time, CPU time and peak allocations of one run.
+
+Pipeline code marks its stages with `with timings.stage("read_srt"):`.
+Outside a record() block (the default) stage() returns a shared no-op
+context manager, so a marked stage costs one global lookup. Inside record()
+(--timings, --cprofile) every stage is timed; stages nest and include their
+children, and a stage entered repeatedly (one claude.finish per profile) is
+summed into one row.
+
+Peak memory is the highest traced allocation above the level at stage
+entry, from tracemalloc. Tracing slows the run down, so wall times under
+--timings compare stages with each other, not with untraced runs.
+record(profile=True) also runs cProfile over the block; its stats can be
+dumped for pstats or snakeviz.
+"""
+
+import json
+import time
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from dataclasses import dataclass
+from typing import Any
+
+TIMINGS_FORMATS = ("text", "json")
+
+
+@dataclass
+class Stage:
+    name: str
+    depth: int  # nesting level at first entry, 0 for the whole run
+    calls: int = 0
+    wall: float = 0.0
+    cpu: float = 0.0
+    peak_bytes: int | None = None  # None without memory tracing
+
+    def text(self) -> str:
+        peak = f"{self.peak_bytes / 1024:12.1f}" if self.peak_bytes is not None else ""
+        name = "  " * self.depth + self.name
+        return (
+            f"{name:<28} {self.calls:>6} {self.wall * 1000:>10.2f} "
+            f"{self.cpu * 1000:>10.2f} {peak}"
+        ).rstrip()
+
+    def as_dict(self) -> dict:
+        return {
+            "stage": self.name,
+            "depth": self.depth,
+            "calls": self.calls,
+            "wall_ms": round(self.wall * 1000, 3),
+            "cpu_ms": round(self.cpu * 1000, 3),
+            "peak_bytes": self.peak_bytes,
+        }
+
+
+class Timings:
+    """Recorder of nested stages, in order of first entry."""
+
+    def __init__(self, trace_memory: bool = True) -> None:
+        self.trace_memory = trace_memory
+        self.profiler: Any = None  # cProfile.Profile under record(profile=True)
+        self._stages: dict[str, Stage] = {}
+        # [traced size at entry, highest peak seen] per open stage (0 untraced)
+        self._open: list[list[int]] = []
+
+    @property
+    def stages(self) -> list[Stage]:
+        return list(self._stages.values())
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[Stage]:
+        entry = self._stages.get(name)
+        if entry is None:
+            entry = self._stages[name] = Stage(name, len(self._open))
+        frame = self._enter()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield entry
+        finally:
+            entry.wall += time.perf_counter() - wall
+            entry.cpu += time.process_time() - cpu
+            entry.calls += 1
+            self._exit(entry, frame)
+
+    def _enter(self) -> list[int]:
+        frame = [0, 0]
+        if self.trace_memory:
+            import tracemalloc
+
+            current, peak = tracemalloc.get_traced_memory()
+            if self._open:
+                self._open[-1][1] = max(self._open[-1][1], peak)
+            # The tracer keeps one peak: restart it for this stage, and carry
+            # the peak seen so far up to the enclosing stage on exit
+            tracemalloc.reset_peak()
+            frame = [current, current]
+        self._open.append(frame)
+        return frame
+
+    def _exit(self, entry: Stage, frame: list[int]) -> None:
+        self._open.pop()
+        if not self.trace_memory:
+            return
+        import tracemalloc
+
+        peak = max(frame[1], tracemalloc.get_traced_memory()[1])
+        entry.peak_bytes = max(entry.peak_bytes or 0, peak - frame[0])
+        if self._open:
+            self._open[-1][1] = max(self._open[-1][1], peak)
+        tracemalloc.reset_peak()
+
+    def render(self, fmt: str = "text") -> str:
+        """Table with one row per stage, or a JSON document."""
+        if fmt == "json":
+            return json.dumps(
+                {"timings": [s.as_dict() for s in self._stages.values()]}, indent=2
+            )
+        header = f"{'stage':<28} {'calls':>6} {'wall ms':>10} {'cpu ms':>10}"
+        if self.trace_memory:
+            header += f" {'peak KiB':>12}"
+        return "\n".join([header, *(s.text() for s in self._stages.values())])
+
+
+_active: Timings | None = None
+_NOT_RECORDING = nullcontext()
+
+
+def active() -> Timings | None:
+    """The recorder of the enclosing record() block, if any."""
+    return _active
+
+
+def stage(name: str) -> AbstractContextManager:
+    """Time the block as stage name if a record() block is active."""
+    if _active is None:
+        return _NOT_RECORDING
+    return _active.stage(name)
+
+
+@contextmanager
+def record(trace_memory: bool = True, profile: bool = False) -> Iterator[Timings]:
+    """Record every stage entered inside the block; the block itself is "total".
+
+    Starts (and stops again) tracemalloc unless it is already tracing, and
+    with profile=True a cProfile profiler, left in Timings.profiler.
+    """
+    global _active
+    started = False
+    if trace_memory:
+        import tracemalloc
+
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+    timings = Timings(trace_memory)
+    if profile:
+        import cProfile
+
+        timings.profiler = cProfile.Profile()
+        timings.profiler.enable()
+    previous, _active = _active, timings
+    try:
+        with timings.stage("total"):
+            yield timings
+    finally:
+        _active = previous
+        if timings.profiler is not None:
+            timings.profiler.disable()
+        if started:
+            tracemalloc.stop()
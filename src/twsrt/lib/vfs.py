@@ -0,0 +1,324 @@
+"""Filesystem interface used for sources, config, targets and the symlink anchor.
+
+Everything that reads sources or inspects and updates targets goes through a
+FileSystem instead of Path/os directly:
+
+- OSFileSystem: the real filesystem (default)
+- MemoryFileSystem: dict-backed, for tests and in-memory pipelines
+- ArchiveFileSystem: read-only tar/zip contents, mounted at a directory;
+  members are read on demand, nothing is extracted
+
+Functions take an optional fs argument; without one they use the active
+filesystem, which is OSFileSystem unless a use() block selects another one.
+That is how a whole run (e.g. diff --archive) is pointed at a snapshot
+without passing fs through every generator.
+"""
+
+import errno
+import os
+import posixpath
+import shutil
+import tempfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path, PurePosixPath
+from typing import TYPE_CHECKING, Protocol
+
+if TYPE_CHECKING:  # imported on use: only diff --archive needs them
+    import tarfile
+    import zipfile
+
+# Symlinks followed before giving up (like the kernel's ELOOP limit)
+_MAX_LINKS = 40
+
+
+class FileSystem(Protocol):
+    def read_bytes(self, path: Path) -> bytes:
+        """Content of a file (symlinks followed); FileNotFoundError if none."""
+        ...
+
+    def exists(self, path: Path) -> bool: ...
+
+    def is_file(self, path: Path) -> bool: ...
+
+    def is_symlink(self, path: Path) -> bool: ...
+
+    def readlink(self, path: Path) -> str: ...
+
+    def resolve(self, path: Path) -> Path:
+        """path with symlinks followed (non-strict, like Path.resolve)."""
+        ...
+
+    def write_bytes(self, path: Path, data: bytes) -> None:
+        """Atomically replace path with data, creating parent directories."""
+        ...
+
+    def symlink(self, link_value: str, path: Path) -> None:
+        """Atomically make path a symlink to link_value (replacing path)."""
+        ...
+
+    def move(self, src: Path, dst: Path) -> None: ...
+
+
+class OSFileSystem:
+    """The real filesystem."""
+
+    def read_bytes(self, path: Path) -> bytes:
+        return Path(path).read_bytes()
+
+    def exists(self, path: Path) -> bool:
+        return Path(path).exists()
+
+    def is_file(self, path: Path) -> bool:
+        return Path(path).is_file()
+
+    def is_symlink(self, path: Path) -> bool:
+        return Path(path).is_symlink()
+
+    def readlink(self, path: Path) -> str:
+        return os.readlink(path)
+
+    def resolve(self, path: Path) -> Path:
+        return Path(path).resolve()
+
+    def write_bytes(self, path: Path, data: bytes) -> None:
+        from twsrt.lib.fileio import write_if_changed
+
+        write_if_changed(Path(path), data)
+
+    def symlink(self, link_value: str, path: Path) -> None:
+        # Temp symlink in the same directory, then replace
+        fd, tmp = tempfile.mkstemp(dir=Path(path).parent)
+        os.close(fd)
+        os.remove(tmp)  # mkstemp creates a file; we need a symlink
+        try:
+            os.symlink(link_value, tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+
+    def move(self, src: Path, dst: Path) -> None:
+        Path(dst).parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(src), str(dst))
+
+
+class MemoryFileSystem:
+    """Files and symlinks held in dicts; directories exist implicitly."""
+
+    def __init__(self, files: dict[str | Path, bytes | str] | None = None) -> None:
+        self.files: dict[str, bytes] = {}
+        self.links: dict[str, str] = {}
+        for path, content in (files or {}).items():
+            data = content.encode() if isinstance(content, str) else content
+            self.files[_key(path)] = data
+
+    def read_bytes(self, path: Path) -> bytes:
+        key = self._follow(path)
+        if key not in self.files:
+            raise _not_found(path)
+        return self.files[key]
+
+    def exists(self, path: Path) -> bool:
+        key = self._follow(path)
+        return key in self.files or self._is_dir(key)
+
+    def is_file(self, path: Path) -> bool:
+        return self._follow(path) in self.files
+
+    def is_symlink(self, path: Path) -> bool:
+        return _key(path) in self.links
+
+    def readlink(self, path: Path) -> str:
+        try:
+            return self.links[_key(path)]
+        except KeyError:
+            raise OSError(errno.EINVAL, "Not a symlink", str(path)) from None
+
+    def resolve(self, path: Path) -> Path:
+        return Path(self._follow(path))
+
+    def write_bytes(self, path: Path, data: bytes) -> None:
+        key = _key(path)
+        self.links.pop(key, None)
+        self.files[key] = data
+
+    def symlink(self, link_value: str, path: Path) -> None:
+        key = _key(path)
+        self.files.pop(key, None)
+        self.links[key] = link_value
+
+    def move(self, src: Path, dst: Path) -> None:
+        key, dest = _key(src), _key(dst)
+        if key in self.links:
+            self.links[dest] = self.links.pop(key)
+        elif key in self.files:
+            self.files.pop(dest, None)
+            self.files[dest] = self.files.pop(key)
+        else:
+            raise _not_found(src)
+
+    def _follow(self, path: Path) -> str:
+        return _follow_links(_key(path), self.links)
+
+    def _is_dir(self, key: str) -> bool:
+        prefix = key.rstrip("/") + "/"
+        return any(k.startswith(prefix) for k in (*self.files, *self.links))
+
+
+class ArchiveFileSystem:
+    """Read-only contents of a tar (any compression) or zip archive.
+
+    Member paths are taken relative to mount: with mount=/home/alice the
+    member .claude/settings.json is /home/alice/.claude/settings.json.
+    The member index is built once; contents are read per member on demand.
+    Tar symlinks are followed within the archive.
+    """
+
+    def __init__(self, archive: Path, mount: Path = Path("/")) -> None:
+        import tarfile
+        import zipfile
+
+        self.archive = archive
+        self.mount = PurePosixPath(mount)
+        self.links: dict[str, str] = {}
+        self._dirs: set[str] = set()
+        self._zip: "zipfile.ZipFile | None" = None
+        self._tar: "tarfile.TarFile | None" = None
+        self._members: "dict[str, str | tarfile.TarInfo]" = {}
+
+        if zipfile.is_zipfile(archive):
+            self._zip = zipfile.ZipFile(archive)
+            for name in self._zip.namelist():
+                self._add(name, name, is_dir=name.endswith("/"))
+        else:
+            try:
+                self._tar = tarfile.open(archive)
+            except tarfile.TarError as e:
+                raise ValueError(f"Not a tar or zip archive: {archive}: {e}") from e
+            for member in self._tar.getmembers():
+                if member.issym():
+                    self.links[self._mounted(member.name)] = member.linkname
+                    self._add_parents(self._mounted(member.name))
+                else:
+                    self._add(member.name, member, is_dir=member.isdir())
+
+    def read_bytes(self, path: Path) -> bytes:
+        key = self._follow(path)
+        member = self._members.get(key)
+        if member is None:
+            raise _not_found(path)
+        if self._zip is not None:
+            return self._zip.read(member)  # type: ignore[arg-type]
+        assert self._tar is not None
+        f = self._tar.extractfile(member)  # type: ignore[arg-type]
+        if f is None:
+            raise _not_found(path)
+        with f:
+            return f.read()
+
+    def exists(self, path: Path) -> bool:
+        key = self._follow(path)
+        return key in self._members or key in self._dirs
+
+    def is_file(self, path: Path) -> bool:
+        return self._follow(path) in self._members
+
+    def is_symlink(self, path: Path) -> bool:
+        return _key(path) in self.links
+
+    def readlink(self, path: Path) -> str:
+        try:
+            return self.links[_key(path)]
+        except KeyError:
+            raise OSError(errno.EINVAL, "Not a symlink", str(path)) from None
+
+    def resolve(self, path: Path) -> Path:
+        return Path(self._follow(path))
+
+    def write_bytes(self, path: Path, data: bytes) -> None:
+        raise _read_only(path)
+
+    def symlink(self, link_value: str, path: Path) -> None:
+        raise _read_only(path)
+
+    def move(self, src: Path, dst: Path) -> None:
+        raise _read_only(src)
+
+    def close(self) -> None:
+        if self._zip is not None:
+            self._zip.close()
+        if self._tar is not None:
+            self._tar.close()
+
+    def _mounted(self, name: str) -> str:
+        relative = posixpath.normpath(name.lstrip("/"))
+        return _key(self.mount / relative)
+
+    def _add(self, name: str, member: "str | tarfile.TarInfo", is_dir: bool) -> None:
+        key = self._mounted(name)
+        if is_dir:
+            self._dirs.add(key)
+        else:
+            self._members[key] = member
+        self._add_parents(key)
+
+    def _add_parents(self, key: str) -> None:
+        parent = posixpath.dirname(key)
+        while parent not in self._dirs and parent != key:
+            self._dirs.add(parent)
+            key, parent = parent, posixpath.dirname(parent)
+
+    def _follow(self, path: Path) -> str:
+        return _follow_links(_key(path), self.links)
+
+
+OS = OSFileSystem()
+
+_active: FileSystem = OS
+
+
+def current() -> FileSystem:
+    """The filesystem functions use when not given one explicitly."""
+    return _active
+
+
+@contextmanager
+def use(fs: FileSystem) -> Iterator[FileSystem]:
+    """Make fs the active filesystem inside the block."""
+    global _active
+    previous, _active = _active, fs
+    try:
+        yield fs
+    finally:
+        _active = previous
+
+
+def _key(path: str | Path) -> str:
+    return posixpath.normpath(PurePosixPath(path).as_posix())
+
+
+def _follow_links(key: str, links: dict[str, str]) -> str:
+    """Resolve symlinks in key's final component and its parents."""
+    for _ in range(_MAX_LINKS):
+        parts = key.split("/")
+        for i in range(len(parts), 0, -1):
+            prefix = "/".join(parts[:i]) or "/"
+            if prefix in links:
+                target = posixpath.join(posixpath.dirname(prefix), links[prefix])
+                key = posixpath.normpath("/".join([target, *parts[i:]]))
+                break
+        else:
+            return key
+    raise OSError(errno.ELOOP, "Too many levels of symbolic links", key)
+
+
+def _not_found(path: str | Path) -> FileNotFoundError:
+    return FileNotFoundError(errno.ENOENT, "No such file or directory", str(path))
+
+
+def _read_only(path: str | Path) -> OSError:
+    return OSError(errno.EROFS, "Read-only archive", str(path))
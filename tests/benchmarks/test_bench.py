@@ -0,0 +1,117 @@
+"""Tests for the benchmark suite: synthetic sources and baseline comparison."""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from benchmarks.bench import _measure_cli, compare, main, run
+from benchmarks.synthetic import make_sources, write_sources
+from twsrt.lib.sources import read_bash_rules, read_srt
+
+
+def _count(srt: dict, bash: dict) -> int:
+    lists = [*srt["network"].values(), *srt["filesystem"].values(), *bash.values()]
+    return sum(len(v) for v in lists if isinstance(v, list))
+
+
+def _results(*rows: tuple[str, int, float, int | None]) -> dict:
+    return {
+        "results": [
+            {"case": case, "rules": rules, "seconds": seconds, "peak_bytes": peak}
+            for case, rules, seconds, peak in rows
+        ]
+    }
+
+
+class TestSynthetic:
+    @pytest.mark.parametrize("rules", [0, 1, 10, 997, 5000])
+    def test_exact_rule_count(self, rules: int) -> None:
+        assert _count(*make_sources(rules)) == rules
+
+    def test_deterministic_per_seed(self, tmp_path: Path) -> None:
+        a = write_sources(tmp_path / "a", 500, seed=1)
+        b = write_sources(tmp_path / "b", 500, seed=1)
+        c = write_sources(tmp_path / "c", 500, seed=2)
+
+        assert [p.read_bytes() for p in a] == [p.read_bytes() for p in b]
+        assert a[0].read_bytes() != c[0].read_bytes()
+
+    def test_entries_unique(self) -> None:
+        srt, bash = make_sources(5000)
+        for entries in [*srt["network"].values(), *bash.values()]:
+            if isinstance(entries, list):
+                assert len(entries) == len(set(entries))
+
+    def test_readable_sources(self, tmp_path: Path) -> None:
+        srt_path, bash_path = write_sources(tmp_path, 200)
+        srt, bash = make_sources(200)
+
+        assert len(read_srt(srt_path).rules) >= len(srt["network"]["allowedDomains"])
+        assert len(read_bash_rules(bash_path)) == len(bash["deny"]) + len(bash["ask"])
+
+
+class TestCompare:
+    def test_flags_time_and_memory(self) -> None:
+        baseline = _results(("a", 10, 0.100, 1000), ("b", 10, 0.100, 1000))
+        current = _results(("a", 10, 0.150, 1000), ("b", 10, 0.100, 2000))
+
+        rows = compare(baseline, current)
+
+        assert [row["regressed"] for row in rows] == [["time"], ["memory"]]
+
+    def test_within_threshold_and_noise_floor(self) -> None:
+        baseline = _results(("a", 10, 0.100, 1000), ("b", 10, 0.001, None))
+        current = _results(("a", 10, 0.110, 1100), ("b", 10, 0.003, None))
+
+        rows = compare(baseline, current)
+
+        assert [row["regressed"] for row in rows] == [[], []]
+
+    def test_errored_case_regresses(self) -> None:
+        baseline = _results(("a", 10, 0.100, 1000), ("b", 10, 0.100, 1000))
+        current = _results(("a", 10, 0.010, 1000), ("b", 10, 0.100, 1000))
+        current["results"][0]["error"] = "exit code 1: Traceback"
+        baseline["results"][1]["error"] = "exit code 2"
+
+        rows = compare(baseline, current)
+
+        assert [(row["case"], row["regressed"]) for row in rows] == [("a", ["error"])]
+
+    def test_unmatched_cases_skipped(self) -> None:
+        rows = compare(_results(("a", 10, 0.1, 1)), _results(("a", 100, 9.0, 1)))
+
+        assert rows == []
+
+
+class TestRun:
+    def test_library_cases(self) -> None:
+        document = run([20], repeat=1, seed=0, cli=False)
+
+        cases = {r["case"] for r in document["results"]}
+        assert {"read_srt", "claude.diff", "copilot.generate"} <= cases
+        assert all(r["seconds"] >= 0 for r in document["results"])
+
+    def test_failing_cli_case_marked_errored(self, tmp_path: Path) -> None:
+        env = {**os.environ, "HOME": str(tmp_path)}
+        args = ["-c", str(tmp_path / "missing.toml"), "diff"]
+
+        result = _measure_cli("cli.diff", 1, args, env)
+
+        assert result["exit_code"] != 0
+        assert result["error"].startswith(f"exit code {result['exit_code']}")
+
+    def test_cli_cases_succeed(self, tmp_path: Path) -> None:
+        document = run([20], repeat=1, seed=0, cli=True)
+
+        cli = [r for r in document["results"] if r["case"].startswith("cli.")]
+        assert len(cli) == 2
+        assert [r.get("error") for r in cli] == [None, None]
+
+    def test_compare_exit_code(self, tmp_path: Path) -> None:
+        baseline, current = tmp_path / "base.json", tmp_path / "new.json"
+        baseline.write_text('{"results": [{"case": "a", "rules": 1, "seconds": 1}]}')
+        current.write_text('{"results": [{"case": "a", "rules": 1, "seconds": 2}]}')
+
+        assert main(["compare", str(baseline), str(baseline)]) == 0
+        assert main(["compare", str(baseline), str(current)]) == 1
@@ -1,6 +1,7 @@
 """Tests for CLI commands: init, version, generate, edit."""
 
 import json
+from importlib.metadata import EntryPoint
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
@@ -1306,3 +1307,939 @@ class TestEditNoArgument:
         assert "foo" in result.output
         assert "srt" in result.output
         assert "bash" in result.output
+
+
+class TestFleetGenerate:
+    def _tenant(self, root: Path, name: str) -> Path:
+        home = root / name
+        (home / ".config" / "twsrt").mkdir(parents=True)
+        (home / ".srt-settings.json").write_text(json.dumps({}))
+        (home / ".config" / "twsrt" / "bash-rules.json").write_text(
+            json.dumps({"deny": ["rm"], "ask": []})
+        )
+        (home / ".config" / "twsrt" / "config.toml").write_text(
+            '[sources]\nsrt = "~/.srt-settings.json"\n'
+            'bash_rules = "~/.config/twsrt/bash-rules.json"\n'
+        )
+        return home
+
+    def test_fleet_generate_writes_all_tenants_and_summary(
+        self, tmp_path: Path
+    ) -> None:
+        homes = [self._tenant(tmp_path, n) for n in ("alice", "bob")]
+        manifest = tmp_path / "fleet.toml"
+        manifest.write_text("".join(f'[[tenant]]\nhome = "{h}"\n\n' for h in homes))
+        summary = tmp_path / "summary.json"
+
+        result = runner.invoke(
+            app,
+            [
+                "fleet",
+                "generate",
+                str(manifest),
+                "-a",
+                "claude",
+                "-j",
+                "1",
+                "--summary",
+                str(summary),
+            ],
+        )
+        assert result.exit_code == 0, result.output
+        assert "2 ok, 0 failed" in result.output
+        for home in homes:
+            assert (home / ".claude" / "settings.full.json").exists()
+        assert json.loads(summary.read_text())["ok"] == 2
+
+    def test_fleet_generate_failed_tenant_exits_1(self, tmp_path: Path) -> None:
+        manifest = tmp_path / "fleet.toml"
+        manifest.write_text(f'[[tenant]]\nhome = "{tmp_path / "ghost"}"\n')
+        result = runner.invoke(app, ["fleet", "generate", str(manifest), "-j", "1"])
+        assert result.exit_code == 1
+        assert "ghost: FAILED" in result.output
+
+    def test_fleet_generate_missing_manifest_exits_1(self, tmp_path: Path) -> None:
+        result = runner.invoke(app, ["fleet", "generate", str(tmp_path / "nope.toml")])
+        assert result.exit_code == 1
+
+
+class TestProfiles:
+    def _config_with_profiles(self, tmp_path: Path) -> tuple[Path, Path]:
+        config = _make_config(tmp_path, {}, {"deny": ["rm"], "ask": ["git push"]})
+        claude_dir = tmp_path / ".claude"
+        claude_dir.mkdir()
+        target = claude_dir / "settings.full.json"
+        config.write_text(
+            config.read_text()
+            + f'\n[targets]\nclaude_settings = "{target}"\n'
+            + '\n[profiles.ci]\nask = "deny"\n'
+            + "[profiles.ci.sandbox_overrides]\nenabled = true\n"
+            + '\n[profiles.review-only]\nask = "skip"\n'
+        )
+        return config, claude_dir
+
+    def test_generate_single_profile_stdout(self, tmp_path: Path) -> None:
+        config, _ = self._config_with_profiles(tmp_path)
+        result = runner.invoke(
+            app, ["-c", str(config), "generate", "claude", "-p", "ci"]
+        )
+        assert result.exit_code == 0, result.output
+        output = json.loads(result.output)
+        assert "Bash(git push)" in output["permissions"]["deny"]
+        assert output["sandbox"]["enabled"] is True
+
+    def test_generate_all_profiles_one_pass_writes_each_target(
+        self, tmp_path: Path
+    ) -> None:
+        config, claude_dir = self._config_with_profiles(tmp_path)
+        result = runner.invoke(
+            app, ["-c", str(config), "generate", "claude", "-p", "all", "-w"]
+        )
+        assert result.exit_code == 0, result.output
+        for name in ("full", "yolo", "ci", "review-only"):
+            assert (claude_dir / f"settings.{name}.json").exists()
+        ci = json.loads((claude_dir / "settings.ci.json").read_text())
+        assert "Bash(git push)" in ci["permissions"]["deny"]
+        # Multi-profile runs leave the anchor alone
+        assert not (claude_dir / "settings.json").exists()
+
+    def test_all_profiles_migrate_regular_anchor(self, tmp_path: Path) -> None:
+        config, claude_dir = self._config_with_profiles(tmp_path)
+        anchor = claude_dir / "settings.json"
+        anchor.write_text(json.dumps({"hooks": {"PreToolUse": []}}))
+
+        result = runner.invoke(
+            app, ["-c", str(config), "generate", "claude", "-p", "all", "-w"]
+        )
+
+        assert result.exit_code == 0, result.output
+        assert "Migrated:" in result.output
+        assert anchor.is_symlink()
+        assert anchor.resolve() == (claude_dir / "settings.full.json").resolve()
+        full = json.loads(anchor.read_text())
+        assert full["hooks"] == {"PreToolUse": []}
+        assert "Bash(rm)" in full["permissions"]["deny"]
+
+    def test_diff_multiple_profiles(self, tmp_path: Path) -> None:
+        config, _ = self._config_with_profiles(tmp_path)
+        runner.invoke(
+            app,
+            ["-c", str(config), "generate", "claude", "-p", "ci", "-p", "full"]
+            + ["-w"],
+        )
+        result = runner.invoke(
+            app, ["-c", str(config), "diff", "claude", "-p", "ci", "-p", "full"]
+        )
+        assert result.exit_code == 0, result.output
+        assert "claude (ci): no drift" in result.output
+        assert "claude (full): no drift" in result.output
+
+    def test_unknown_profile_exits_1(self, tmp_path: Path) -> None:
+        config, _ = self._config_with_profiles(tmp_path)
+        result = runner.invoke(
+            app, ["-c", str(config), "generate", "claude", "-p", "nope"]
+        )
+        assert result.exit_code == 1
+        assert "Unknown profile" in result.output
+
+
+class TestCompactWrite:
+    def test_generate_compact_writes_compact_json(self, tmp_path: Path) -> None:
+        config = _make_config(tmp_path, {}, {"deny": ["rm"], "ask": []})
+        target = tmp_path / ".claude" / "settings.full.json"
+        config.write_text(
+            config.read_text() + f'\n[targets]\nclaude_settings = "{target}"\n'
+        )
+        result = runner.invoke(
+            app, ["-c", str(config), "generate", "claude", "-w", "--compact"]
+        )
+        assert result.exit_code == 0, result.output
+        text = target.read_text()
+        assert text.count("\n") == 1
+        assert "Bash(rm)" in json.loads(text)["permissions"]["deny"]
+
+
+class TestCopilotFormat:
+    def test_generate_nul_to_stdout(self, tmp_path: Path) -> None:
+        config = _make_config(tmp_path, {}, {"deny": ["rm"], "ask": []})
+        result = runner.invoke(
+            app, ["-c", str(config), "generate", "copilot", "--copilot-format", "nul"]
+        )
+        assert result.exit_code == 0, result.output
+        assert result.output == "--deny-tool\0shell(rm)\0"
+
+    def test_write_json_from_config_then_diff_clean(self, tmp_path: Path) -> None:
+        config = _make_config(tmp_path, {}, {"deny": ["rm"], "ask": []})
+        target = tmp_path / "copilot-flags.json"
+        config.write_text(
+            config.read_text()
+            + f'\n[targets]\ncopilot_output = "{target}"\ncopilot_format = "json"\n'
+        )
+        result = runner.invoke(app, ["-c", str(config), "generate", "copilot", "-w"])
+        assert result.exit_code == 0, result.output
+        assert json.loads(target.read_text()) == ["--deny-tool", "shell(rm)"]
+
+        result = runner.invoke(app, ["-c", str(config), "diff", "copilot"])
+        assert result.exit_code == 0, result.output
+
+    def test_unknown_format_exits_1(self, tmp_path: Path) -> None:
+        config = _make_config(tmp_path, {}, {"deny": ["rm"], "ask": []})
+        result = runner.invoke(
+            app, ["-c", str(config), "generate", "copilot", "--copilot-format", "x"]
+        )
+        assert result.exit_code == 1
+
+
+class TestExec:
+    @pytest.fixture
+    def execd(self, monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> list:
+        import twsrt.lib.launch as launch
+
+        calls: list[list[str]] = []
+        monkeypatch.setattr(launch, "exec_command", calls.append)
+        monkeypatch.setenv("TWSRT_CACHE_DIR", str(tmp_path / "cache"))
+        return calls
+
+    def test_exec_copilot_passes_flags_and_args(
+        self, tmp_path: Path, execd: list
+    ) -> None:
+        config = _make_config(tmp_path, {}, {"deny": ["rm"], "ask": []})
+        result = runner.invoke(
+            app, ["-c", str(config), "exec", "copilot", "--", "--model", "x"]
+        )
+        assert result.exit_code == 0, result.output
+        assert execd == [
+            ["copilot", "--deny-tool", "shell(rm)", "--model", "x"],
+        ]
+        assert list((tmp_path / "cache").glob("*.json"))
+
+    def test_exec_yolo_with_srt(self, tmp_path: Path, execd: list) -> None:
+        config = _make_config(tmp_path, {}, {"deny": ["rm"], "ask": []})
+        result = runner.invoke(
+            app, ["-c", str(config), "exec", "copilot", "--yolo", "--srt"]
+        )
+        assert result.exit_code == 0, result.output
+        assert execd == [["srt", "-c", "copilot --yolo --deny-tool 'shell(rm)'"]]
+
+    def test_exec_profile_with_yolo_rejected(self, tmp_path: Path, execd: list) -> None:
+        config = _make_config(tmp_path, {}, {"deny": ["rm"], "ask": []})
+        result = runner.invoke(
+            app, ["-c", str(config), "exec", "copilot", "-p", "full", "--yolo"]
+        )
+        assert result.exit_code == 2
+        assert "--yolo" in result.output
+        assert execd == []
+
+        result = runner.invoke(
+            app, ["-c", str(config), "exec", "copilot", "-p", "yolo", "--yolo"]
+        )
+        assert result.exit_code == 0, result.output
+        assert execd == [["copilot", "--yolo", "--deny-tool", "shell(rm)"]]
+
+    def test_exec_unsupported_agent_exits_1(self, tmp_path: Path, execd: list) -> None:
+        config = _make_config(tmp_path, {}, {"deny": [], "ask": []})
+        result = runner.invoke(app, ["-c", str(config), "exec", "claude"])
+        assert result.exit_code == 1
+        assert execd == []
+
+
+class TestMode:
+    def _config(self, tmp_path: Path) -> Path:
+        config = _make_config(tmp_path, {}, {"deny": ["rm"], "ask": ["git push"]})
+        target = tmp_path / ".claude" / "settings.full.json"
+        config.write_text(
+            config.read_text() + f'\n[targets]\nclaude_settings = "{target}"\n'
+        )
+        return config
+
+    def test_switch_and_report_mode(self, tmp_path: Path) -> None:
+        config = self._config(tmp_path)
+        result = runner.invoke(
+            app, ["-c", str(config), "mode", "yolo", "--no-background"]
+        )
+        assert result.exit_code == 0, result.output
+        assert "Mode: yolo" in result.output
+
+        result = runner.invoke(app, ["-c", str(config), "mode"])
+        assert result.output.strip() == "yolo"
+
+    def test_generate_write_stamps_so_switch_is_fresh(self, tmp_path: Path) -> None:
+        config = self._config(tmp_path)
+        runner.invoke(app, ["-c", str(config), "generate", "claude", "-w"])
+
+        from twsrt.lib.stamps import read_stamp
+
+        assert read_stamp("claude", tmp_path / ".claude" / "settings.full.json")
+        result = runner.invoke(
+            app, ["-c", str(config), "mode", "full", "--no-background"]
+        )
+        assert result.exit_code == 0, result.output
+        assert "Wrote:" not in result.output
+
+    def test_background_refreshes_other_mode(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        import twsrt.lib.modes as modes
+
+        spawned: list[str] = []
+        monkeypatch.setattr(modes, "spawn_refresh", lambda path, m: spawned.append(m))
+        config = self._config(tmp_path)
+
+        result = runner.invoke(app, ["-c", str(config), "mode", "full"])
+
+        assert result.exit_code == 0, result.output
+        assert spawned == ["yolo"]
+
+    def test_unknown_mode_exits_1(self, tmp_path: Path) -> None:
+        config = self._config(tmp_path)
+        result = runner.invoke(app, ["-c", str(config), "mode", "turbo"])
+        assert result.exit_code == 1
+
+
+class TestOutputCache:
+    def _forbid_parsing(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        import twsrt.lib.sources as sources
+
+        def fail(path: Path):
+            raise AssertionError("sources parsed on a warm cache")
+
+        monkeypatch.setattr(sources, "read_srt", fail)
+
+    def test_repeat_generate_served_from_cache(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        config = _make_config(tmp_path, {}, {"deny": ["rm"], "ask": []})
+        first = runner.invoke(app, ["-c", str(config), "generate"])
+        self._forbid_parsing(monkeypatch)
+
+        second = runner.invoke(app, ["-c", str(config), "generate"])
+
+        assert second.exit_code == 0, second.output
+        assert second.output == first.output
+
+    def test_source_change_invalidates(self, tmp_path: Path) -> None:
+        config = _make_config(tmp_path, {}, {"deny": ["rm"], "ask": []})
+        runner.invoke(app, ["-c", str(config), "generate", "claude"])
+        bash_rules = tmp_path / "config" / "twsrt" / "bash-rules.json"
+        bash_rules.write_text(json.dumps({"deny": ["sudo"], "ask": []}))
+
+        result = runner.invoke(app, ["-c", str(config), "generate", "claude"])
+
+        assert "Bash(sudo)" in result.output
+        assert "Bash(rm)" not in result.output
+
+    def test_deny_read_path_kind_invalidates(self, tmp_path: Path) -> None:
+        secret = tmp_path / "secret"
+        config = _make_config(tmp_path, {"filesystem": {"denyRead": [str(secret)]}})
+        first = runner.invoke(app, ["-c", str(config), "generate", "claude"])
+        assert f"Read({secret}/**)" in first.output
+
+        secret.write_text("token")
+        result = runner.invoke(app, ["-c", str(config), "generate", "claude"])
+
+        assert f"Read({secret})" in result.output
+        assert f"Read({secret}/**)" not in result.output
+
+    def test_no_cache_regenerates(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        config = _make_config(tmp_path, {}, {"deny": ["rm"], "ask": []})
+        runner.invoke(app, ["-c", str(config), "generate", "claude"])
+        self._forbid_parsing(monkeypatch)
+
+        result = runner.invoke(
+            app, ["-c", str(config), "generate", "claude", "--no-cache"]
+        )
+        assert result.exit_code != 0
+
+    def test_diff_uses_cache(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        config, _, _ = _make_config_with_targets(tmp_path, {}, {"deny": ["rm"]})
+        runner.invoke(app, ["-c", str(config), "generate", "-w"])
+        self._forbid_parsing(monkeypatch)
+
+        result = runner.invoke(app, ["-c", str(config), "diff"])
+        assert result.exit_code == 0, result.output
+
+
+class TestStatus:
+    def test_status_lifecycle(self, tmp_path: Path) -> None:
+        config, claude_target, _ = _make_config_with_targets(
+            tmp_path, {}, {"deny": ["rm"], "ask": []}
+        )
+        result = runner.invoke(app, ["-c", str(config), "status"])
+        assert result.exit_code == 2
+
+        runner.invoke(app, ["-c", str(config), "generate", "-w"])
+        result = runner.invoke(app, ["-c", str(config), "status"])
+        assert result.exit_code == 0, result.output
+        assert "claude: current" in result.output
+        assert "copilot: current" in result.output
+
+        bash_rules = tmp_path / "config" / "twsrt" / "bash-rules.json"
+        bash_rules.write_text(json.dumps({"deny": ["sudo"], "ask": []}))
+        result = runner.invoke(app, ["-c", str(config), "status", "claude"])
+        assert result.exit_code == 1
+        assert "claude: sources changed" in result.output
+
+    def test_status_reports_out_of_band_edit(self, tmp_path: Path) -> None:
+        config, claude_target, _ = _make_config_with_targets(
+            tmp_path, {}, {"deny": ["rm"], "ask": []}
+        )
+        runner.invoke(app, ["-c", str(config), "generate", "claude", "-w"])
+        data = json.loads(claude_target.read_text())
+        data["permissions"]["deny"] = []
+        claude_target.write_text(json.dumps(data))
+
+        result = runner.invoke(app, ["-c", str(config), "status", "claude"])
+        assert result.exit_code == 1
+        assert "claude: modified" in result.output
+
+
+class TestDiagnosticsSummary:
+    def _config(self, tmp_path: Path) -> Path:
+        return _make_config(
+            tmp_path, {}, {"deny": [], "ask": [f"cmd{i}" for i in range(50)]}
+        )
+
+    def test_text_summary_once_at_end(self, tmp_path: Path) -> None:
+        result = runner.invoke(
+            app, ["-c", str(self._config(tmp_path)), "generate", "copilot"]
+        )
+        assert result.exit_code == 0
+        assert result.stderr.count("INFO:") == 1
+        assert "and 47 more" in result.stderr
+
+    def test_json_summary(self, tmp_path: Path) -> None:
+        result = runner.invoke(
+            app,
+            [
+                "-c",
+                str(self._config(tmp_path)),
+                "--diagnostics-format",
+                "json",
+                "generate",
+                "copilot",
+            ],
+        )
+        assert result.exit_code == 0
+        entry = json.loads(result.stderr)["diagnostics"][0]
+        assert entry["code"] == "copilot.ask-as-deny"
+        assert entry["unique"] == 50
+
+    def test_unknown_format_exits_1(self, tmp_path: Path) -> None:
+        result = runner.invoke(
+            app,
+            ["-c", str(self._config(tmp_path)), "--diagnostics-format", "xml", "diff"],
+        )
+        assert result.exit_code == 1
+
+
+class TestTimings:
+    def _config(self, tmp_path: Path) -> Path:
+        return _make_config(
+            tmp_path,
+            {"filesystem": {"denyRead": ["~/.aws"]}},
+            {"deny": ["rm"], "ask": []},
+        )
+
+    def test_json_stages(self, tmp_path: Path) -> None:
+        result = runner.invoke(
+            app,
+            ["-c", str(self._config(tmp_path)), "--timings", "json", "generate"],
+        )
+        assert result.exit_code == 0
+        stages = {s["stage"]: s for s in json.loads(result.stderr)["timings"]}
+        assert {"total", "config", "read_srt", "claude.stat", "claude.finish"} <= set(
+            stages
+        )
+        assert stages["claude.stat"]["depth"] == 2  # total > claude.prepare > stat
+        assert stages["total"]["peak_bytes"] > 0
+
+    def test_text_table_without_cache(self, tmp_path: Path) -> None:
+        config = str(self._config(tmp_path))
+        runner.invoke(app, ["-c", config, "generate"])
+
+        result = runner.invoke(app, ["-c", config, "--timings", "text", "generate"])
+        assert result.exit_code == 0
+        assert result.stderr.startswith("stage")
+        assert "cache.lookup" in result.stderr
+        assert "read_srt" not in result.stderr  # served from the cache
+
+    def test_cprofile_dump(self, tmp_path: Path) -> None:
+        import pstats
+
+        out = tmp_path / "run.prof"
+        result = runner.invoke(
+            app,
+            ["-c", str(self._config(tmp_path)), "--cprofile", str(out), "generate"],
+        )
+        assert result.exit_code == 0
+        assert result.stderr == ""  # no table without --timings
+        assert pstats.Stats(str(out)).total_calls > 0
+
+    def test_unknown_format_exits_1(self, tmp_path: Path) -> None:
+        result = runner.invoke(
+            app, ["-c", str(self._config(tmp_path)), "--timings", "xml", "generate"]
+        )
+        assert result.exit_code == 1
+        assert "Unknown timings format" in result.stderr
+
+
+class TestMetricsExport:
+    def _config(self, tmp_path: Path) -> tuple[Path, Path]:
+        config, claude_target, _ = _make_config_with_targets(
+            tmp_path,
+            {"network": {"allowedDomains": ["github.com"]}},
+            {"deny": ["rm"], "ask": []},
+        )
+        return config, claude_target
+
+    def test_generate_writes_textfile(self, tmp_path: Path) -> None:
+        config, claude_target = self._config(tmp_path)
+        prom = tmp_path / "metrics" / "twsrt.prom"
+        args = ["-c", str(config), "generate", "claude", "-w", "--metrics", str(prom)]
+
+        result = runner.invoke(app, args)
+        assert result.exit_code == 0
+        text = prom.read_text()
+        assert (
+            'twsrt_rules{source="srt_network",scope="network",action="allow"} 1' in text
+        )
+        assert (
+            'twsrt_entries{agent="claude",profile="full",section="permissions.deny"} 2'
+            in text
+        )
+        assert f"{claude_target.stat().st_size}\n" in text
+        assert 'twsrt_stage_duration_seconds{stage="claude.write"}' in text
+        assert 'twsrt_last_success_timestamp_seconds{command="generate"}' in text
+        assert text.endswith("# EOF\n")
+
+        # Served from the cache: rule counts are still reported
+        runner.invoke(app, args)
+        assert 'twsrt_rules{source="bash_rules"' in prom.read_text()
+        assert 'stage="read_srt"' not in prom.read_text()
+
+    def test_diff_drift(self, tmp_path: Path) -> None:
+        config, claude_target = self._config(tmp_path)
+        runner.invoke(app, ["-c", str(config), "generate", "claude", "-w"])
+        data = json.loads(claude_target.read_text())
+        data["permissions"]["deny"] = []
+        claude_target.write_text(json.dumps(data))
+        prom = tmp_path / "diff.prom"
+
+        result = runner.invoke(
+            app, ["-c", str(config), "diff", "claude", "--metrics", str(prom)]
+        )
+        assert result.exit_code == 1
+        text = prom.read_text()
+        assert 'twsrt_drift{agent="claude",profile="full"} 1' in text
+        assert (
+            'twsrt_drift_entries{agent="claude",profile="full",kind="missing"} 2'
+            in text
+        )
+
+    def test_failed_run_keeps_previous_file(self, tmp_path: Path) -> None:
+        config, _ = self._config(tmp_path)
+        prom = tmp_path / "diff.prom"
+        prom.write_text("previous\n")
+
+        result = runner.invoke(
+            app, ["-c", str(config), "diff", "claude", "--metrics", str(prom)]
+        )
+        assert result.exit_code == 2  # target not written yet
+        assert prom.read_text() == "previous\n"
+
+
+class PluginGenerator:
+    """Entry-point agent without a managed target."""
+
+    name = "mine"
+
+    def prepare(self, rules, config):
+        return [rule.pattern for rule in rules]
+
+    def finish(self, prepared, config):
+        return prepared
+
+    def render(self, document):
+        return "\n".join(document)
+
+
+class TestPluginAgents:
+    @pytest.fixture(autouse=True)
+    def plugins(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        import twsrt.lib.agent as agent
+
+        eps = [
+            EntryPoint("mine", "tests.bin.test_cli:PluginGenerator", "x"),
+            EntryPoint("broken", "no_such_module:Gen", "x"),
+        ]
+        monkeypatch.setattr(agent, "entry_points", lambda group: eps)
+        monkeypatch.setattr(
+            agent, "GENERATORS", agent.GeneratorRegistry(agent._BUILTIN)
+        )
+
+    def test_default_diff_skips_agents_without_target(self, tmp_path: Path) -> None:
+        config, _, _ = _make_config_with_targets(tmp_path, {}, {"deny": ["rm"]})
+        runner.invoke(app, ["-c", str(config), "generate", "-w"])
+
+        result = runner.invoke(app, ["-c", str(config), "diff"])
+
+        assert result.exit_code == 0, result.output
+        assert "mine: no target, skipped" in result.stderr
+        assert "claude: no drift" in result.stdout
+
+    def test_broken_plugin_reported_and_skipped_under_all(self, tmp_path: Path) -> None:
+        config = _make_config(tmp_path, {}, {"deny": ["rm"], "ask": []})
+
+        result = runner.invoke(app, ["-c", str(config), "generate"])
+
+        assert result.exit_code == 0
+        assert "--- mine ---" in result.stdout
+        assert "WARNING: Cannot load generator 'broken'" in result.stderr
+
+    def test_broken_plugin_named_exits_1(self, tmp_path: Path) -> None:
+        config = _make_config(tmp_path, {}, {"deny": ["rm"], "ask": []})
+
+        result = runner.invoke(app, ["-c", str(config), "generate", "broken"])
+
+        assert result.exit_code == 1
+
+
+class TestAgents:
+    def test_lists_builtin_agents(self) -> None:
+        result = runner.invoke(app, ["agents"])
+        assert result.exit_code == 0
+        assert "claude\tbuilt-in\ttwsrt.lib.claude:ClaudeGenerator" in result.output
+        assert "copilot\tbuilt-in" in result.output
+
+
+class TestProjectsGenerate:
+    def test_generate_then_unchanged(self, tmp_path: Path) -> None:
+        config = _make_config(tmp_path, {}, {"deny": ["rm"], "ask": []})
+        root = tmp_path / "mono"
+        for name in ("a", "b"):
+            (root / name).mkdir(parents=True)
+            (root / name / ".twsrt.toml").write_text('[bash]\nask = ["make"]\n')
+
+        args = ["-c", str(config), "projects", "generate", str(root), "-j", "1"]
+        result = runner.invoke(app, args)
+        assert result.exit_code == 0, result.output
+        assert "Projects: 2 written, 0 unchanged, 0 failed" in result.output
+
+        result = runner.invoke(app, args)
+        assert "Projects: 0 written, 2 unchanged, 0 failed" in result.output
+
+
+class TestDestinations:
+    def test_generate_places_claude_target(self, tmp_path: Path) -> None:
+        config, claude_target, _ = _make_config_with_targets(tmp_path, {})
+        dests = [tmp_path / "dev1" / "settings.json", tmp_path / "dev2" / "s.json"]
+        with config.open("a") as f:
+            f.write(f"claude_destinations = {json.dumps([str(d) for d in dests])}\n")
+
+        result = runner.invoke(app, ["-c", str(config), "generate", "claude", "-w"])
+        assert result.exit_code == 0, result.output
+        for dest in dests:
+            assert f"Placed: {dest}" in result.output
+            assert dest.read_bytes() == claude_target.read_bytes()
+
+        result = runner.invoke(app, ["-c", str(config), "generate", "claude", "-w"])
+        for dest in dests:
+            assert f"Unchanged: {dest}" in result.output
+
+
+class TestWriteIfChanged:
+    def test_second_generate_reports_unchanged(self, tmp_path: Path) -> None:
+        config, claude_target, copilot_target = _make_config_with_targets(
+            tmp_path, {}, {"deny": ["rm"], "ask": []}
+        )
+        args = ["-c", str(config), "generate", "-w"]
+        result = runner.invoke(app, args)
+        assert f"Wrote: {claude_target}" in result.output
+        assert f"Wrote: {copilot_target}" in result.output
+        mtimes = [claude_target.stat().st_mtime_ns, copilot_target.stat().st_mtime_ns]
+
+        with patch("twsrt.lib.symlink.ensure_symlink") as ensure:
+            result = runner.invoke(app, args)
+        assert result.exit_code == 0, result.output
+        assert f"Unchanged: {claude_target}" in result.output
+        assert f"Unchanged: {copilot_target}" in result.output
+        assert "Wrote:" not in result.output
+        ensure.assert_not_called()
+        assert [
+            claude_target.stat().st_mtime_ns,
+            copilot_target.stat().st_mtime_ns,
+        ] == mtimes
+
+    def test_generate_writes_through_symlinked_target(self, tmp_path: Path) -> None:
+        config, claude_target, _ = _make_config_with_targets(
+            tmp_path, {}, {"deny": ["rm"], "ask": []}
+        )
+        real = tmp_path / "dotfiles" / "settings.full.json"
+        real.parent.mkdir()
+        real.write_text(json.dumps({"hooks": {"Stop": []}}))
+        claude_target.symlink_to(real)
+
+        result = runner.invoke(app, ["-c", str(config), "generate", "claude", "-w"])
+
+        assert result.exit_code == 0, result.output
+        assert claude_target.is_symlink()
+        settings = json.loads(real.read_text())
+        assert settings["hooks"] == {"Stop": []}
+        assert "Bash(rm)" in settings["permissions"]["deny"]
+
+
+class TestConcurrentGenerate:
+    def test_lock_timeout_then_unchanged(self, tmp_path: Path) -> None:
+        from twsrt.lib.lock import LOCK_NAME, target_lock
+
+        config, claude_target, _ = _make_config_with_targets(tmp_path, {})
+        args = ["-c", str(config), "generate", "claude", "-w"]
+        runner.invoke(app, args)
+        lock_file = claude_target.parent / LOCK_NAME
+
+        with target_lock(lock_file):
+            result = runner.invoke(app, [*args, "--lock-timeout", "0.1"])
+        assert result.exit_code == 1
+        assert "Timed out waiting for lock" in result.output
+
+        result = runner.invoke(app, args)
+        assert result.exit_code == 0, result.output
+        assert f"Unchanged: {claude_target}" in result.output
+
+
+class TestHistoryRollback:
+    def test_generate_records_and_rollback_restores(self, tmp_path: Path) -> None:
+        config, claude_target, _ = _make_config_with_targets(
+            tmp_path, {}, {"deny": ["rm"], "ask": []}
+        )
+        args = ["-c", str(config), "generate", "claude", "-w"]
+        runner.invoke(app, args)
+        first = claude_target.read_bytes()
+        bash_rules = tmp_path / "config" / "twsrt" / "bash-rules.json"
+        bash_rules.write_text(json.dumps({"deny": ["rm", "sudo"], "ask": []}))
+        runner.invoke(app, args)
+        assert claude_target.read_bytes() != first
+
+        result = runner.invoke(app, ["-c", str(config), "history"])
+        assert result.exit_code == 0, result.output
+        assert len(result.output.splitlines()) == 3  # header + 2 writes
+
+        result = runner.invoke(app, ["-c", str(config), "rollback"])
+        assert result.exit_code == 0, result.output
+        assert f"Restored: {claude_target}" in result.output
+        assert claude_target.read_bytes() == first
+
+    @pytest.mark.parametrize("fmt", ["shell", "json", "nul"])
+    def test_copilot_rollback_restores_stamp(self, tmp_path: Path, fmt: str) -> None:
+        config, _, copilot_target = _make_config_with_targets(
+            tmp_path, {}, {"deny": ["rm"], "ask": []}
+        )
+        with config.open("a") as f:
+            f.write(f'copilot_format = "{fmt}"\n')
+        args = ["-c", str(config), "generate", "copilot", "-w"]
+        runner.invoke(app, args)
+        bash_rules = tmp_path / "config" / "twsrt" / "bash-rules.json"
+        bash_rules.write_text(json.dumps({"deny": ["rm", "sudo"], "ask": []}))
+        runner.invoke(app, args)
+
+        result = runner.invoke(app, ["-c", str(config), "rollback", "-a", "copilot"])
+        assert result.exit_code == 0, result.output
+
+        result = runner.invoke(app, ["-c", str(config), "status", "copilot"])
+        assert "modified" not in result.output
+        assert "sources changed" in result.output
+        assert copilot_target.exists()
+
+    def test_rollback_without_history(self, tmp_path: Path) -> None:
+        config, _, _ = _make_config_with_targets(tmp_path, {})
+        result = runner.invoke(app, ["-c", str(config), "rollback"])
+        assert result.exit_code == 1
+        assert "No version 1" in result.output
+
+
+class TestHandEdits:
+    def _hand_edit_then_regenerate(self, tmp_path: Path, policy: str | None):
+        config, claude_target, _ = _make_config_with_targets(
+            tmp_path, {}, {"deny": ["rm"], "ask": []}
+        )
+        if policy:
+            with config.open("a") as f:
+                f.write(f'hand_edits = "{policy}"\n')
+        args = ["-c", str(config), "generate", "claude", "-w"]
+        runner.invoke(app, args)
+
+        settings = json.loads(claude_target.read_text())
+        settings["permissions"]["deny"].append("Bash(mine)")
+        claude_target.write_text(json.dumps(settings))
+        bash_rules = tmp_path / "config" / "twsrt" / "bash-rules.json"
+        bash_rules.write_text(json.dumps({"deny": ["sudo"], "ask": []}))
+
+        result = runner.invoke(app, args)
+        assert result.exit_code == 0, result.output
+        return result, json.loads(claude_target.read_text())["permissions"]["deny"]
+
+    def test_hand_added_entry_kept(self, tmp_path: Path) -> None:
+        result, deny = self._hand_edit_then_regenerate(tmp_path, None)
+        assert "Bash(mine)" in deny
+        assert "Bash(sudo)" in deny
+        assert "Bash(rm)" not in deny
+        assert "Kept entries added outside twsrt" in result.output
+
+    def test_hand_added_entry_discarded(self, tmp_path: Path) -> None:
+        result, deny = self._hand_edit_then_regenerate(tmp_path, "discard")
+        assert "Bash(mine)" not in deny
+        assert "Dropped entries added outside twsrt" in result.output
+
+    def test_diff_after_write_lists_kept_edits_without_drift(
+        self, tmp_path: Path
+    ) -> None:
+        self._hand_edit_then_regenerate(tmp_path, None)
+        config = tmp_path / "config" / "twsrt" / "config.toml"
+
+        result = runner.invoke(app, ["-c", str(config), "diff", "claude"])
+
+        assert result.exit_code == 0, result.output
+        assert "no drift (1 kept by hand)" in result.output
+        assert "= Bash(mine) (added by hand, kept)" in result.output
+
+    def test_diff_with_discard_reports_hand_edit_as_drift(self, tmp_path: Path) -> None:
+        self._hand_edit_then_regenerate(tmp_path, "discard")
+        config = tmp_path / "config" / "twsrt" / "config.toml"
+        claude_target = tmp_path / ".claude" / "settings.full.json"
+        settings = json.loads(claude_target.read_text())
+        settings["permissions"]["deny"].append("Bash(mine)")
+        claude_target.write_text(json.dumps(settings))
+
+        result = runner.invoke(app, ["-c", str(config), "diff", "claude"])
+
+        assert result.exit_code == 1
+        assert "- Bash(mine) (in existing, not in sources)" in result.output
+
+
+class TestDiffArchive:
+    def test_diff_reads_snapshot_without_extracting(self, tmp_path: Path) -> None:
+        import tarfile
+
+        home = tmp_path / "alice"
+        home.mkdir()
+        config, _, _ = _make_config_with_targets(home, {}, {"deny": ["rm"], "ask": []})
+        runner.invoke(app, ["-c", str(config), "generate", "claude", "-w"])
+        # Paths inside the snapshot's config are relative to its home
+        config.write_text(
+            '[sources]\nsrt = "~/srt.json"\n'
+            'bash_rules = "~/config/twsrt/bash-rules.json"\n'
+            '[targets]\nclaude_settings = "~/.claude/settings.full.json"\n'
+        )
+        archive = tmp_path / "alice.tar.gz"
+        with tarfile.open(archive, "w:gz") as tar:
+            tar.add(home, arcname=".")
+
+        args = ["-c", "~/config/twsrt/config.toml", "diff", "claude"]
+        archive_args = ["--archive", str(archive), "--archive-home", "/home/alice"]
+        result = runner.invoke(app, [*args, *archive_args])
+        assert result.exit_code == 0, result.output
+        assert "claude: no drift" in result.output
+
+        (home / "config" / "twsrt" / "bash-rules.json").write_text(
+            json.dumps({"deny": ["rm", "sudo"], "ask": []})
+        )
+        with tarfile.open(archive, "w:gz") as tar:
+            tar.add(home, arcname=".")
+        result = runner.invoke(app, [*args, *archive_args])
+        assert result.exit_code == 1
+        assert "Bash(sudo)" in result.output
+
+
+class TestDiffFormat:
+    def test_json_report(self, tmp_path: Path) -> None:
+        bash_rules = {"deny": ["rm"], "ask": []}
+        config, claude_target, _ = _make_config_with_targets(tmp_path, {}, bash_rules)
+        existing = {
+            "permissions": {"deny": ["Bash(rm)", "Bash(docker)"], "ask": []},
+            "sandbox": {"network": {"allowedDomains": []}, "enabled": False},
+        }
+        claude_target.write_text(json.dumps(existing))
+
+        result = runner.invoke(
+            app, ["-c", str(config), "diff", "claude", "--format", "json"]
+        )
+        assert result.exit_code == 1
+        report = json.loads(result.output)
+        assert report["matched"] is False
+        (claude,) = report["results"]
+        assert claude["agent"] == "claude"
+        changes = {(c["kind"], c["key"]) for c in claude["changes"]}
+        assert ("missing", "Bash(rm *)") in changes
+        assert ("extra", "Bash(docker)") in changes
+        assert ("extra", "sandbox.config:enabled") in changes
+
+    def test_text_shows_changed_values(self, tmp_path: Path) -> None:
+        config, claude_target, _ = _make_config_with_targets(tmp_path, {})
+        srt = tmp_path / "srt.json"
+        srt.write_text(json.dumps({"network": {"httpProxyPort": 8080}}))
+        existing = {
+            "permissions": {"deny": [], "ask": []},
+            "sandbox": {"network": {"allowedDomains": [], "httpProxyPort": 3128}},
+        }
+        claude_target.write_text(json.dumps(existing))
+
+        result = runner.invoke(app, ["-c", str(config), "diff", "claude"])
+        assert result.exit_code == 1
+        assert "0 missing, 0 extra, 1 changed" in result.output
+        assert "~ network.config:httpProxyPort: 3128 → 8080" in result.output
+
+    def test_unknown_format_rejected(self, tmp_path: Path) -> None:
+        config, _, _ = _make_config_with_targets(tmp_path, {})
+        result = runner.invoke(
+            app, ["-c", str(config), "diff", "claude", "--format", "xml"]
+        )
+        assert result.exit_code == 1
+        assert "Unknown format" in result.output
+
+
+class TestFleetDiff:
+    _tenant = TestFleetGenerate._tenant
+
+    def test_reports_jsonl_and_histogram(self, tmp_path: Path) -> None:
+        homes = [self._tenant(tmp_path / "homes", n) for n in "ab"]
+        manifest = tmp_path / "fleet.toml"
+        manifest.write_text("".join(f'[[tenant]]\nhome = "{h}"\n\n' for h in homes))
+        runner.invoke(app, ["fleet", "generate", str(manifest), "-a", "claude"])
+        settings = homes[1] / ".claude" / "settings.full.json"
+        settings.write_text(settings.read_text().replace('"Bash(rm *)"', '"Bash(x)"'))
+        summary = tmp_path / "summary.json"
+
+        result = runner.invoke(
+            app,
+            [
+                "fleet",
+                "diff",
+                str(tmp_path / "homes" / "*"),
+                "-a",
+                "claude",
+                "-j",
+                "1",
+                "--summary",
+                str(summary),
+            ],
+        )
+        assert result.exit_code == 1, result.output
+        records = [json.loads(line) for line in result.stdout.splitlines()]
+        assert [(r["tenant"], r["status"]) for r in records] == [
+            ("a", "matched"),
+            ("b", "drift"),
+        ]
+        # Bash(x) is a hand edit generate keeps, not drift
+        assert records[1]["kept"] == ["Bash(x)"]
+        histogram = json.loads(summary.read_text())
+        assert histogram["missing"] == {"Bash(rm *)": 1}
+        assert histogram["extra"] == {}
+
+    def test_no_homes_is_an_error(self) -> None:
+        result = runner.invoke(app, ["fleet", "diff"])
+        assert result.exit_code == 1
+        assert "No homes given" in result.output
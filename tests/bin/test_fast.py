@@ -0,0 +1,150 @@
+"""Tests for the fast entry point: argv parsing, typer fallback, import cost."""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+import typer.main
+from typer.testing import CliRunner
+
+from twsrt.bin.cli import app
+from twsrt.bin.fast import COMMAND_OPTIONS, GLOBAL_OPTIONS, main, parse
+
+runner = CliRunner()
+
+# Import budget of the fast path (twsrt.bin.fast + commands), in ms. The typer
+# CLI costs several times this; the bound is loose to stay stable on slow CI.
+IMPORT_BUDGET_MS = 100
+
+
+def _setup(tmp_path: Path) -> Path:
+    srt = tmp_path / "srt.json"
+    srt.write_text(json.dumps({"network": {"allowedDomains": ["github.com"]}}))
+    bash_rules = tmp_path / "bash-rules.json"
+    bash_rules.write_text(json.dumps({"deny": ["rm"], "ask": []}))
+    config = tmp_path / "config.toml"
+    config.write_text(
+        f'[sources]\nsrt = "{srt}"\nbash_rules = "{bash_rules}"\n'
+        f'[targets]\nclaude_settings = "{tmp_path / ".claude" / "settings.full.json"}"\n'
+    )
+    return config
+
+
+class TestParse:
+    def test_hot_command(self) -> None:
+        assert parse(["-c", "x.toml", "diff", "claude", "-p", "ci", "--profile=b"]) == (
+            "diff",
+            {"config": Path("x.toml")},
+            {"agent": "claude", "profile": ["ci", "b"]},
+        )
+
+    def test_typed_values(self) -> None:
+        _, _, options = parse(["generate", "-w", "--lock-timeout", "2.5"])
+        assert options == {"write": True, "lock_timeout": 2.5}
+
+    @pytest.mark.parametrize(
+        "args",
+        [
+            [],
+            ["--help"],
+            ["diff", "--help"],
+            ["--version"],
+            ["init"],
+            ["fleet", "diff", "/home/*"],
+            ["diff", "claude", "copilot"],  # surplus argument: typer's usage error
+            ["generate", "-wn"],  # combined short flags
+            ["generate", "--lock-timeout", "soon"],
+            ["diff", "--yolo=1"],
+            ["-c"],
+        ],
+    )
+    def test_falls_back_to_typer(self, args: list[str]) -> None:
+        assert parse(args) is None
+
+    def test_tables_match_typer_signatures(self) -> None:
+        group = typer.main.get_command(app)
+
+        def options(command) -> set[str]:
+            return {
+                opt
+                for param in command.params
+                if param.param_type_name == "option"
+                for opt in param.opts
+            }
+
+        handled_by_typer = {
+            "--version",
+            "-V",
+            "--help",
+            "--install-completion",
+            "--show-completion",
+        }
+        assert options(group) - handled_by_typer == set(GLOBAL_OPTIONS)
+        for name, table in COMMAND_OPTIONS.items():
+            assert options(group.commands[name]) - {"--help"} == set(table), name
+
+
+class TestMain:
+    def test_diff_same_as_typer(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        config = _setup(tmp_path)
+        runner.invoke(app, ["-c", str(config), "generate", "claude", "-w"])
+        target = tmp_path / ".claude" / "settings.full.json"
+        target.write_text(target.read_text().replace("Bash(rm *)", "Bash(rm -rf)"))
+        args = ["-c", str(config), "diff", "claude"]
+
+        with pytest.raises(SystemExit) as exc:
+            main(args)
+
+        assert exc.value.code == 1
+        typer_result = runner.invoke(app, args)
+        assert typer_result.exit_code == 1
+        assert capsys.readouterr().out == typer_result.stdout
+
+    def test_status_quiet(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        config = _setup(tmp_path)
+        main(["-c", str(config), "generate", "claude", "-w"])
+        capsys.readouterr()
+
+        main(["-c", str(config), "status", "claude", "-q"])
+
+        assert capsys.readouterr().out == ""
+
+    def test_fallback_runs_typer(self, capsys: pytest.CaptureFixture[str]) -> None:
+        with pytest.raises(SystemExit) as exc:
+            main(["--version"])
+        assert exc.value.code == 0
+        assert "twsrt version" in capsys.readouterr().out
+
+
+class TestImportTime:
+    def test_fast_path_stays_light(self) -> None:
+        """The hot path must not import typer/click/rich and must stay in budget."""
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-X",
+                "importtime",
+                "-c",
+                "import twsrt.bin.fast, twsrt.bin.commands",
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        modules: dict[str, int] = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            _, cumulative, name = line.removeprefix("import time:").split("|")
+            modules[name.strip()] = int(cumulative)
+
+        heavy = {m for m in modules if m.split(".")[0] in ("typer", "click", "rich")}
+        assert not heavy
+        total_ms = (modules["twsrt.bin.fast"] + modules["twsrt.bin.commands"]) / 1000
+        assert total_ms < IMPORT_BUDGET_MS, f"{total_ms:.0f} ms"
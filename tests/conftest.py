@@ -180,3 +180,19 @@ def claude_settings_file(tmp_path: Path) -> Path:
     p.parent.mkdir(parents=True, exist_ok=True)
     p.write_text(json.dumps(SAMPLE_CLAUDE_SETTINGS, indent=2))
     return p
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Keep the generated-output cache out of the real ~/.cache."""
+    cache_dir = tmp_path / "twsrt-cache"
+    monkeypatch.setenv("TWSRT_CACHE_DIR", str(cache_dir))
+    return cache_dir
+
+
+@pytest.fixture(autouse=True)
+def isolated_history(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Keep the target history out of the real ~/.local/share."""
+    history_dir = tmp_path / "twsrt-history"
+    monkeypatch.setenv("TWSRT_HISTORY_DIR", str(history_dir))
+    return history_dir
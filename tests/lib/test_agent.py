@@ -1,8 +1,11 @@
 """AgentGenerator Protocol contract tests — applied to each registered generator."""
 
+from importlib.metadata import EntryPoint
 from pathlib import Path
 
-from twsrt.lib.agent import GENERATORS
+import pytest
+
+from twsrt.lib.agent import GENERATORS, GeneratorRegistry
 from twsrt.lib.models import AppConfig, DiffResult
 
 
@@ -31,3 +34,80 @@ class TestAgentGeneratorContract:
         for gen in GENERATORS.values():
             result = gen.diff([], target, config)
             assert isinstance(result, DiffResult)
+
+    def test_render_of_build_equals_generate(self) -> None:
+        config = AppConfig()
+        for gen in GENERATORS.values():
+            document = gen.build([], config)
+            assert not isinstance(document, str)
+            assert gen.render(document) == gen.generate([], config)
+
+    def test_compare_accepts_structured_document(self, tmp_path: Path) -> None:
+        target = tmp_path / "target.json"
+        target.write_text("{}")
+        config = AppConfig()
+        for gen in GENERATORS.values():
+            result = gen.compare(gen.build([], config), target)
+            assert isinstance(result, DiffResult)
+
+
+class TestGeneratorRegistry:
+    def test_builtin_lookup_without_entry_point_scan(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        import twsrt.lib.agent as agent
+
+        def fail(**kwargs):
+            raise AssertionError("entry points scanned")
+
+        monkeypatch.setattr(agent, "entry_points", fail)
+        registry = GeneratorRegistry(agent._BUILTIN)
+        assert registry["copilot"].name == "copilot"
+        assert "claude" in registry
+
+    def test_entry_point_generator_discovered_lazily(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        import twsrt.lib.agent as agent
+
+        ep = EntryPoint(
+            name="fake", value="tests.lib.test_agent:FakeGenerator", group="x"
+        )
+        monkeypatch.setattr(agent, "entry_points", lambda group: [ep])
+        registry = GeneratorRegistry({"claude": agent._BUILTIN["claude"]})
+
+        assert list(registry) == ["claude", "fake"]
+        assert registry.info("fake").module == "tests.lib.test_agent"
+        assert registry._instances == {}
+        assert isinstance(registry["fake"], FakeGenerator)
+
+    def test_broken_entry_point_raises_value_error(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        import twsrt.lib.agent as agent
+
+        ep = EntryPoint(name="broken", value="no_such_module:Gen", group="x")
+        monkeypatch.setattr(agent, "entry_points", lambda group: [ep])
+        registry = GeneratorRegistry({})
+
+        with pytest.raises(ValueError, match="Cannot load generator 'broken'"):
+            registry["broken"]
+
+    def test_copilot_lookup_does_not_import_claude(self) -> None:
+        import subprocess
+        import sys
+
+        code = (
+            "import sys\n"
+            "from twsrt.lib.agent import GENERATORS\n"
+            "GENERATORS['copilot']\n"
+            "print('twsrt.lib.claude' in sys.modules)\n"
+        )
+        out = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+        assert out.stdout.strip() == "False"
+
+
+class FakeGenerator:
+    name = "fake"
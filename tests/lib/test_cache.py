@@ -0,0 +1,139 @@
+"""Tests for cache.py: fingerprints and the generated-output cache."""
+
+from pathlib import Path
+
+import pytest
+
+from twsrt.lib.cache import OutputCache, default_cache_dir, fingerprint
+from twsrt.lib.models import AppConfig, AskPolicy
+
+
+@pytest.fixture
+def config(tmp_path: Path) -> AppConfig:
+    srt = tmp_path / "srt.json"
+    srt.write_text("{}")
+    bash = tmp_path / "bash-rules.json"
+    bash.write_text('{"deny": ["rm"], "ask": []}')
+    return AppConfig(srt_path=srt, bash_rules_path=bash)
+
+
+class TestFingerprint:
+    def test_stable_for_same_inputs(self, config: AppConfig) -> None:
+        assert fingerprint(config, "copilot", "1.0") == fingerprint(
+            config, "copilot", "1.0"
+        )
+
+    def test_changes_with_source_content(self, config: AppConfig) -> None:
+        before = fingerprint(config, "copilot", "1.0")
+        config.bash_rules_path.write_text('{"deny": ["sudo"], "ask": []}')
+        assert fingerprint(config, "copilot", "1.0") != before
+
+    @pytest.mark.parametrize(
+        "change",
+        [
+            lambda c: setattr(c, "yolo", True),
+            lambda c: setattr(c, "ask_policy", AskPolicy.DENY),
+            lambda c: setattr(c, "sandbox_overrides", {"full": {"enabled": True}}),
+            lambda c: setattr(c, "home", Path("/home/other")),
+        ],
+    )
+    def test_changes_with_config(self, config: AppConfig, change) -> None:
+        before = fingerprint(config, "copilot", "1.0")
+        change(config)
+        assert fingerprint(config, "copilot", "1.0") != before
+
+    def test_changes_with_generator_and_version(self, config: AppConfig) -> None:
+        base = fingerprint(config, "copilot", "1.0")
+        assert fingerprint(config, "claude", "1.0") != base
+        assert fingerprint(config, "copilot", "1.1") != base
+
+    def test_claude_changes_with_deny_read_path_kind(
+        self, config: AppConfig, tmp_path: Path
+    ) -> None:
+        secret = tmp_path / "secret"
+        config.srt_path.write_text(f'{{"filesystem": {{"denyRead": ["{secret}"]}}}}')
+        before = fingerprint(config, "claude", "1.0")
+        copilot = fingerprint(config, "copilot", "1.0")
+
+        secret.write_text("token")  # now a file: no /** entries
+
+        assert fingerprint(config, "claude", "1.0") != before
+        assert fingerprint(config, "copilot", "1.0") == copilot
+
+    def test_unchanged_sources_read_once(
+        self, config: AppConfig, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        from twsrt.lib import sources
+
+        reads: list[Path] = []
+        real_digest, real_rules = sources.source_digest, sources.deny_read_rules
+        monkeypatch.setattr(
+            sources, "source_digest", lambda p: reads.append(p) or real_digest(p)
+        )
+        monkeypatch.setattr(
+            sources, "deny_read_rules", lambda p: reads.append(p) or real_rules(p)
+        )
+        for profile_yolo in (False, True, False):
+            config.yolo = profile_yolo
+            fingerprint(config, "claude", "1.0")
+        assert reads == [config.srt_path, config.bash_rules_path, config.srt_path]
+
+        config.srt_path.write_text('{"network": {}}')
+        fingerprint(config, "claude", "1.0")
+        assert reads[3:] == [config.srt_path, config.srt_path]
+
+    def test_missing_source_raises(self, config: AppConfig) -> None:
+        config.srt_path.unlink()
+        with pytest.raises(FileNotFoundError):
+            fingerprint(config, "copilot", "1.0")
+
+
+class TestOutputCache:
+    def test_roundtrip(self, tmp_path: Path) -> None:
+        cache = OutputCache(tmp_path / "cache")
+        cache.put("k", ["--deny-tool", "shell(rm)"])
+        assert cache.get("k") == ["--deny-tool", "shell(rm)"]
+
+    def test_miss_and_corrupt_entry_return_none(self, tmp_path: Path) -> None:
+        cache = OutputCache(tmp_path)
+        assert cache.get("absent") is None
+        cache.path("bad").write_text("{not json")
+        assert cache.get("bad") is None
+
+    def test_default_dir_from_env(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setenv("TWSRT_CACHE_DIR", str(tmp_path / "c"))
+        assert default_cache_dir() == tmp_path / "c"
+        monkeypatch.delenv("TWSRT_CACHE_DIR")
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg"))
+        assert default_cache_dir() == tmp_path / "xdg" / "twsrt"
+
+
+class TestEviction:
+    def test_lru_entry_evicted_over_cap(self, tmp_path: Path) -> None:
+        import os
+
+        cache = OutputCache(tmp_path, max_bytes=10_000)
+        cache.put("old", "x" * 4000)
+        cache.put("used", "y" * 4000)
+        os.utime(cache.path("old"), ns=(1, 1))
+        os.utime(cache.path("used"), ns=(2, 2))
+        assert cache.get("used") is not None  # refreshes recency
+
+        cache.put("new", "z" * 4000)
+
+        assert cache.get("old") is None
+        assert cache.get("used") is not None
+        assert cache.get("new") is not None
+
+    def test_concurrent_writers_leave_complete_entry(self, tmp_path: Path) -> None:
+        from concurrent.futures import ThreadPoolExecutor
+
+        cache = OutputCache(tmp_path)
+        values = [{"writer": i, "flags": ["--deny-tool"] * 500} for i in range(16)]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda v: cache.put("k", v), values))
+
+        assert cache.get("k") in values
+        assert [p.name for p in tmp_path.iterdir()] == ["k.json"]
@@ -5,7 +5,12 @@ from pathlib import Path
 
 import pytest
 
-from twsrt.lib.claude import ClaudeGenerator, selective_merge
+from twsrt.lib.claude import (
+    ClaudeGenerator,
+    managed_entries,
+    merge_entries,
+    selective_merge,
+)
 from twsrt.lib.models import Action, AppConfig, Scope, SecurityRule, Source
 
 
@@ -899,3 +904,212 @@ class TestClaudeYoloGeneration:
         # Claude-only keys preserved
         assert sandbox["autoAllowBashIfSandboxed"] is True
         assert sandbox["excludedCommands"] == ["docker"]
+
+
+class TestClaudeAskPolicy:
+    """Named profiles: ask policy decides where Bash ask rules land."""
+
+    RULES = [
+        SecurityRule(Scope.EXECUTE, Action.DENY, "rm", Source.BASH_RULES),
+        SecurityRule(Scope.EXECUTE, Action.ASK, "git push", Source.BASH_RULES),
+    ]
+
+    def test_deny_policy_promotes_ask_to_deny(
+        self, gen: ClaudeGenerator, config: AppConfig
+    ) -> None:
+        from twsrt.lib.models import AskPolicy
+
+        config.ask_policy = AskPolicy.DENY
+        output = json.loads(gen.generate(self.RULES, config))
+        assert "Bash(git push)" in output["permissions"]["deny"]
+        assert "Bash(git push *)" in output["permissions"]["deny"]
+        assert output["permissions"]["ask"] == []
+
+    def test_skip_policy_drops_ask_but_keeps_key(
+        self, gen: ClaudeGenerator, config: AppConfig
+    ) -> None:
+        from twsrt.lib.models import AskPolicy
+
+        config.ask_policy = AskPolicy.SKIP
+        output = json.loads(gen.generate(self.RULES, config))
+        assert output["permissions"]["ask"] == []
+        assert "Bash(git push)" not in output["permissions"]["deny"]
+
+    def test_explicit_ask_policy_keeps_ask_key_in_yolo_profile(
+        self, gen: ClaudeGenerator, config: AppConfig
+    ) -> None:
+        """A yolo profile with ask = "ask" keeps its ask entries."""
+        from twsrt.lib.models import AskPolicy, Profile
+
+        config.profiles["loose"] = Profile(
+            name="loose", yolo=True, ask_policy=AskPolicy.ASK
+        )
+        output = json.loads(gen.generate(self.RULES, config.for_profile("loose")))
+        assert output["permissions"]["ask"] == ["Bash(git push)", "Bash(git push *)"]
+        assert "Bash(git push)" not in output["permissions"]["deny"]
+
+        config.profiles["loose"].ask_policy = None
+        output = json.loads(gen.generate(self.RULES, config.for_profile("loose")))
+        assert "ask" not in output["permissions"]
+
+    def test_prepare_shared_across_profiles(
+        self, gen: ClaudeGenerator, config: AppConfig
+    ) -> None:
+        """One prepare, several finishes: equal to independent generate calls."""
+        from twsrt.lib.models import AskPolicy
+
+        prepared = gen.prepare(self.RULES, config)
+        for policy in AskPolicy:
+            config.ask_policy = policy
+            assert gen.finish(prepared, config) == gen.build(self.RULES, config)
+
+
+class TestThreeWayMerge:
+    def test_merge_entries_applies_only_the_change(self) -> None:
+        base = ["Bash(rm)", "Bash(sudo)"]
+        generated = ["Bash(rm)", "Bash(dd)"]
+        current = ["Bash(mine)", "Bash(rm)", "Bash(sudo)"]
+
+        merged, by_hand, restored = merge_entries(base, generated, current)
+
+        assert merged == ["Bash(mine)", "Bash(rm)", "Bash(dd)"]
+        assert by_hand == ["Bash(mine)"]
+        assert restored == []
+
+    def test_merge_entries_restores_hand_removed(self) -> None:
+        merged, _, restored = merge_entries(["Bash(rm)"], ["Bash(rm)"], [])
+        assert merged == ["Bash(rm)"]
+        assert restored == ["Bash(rm)"]
+
+    def test_merge_entries_restores_deleted_duplicate(self) -> None:
+        # A path in denyRead and denyWrite yields the same entry twice
+        merged, by_hand, restored = merge_entries(
+            ["a", "W", "W"], ["a", "W", "W"], ["a", "W"]
+        )
+        assert merged == ["a", "W", "W"]
+        assert by_hand == []
+        assert restored == ["W"]
+
+    def test_merge_entries_hand_added_duplicate(self) -> None:
+        merged, by_hand, _ = merge_entries(["a", "W"], ["a", "W"], ["a", "W", "W"])
+        assert merged == ["a", "W", "W"]
+        assert by_hand == ["W"]
+
+        merged, by_hand, _ = merge_entries(
+            ["a", "W"], ["a", "W"], ["a", "W", "W"], keep=False
+        )
+        assert merged == ["a", "W"]
+        assert by_hand == ["W"]
+
+    def test_compare_after_merge_with_duplicates_matches(self, tmp_path: Path) -> None:
+        target = tmp_path / "settings.json"
+        generated = {
+            "permissions": {"deny": ["a", "W", "W"], "ask": [], "allow": []},
+            "sandbox": {"network": {"allowedDomains": []}},
+        }
+        on_disk = json.loads(json.dumps(generated))
+        on_disk["permissions"]["deny"] = ["a", "W", "mine"]
+        target.write_text(json.dumps(on_disk))
+        base = managed_entries(generated)
+
+        target.write_text(json.dumps(selective_merge(target, generated, base)))
+        result = ClaudeGenerator().compare(generated, target, base)
+
+        assert result.matched
+        assert result.kept == ["mine"]
+
+    def test_merge_entries_discard(self) -> None:
+        merged, by_hand, _ = merge_entries(
+            ["Bash(rm)"], ["Bash(rm)"], ["Bash(mine)", "Bash(rm)"], keep=False
+        )
+        assert merged == ["Bash(rm)"]
+        assert by_hand == ["Bash(mine)"]
+
+    def test_selective_merge_with_base(self, tmp_path: Path) -> None:
+        from twsrt.lib import diagnostics
+
+        target = tmp_path / "settings.json"
+        target.write_text(
+            json.dumps(
+                {
+                    "permissions": {
+                        "deny": ["Bash(rm)", "Bash(mine)"],
+                        "ask": ["Bash(git push)"],
+                        "allow": ["Read", "WebFetch(domain:old.com)"],
+                    }
+                }
+            )
+        )
+        base = {
+            "deny": ["Bash(rm)"],
+            "ask": ["Bash(git push)"],
+            "allow": ["WebFetch(domain:old.com)"],
+        }
+        generated = {
+            "permissions": {
+                "deny": ["Bash(rm)", "Bash(sudo)"],
+                "ask": ["Bash(git push)"],
+                "allow": ["WebFetch(domain:new.com)"],
+            },
+            "sandbox": {"network": {"allowedDomains": []}},
+        }
+
+        with diagnostics.collect() as collected:
+            result = selective_merge(target, generated, base)
+
+        assert result["permissions"]["deny"] == ["Bash(rm)", "Bash(mine)", "Bash(sudo)"]
+        assert result["permissions"]["allow"] == ["Read", "WebFetch(domain:new.com)"]
+        [entry] = collected.entries
+        assert list(entry.subjects) == ["Bash(mine)"]
+        assert managed_entries(result) == {
+            "deny": ["Bash(rm)", "Bash(mine)", "Bash(sudo)"],
+            "ask": ["Bash(git push)"],
+            "allow": ["WebFetch(domain:new.com)"],
+        }
+
+    def test_selective_merge_drops_hand_added_webfetch(self, tmp_path: Path) -> None:
+        from twsrt.lib import diagnostics
+
+        target = tmp_path / "settings.json"
+        allow = ["WebFetch(domain:a.com)", "WebFetch(domain:mine.com)"]
+        target.write_text(json.dumps({"permissions": {"deny": [], "allow": allow}}))
+        base = {"deny": [], "ask": [], "allow": ["WebFetch(domain:a.com)"]}
+        generated = {
+            "permissions": {"deny": [], "allow": ["WebFetch(domain:a.com)"]},
+            "sandbox": {"network": {"allowedDomains": []}},
+        }
+
+        with diagnostics.collect() as collected:
+            result = selective_merge(target, generated, base)
+
+        assert result["permissions"]["allow"] == ["WebFetch(domain:a.com)"]
+        [entry] = collected.entries
+        assert entry.message.startswith("Dropped")
+        assert list(entry.subjects) == ["WebFetch(domain:mine.com)"]
+
+    def test_compare_with_base_lists_kept_hand_edits(self, tmp_path: Path) -> None:
+        target = tmp_path / "settings.json"
+        existing = {
+            "permissions": {
+                "deny": ["Bash(rm)", "Bash(mine)"],
+                "ask": [],
+                "allow": ["WebFetch(domain:mine.com)"],
+            },
+            "sandbox": {"network": {"allowedDomains": []}},
+        }
+        target.write_text(json.dumps(existing))
+        generated = {
+            "permissions": {"deny": ["Bash(rm)"], "ask": [], "allow": []},
+            "sandbox": {"network": {"allowedDomains": []}},
+        }
+        base = managed_entries(generated)
+        gen = ClaudeGenerator()
+
+        result = gen.compare(generated, target, base)
+
+        assert result.kept == ["Bash(mine)"]
+        assert result.extra == ["WebFetch(domain:mine.com)"]
+        assert gen.compare(generated, target).extra == [
+            "Bash(mine)",
+            "WebFetch(domain:mine.com)",
+        ]
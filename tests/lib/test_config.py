@@ -131,3 +131,106 @@ class TestSandboxOverrides:
         config = load_config(toml_file)
         assert config.sandbox_overrides == {"yolo": {"enabled": True}}
         assert "full" not in config.sandbox_overrides
+
+
+class TestTenantHome:
+    def test_tilde_expands_against_tenant_home(self, tmp_path: Path) -> None:
+        home = tmp_path / "alice"
+        toml_file = tmp_path / "config.toml"
+        toml_file.write_text(
+            '[sources]\nsrt = "~/.srt-settings.json"\n'
+            "[targets]\n"
+            'copilot_output = "~/flags.txt"\n'
+        )
+        config = load_config(toml_file, home=home)
+        assert config.home == home
+        assert config.srt_path == home / ".srt-settings.json"
+        assert config.copilot_output_path == home / "flags.txt"
+        # Defaults not set in the file are rooted at the tenant home too
+        assert config.bash_rules_path == home / ".config/twsrt/bash-rules.json"
+        assert config.claude_settings_path == home / ".claude/settings.full.json"
+
+    def test_missing_toml_uses_tenant_defaults(self, tmp_path: Path) -> None:
+        config = load_config(tmp_path / "nonexistent.toml", home=tmp_path)
+        assert config.srt_path == tmp_path / ".srt-settings.json"
+
+
+class TestProfiles:
+    def test_profiles_loaded(self, tmp_twsrt_dir: Path) -> None:
+        from twsrt.lib.models import AskPolicy
+
+        toml_file = tmp_twsrt_dir / "config.toml"
+        toml_file.write_text(
+            "[profiles.ci]\n"
+            'ask = "deny"\n'
+            'claude_settings = "~/.claude/settings.ci.json"\n'
+            "[profiles.ci.sandbox_overrides]\n"
+            "enabled = true\n"
+            "\n"
+            "[profiles.offline]\n"
+            "yolo = true\n"
+        )
+        config = load_config(toml_file)
+        ci = config.profiles["ci"]
+        assert ci.ask_policy == AskPolicy.DENY
+        assert ci.sandbox_overrides == {"enabled": True}
+        assert str(ci.claude_settings_path).endswith("settings.ci.json")
+        assert "~" not in str(ci.claude_settings_path)
+        offline = config.profiles["offline"]
+        assert offline.yolo is True
+        assert offline.ask_policy is None
+        assert offline.claude_settings_path is None
+
+    def test_builtin_profile_name_rejected(self, tmp_twsrt_dir: Path) -> None:
+        toml_file = tmp_twsrt_dir / "config.toml"
+        toml_file.write_text("[profiles.yolo]\nask = 'skip'\n")
+        with pytest.raises(ValueError, match="reserved"):
+            load_config(toml_file)
+
+    def test_invalid_ask_policy_rejected(self, tmp_twsrt_dir: Path) -> None:
+        toml_file = tmp_twsrt_dir / "config.toml"
+        toml_file.write_text("[profiles.ci]\nask = 'maybe'\n")
+        with pytest.raises(ValueError, match="Invalid ask policy"):
+            load_config(toml_file)
+
+
+class TestCopilotFormat:
+    def test_copilot_format_loaded(self, tmp_path: Path) -> None:
+        config_file = tmp_path / "config.toml"
+        config_file.write_text('[targets]\ncopilot_format = "nul"\n')
+        assert load_config(config_file).copilot_format == "nul"
+
+    def test_invalid_copilot_format_raises(self, tmp_path: Path) -> None:
+        config_file = tmp_path / "config.toml"
+        config_file.write_text('[targets]\ncopilot_format = "yaml"\n')
+        with pytest.raises(ValueError, match="Invalid copilot_format"):
+            load_config(config_file)
+
+
+class TestDestinations:
+    def test_destinations_loaded_and_expanded(self, tmp_path: Path) -> None:
+        config_file = tmp_path / "config.toml"
+        config_file.write_text(
+            '[targets]\nclaude_destinations = ["~/mnt/a.json", "/srv/b.json"]\n'
+        )
+        config = load_config(config_file, home=tmp_path)
+        assert config.destinations == {
+            "claude": [tmp_path / "mnt" / "a.json", Path("/srv/b.json")]
+        }
+
+    def test_invalid_destinations_raise(self, tmp_path: Path) -> None:
+        config_file = tmp_path / "config.toml"
+        config_file.write_text('[targets]\ncopilot_destinations = "/srv/x"\n')
+        with pytest.raises(ValueError, match="Invalid copilot_destinations"):
+            load_config(config_file)
+
+
+class TestHandEdits:
+    def test_default_keep(self, tmp_path: Path) -> None:
+        assert load_config(tmp_path / "missing.toml").hand_edits == "keep"
+
+    def test_invalid_policy_raises(self, tmp_path: Path) -> None:
+        config_file = tmp_path / "config.toml"
+        config_file.write_text('[targets]\nhand_edits = "merge"\n')
+        with pytest.raises(ValueError, match="Invalid hand_edits"):
+            load_config(config_file)
@@ -178,6 +178,21 @@ class TestCopilotLossyMapping:
             "no ask equivalent" in captured.err.lower() or "ask" in captured.err.lower()
         )
 
+    def test_many_ask_rules_one_warning_line(
+        self,
+        gen: CopilotGenerator,
+        config: AppConfig,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        rules = [
+            SecurityRule(Scope.EXECUTE, Action.ASK, f"cmd{i}", Source.BASH_RULES)
+            for i in range(500)
+        ]
+        gen.generate(rules, config)
+        err = capsys.readouterr().err
+        assert err.count("\n") == 1
+        assert "and 497 more" in err
+
 
 class TestCopilotYoloGeneration:
     """T013-T015: Copilot YOLO mode generates --yolo + deny-only flags."""
@@ -242,3 +257,78 @@ class TestCopilotYoloGeneration:
 
         # No lossy mapping warning
         assert captured.err == ""
+
+
+class TestCopilotAskPolicy:
+    def test_deny_policy_maps_without_warning(
+        self,
+        gen: CopilotGenerator,
+        config: AppConfig,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        from twsrt.lib.models import AskPolicy
+
+        config.ask_policy = AskPolicy.DENY
+        rules = [
+            SecurityRule(Scope.EXECUTE, Action.ASK, "git push", Source.BASH_RULES),
+        ]
+        output = gen.generate(rules, config)
+        assert "--deny-tool 'shell(git push)'" in output
+        assert capsys.readouterr().err == ""
+
+    def test_skip_policy_without_yolo(
+        self, gen: CopilotGenerator, config: AppConfig
+    ) -> None:
+        from twsrt.lib.models import AskPolicy
+
+        config.ask_policy = AskPolicy.SKIP
+        rules = [
+            SecurityRule(Scope.EXECUTE, Action.ASK, "git push", Source.BASH_RULES),
+            SecurityRule(Scope.NETWORK, Action.ALLOW, "github.com", Source.SRT_NETWORK),
+        ]
+        output = gen.generate(rules, config)
+        assert "git push" not in output
+        assert "--allow-url 'github.com'" in output
+        assert "--yolo" not in output
+
+
+class TestCopilotOutputFormats:
+    RULES = [
+        SecurityRule(Scope.EXECUTE, Action.DENY, "rm -rf", Source.BASH_RULES),
+        SecurityRule(Scope.NETWORK, Action.ALLOW, "github.com", Source.SRT_NETWORK),
+    ]
+
+    def test_argv_splits_option_and_unquoted_value(
+        self, gen: CopilotGenerator, config: AppConfig
+    ) -> None:
+        args = gen.argv(gen.build(self.RULES, config))
+        assert args == [
+            "--deny-tool",
+            "shell(rm -rf)",
+            "--allow-url",
+            "github.com",
+        ]
+
+    def test_nul_format_terminates_each_arg(
+        self, gen: CopilotGenerator, config: AppConfig
+    ) -> None:
+        output = gen.render(gen.build(self.RULES, config), "nul")
+        assert output == "--deny-tool\0shell(rm -rf)\0--allow-url\0github.com\0"
+
+    def test_json_format_is_argv_array(
+        self, gen: CopilotGenerator, config: AppConfig
+    ) -> None:
+        import json
+
+        output = gen.render(gen.build(self.RULES, config), "json")
+        assert json.loads(output) == gen.argv(gen.build(self.RULES, config))
+
+    def test_generate_uses_config_format(self, gen: CopilotGenerator) -> None:
+        output = gen.generate(self.RULES, AppConfig(copilot_format="json"))
+        assert output.startswith("[")
+
+    def test_unknown_format_raises(
+        self, gen: CopilotGenerator, config: AppConfig
+    ) -> None:
+        with pytest.raises(ValueError, match="Unknown copilot format"):
+            gen.render([], "yaml")
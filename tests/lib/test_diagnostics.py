@@ -0,0 +1,72 @@
+"""Tests for diagnostics.py: aggregated generator warnings."""
+
+import json
+
+import pytest
+
+from twsrt.lib import diagnostics
+from twsrt.lib.diagnostics import Diagnostics
+
+
+class TestDiagnostics:
+    def test_same_warning_merged_and_subjects_deduped(self) -> None:
+        collector = Diagnostics()
+        collector.report("c", "ask mapped", ["git push", "pip install"])
+        collector.report("c", "ask mapped", ["git push"])
+
+        assert len(collector) == 1
+        entry = collector.entries[0]
+        assert entry.count == 3
+        assert list(entry.subjects) == ["git push", "pip install"]
+
+    def test_text_summary_lists_few_examples(self) -> None:
+        collector = Diagnostics()
+        collector.report("c", "ask mapped", [f"cmd{i}" for i in range(1000)])
+
+        text = collector.render()
+        assert text.count("\n") == 0
+        assert text.startswith("INFO: ask mapped: 'cmd0', 'cmd1', 'cmd2'")
+        assert text.endswith("and 997 more")
+
+    def test_json_summary(self) -> None:
+        collector = Diagnostics()
+        collector.report("c", "ask mapped", ["a", "b"], level="warning")
+
+        data = json.loads(collector.render("json"))
+        assert data["diagnostics"] == [
+            {
+                "level": "warning",
+                "code": "c",
+                "message": "ask mapped",
+                "count": 2,
+                "unique": 2,
+                "examples": ["a", "b"],
+            }
+        ]
+
+    def test_merge_serialized_entries(self) -> None:
+        worker = Diagnostics()
+        worker.report("c", "ask mapped", ["a", "b"])
+        parent = Diagnostics()
+        parent.report("c", "ask mapped", ["b"])
+
+        parent.merge([e.as_dict(limit=None) for e in worker.entries])
+
+        assert parent.entries[0].count == 3
+        assert list(parent.entries[0].subjects) == ["b", "a"]
+
+
+class TestReport:
+    def test_collect_buffers_reports(self, capsys: pytest.CaptureFixture[str]) -> None:
+        with diagnostics.collect() as collector:
+            diagnostics.report("c", "ask mapped", ["a"])
+            diagnostics.report("c", "ask mapped", ["b"])
+
+        assert capsys.readouterr().err == ""
+        assert collector.entries[0].count == 2
+
+    def test_without_collector_prints_one_line_per_report(
+        self, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        diagnostics.report("c", "ask mapped", ["a", "b", "c"])
+        assert capsys.readouterr().err == "INFO: ask mapped: 'a', 'b', 'c'\n"
@@ -492,3 +492,103 @@ class TestCopilotDrift:
         result = gen.diff(rules, target, AppConfig())
         assert result.matched is False
         assert "--deny-url '*.tracker.net'" in result.missing
+
+
+class TestCopilotFormatDiff:
+    RULES = [
+        SecurityRule(Scope.EXECUTE, Action.DENY, "rm", Source.BASH_RULES),
+        SecurityRule(Scope.NETWORK, Action.ALLOW, "github.com", Source.SRT_NETWORK),
+    ]
+
+    def test_nul_target_matches(self, tmp_path: Path) -> None:
+        gen = CopilotGenerator()
+        target = tmp_path / "copilot-flags.argv"
+        target.write_text(gen.render(gen.build(self.RULES, AppConfig()), "nul"))
+
+        assert gen.diff(self.RULES, target, AppConfig()).matched is True
+
+    def test_json_target_drift_reported_as_flags(self, tmp_path: Path) -> None:
+        gen = CopilotGenerator()
+        target = tmp_path / "copilot-flags.json"
+        target.write_text(
+            json.dumps(["--deny-tool", "shell(rm)", "--deny-tool", "shell(sudo)"])
+        )
+
+        result = gen.diff(self.RULES, target, AppConfig())
+        assert result.matched is False
+        assert "--deny-tool 'shell(sudo)'" in result.extra
+        assert "--allow-url 'github.com'" in result.missing
+
+
+class TestStructuralDiff:
+    """Schema-driven diff engine (twsrt.lib.diff)."""
+
+    def test_lists_compared_as_multisets(self) -> None:
+        from twsrt.lib.diff import Multiset, diff_documents
+
+        schema = (Multiset(("deny",)),)
+        changes = list(
+            diff_documents(schema, {"deny": ["a", "b", "b"]}, {"deny": ["b", "c", "a"]})
+        )
+        assert [(c.kind, c.key) for c in changes] == [
+            ("missing", "b"),
+            ("extra", "c"),
+        ]
+
+    def test_keep_filter_and_prefix(self) -> None:
+        from twsrt.lib.diff import Multiset, diff_documents
+
+        schema = (Multiset(("allow",), prefix="x:", keep=lambda e: e.startswith("W")),)
+        changes = list(
+            diff_documents(schema, {"allow": ["W1"]}, {"allow": ["Bash(ls)", "W2"]})
+        )
+        assert [(c.kind, c.key) for c in changes] == [
+            ("missing", "x:W1"),
+            ("extra", "x:W2"),
+        ]
+
+    def test_value_detail(self) -> None:
+        from twsrt.lib.diff import Value, diff_documents
+
+        schema = (
+            Value(("s", "port"), "port"),
+            Value(("s", "on"), "on"),
+            Value(("s", "x"), "x"),
+        )
+        generated = {"s": {"port": 8080, "on": True}}
+        existing = {"s": {"port": 3128, "x": {"a": 1}}}
+        changes = {c.key: c for c in diff_documents(schema, generated, existing)}
+        assert changes["port"].as_dict() == {
+            "kind": "changed",
+            "path": "s.port",
+            "key": "port",
+            "old": 3128,
+            "new": 8080,
+        }
+        assert (changes["on"].kind, changes["on"].new) == ("missing", True)
+        assert (changes["x"].kind, changes["x"].old) == ("extra", {"a": 1})
+
+    def test_streams_lazily(self) -> None:
+        from twsrt.lib.diff import Multiset, diff_documents
+
+        changes = diff_documents(
+            (Multiset(("a",)), Multiset(("b",))), {"a": ["1"]}, "not a dict"
+        )
+        assert next(changes).key == "1"
+
+    def test_claude_changed_value_has_old_and_new(self, tmp_path: Path) -> None:
+        gen = ClaudeGenerator()
+        config = AppConfig(network_config={"httpProxyPort": 8080})
+        existing = {
+            "permissions": {"deny": [], "ask": [], "allow": []},
+            "sandbox": {"network": {"allowedDomains": [], "httpProxyPort": 3128}},
+        }
+        target = tmp_path / "settings.json"
+        target.write_text(json.dumps(existing))
+
+        result = gen.diff([], target, config)
+        (change,) = result.changes
+        assert (change.kind, change.old, change.new) == ("changed", 3128, 8080)
+        assert change.path == "sandbox.network.httpProxyPort"
+        # Still listed on both sides for callers of missing/extra
+        assert result.missing == result.extra == ["network.config:httpProxyPort"]
@@ -0,0 +1,82 @@
+"""Tests for fanout.py: placing one written target at extra destinations."""
+
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from twsrt.lib import diagnostics
+from twsrt.lib.fanout import COPY, REFLINK, UNCHANGED, fan_out, place
+
+
+@pytest.fixture
+def source(tmp_path: Path) -> Path:
+    path = tmp_path / "settings.full.json"
+    path.write_text('{"permissions": {}}\n')
+    return path
+
+
+class TestPlace:
+    def test_places_content(self, source: Path, tmp_path: Path) -> None:
+        dest = tmp_path / "mnt" / "dev1" / "settings.json"
+        method = place(source, dest)
+        assert method in (REFLINK, COPY)
+        assert dest.read_text() == source.read_text()
+
+    def test_copy_when_reflink_unsupported(self, source: Path, tmp_path: Path) -> None:
+        dest = tmp_path / "dest.json"
+        with patch("twsrt.lib.fanout._reflink", side_effect=OSError("no")):
+            assert place(source, dest) == COPY
+        assert dest.read_text() == source.read_text()
+        assert not os.path.samefile(source, dest)
+
+    def test_edit_at_destination_leaves_source_alone(
+        self, source: Path, tmp_path: Path
+    ) -> None:
+        dest = tmp_path / "dest.json"
+        place(source, dest)
+        with dest.open("w") as f:  # in place, as an editor might
+            f.write("edited\n")
+        assert source.read_text() == '{"permissions": {}}\n'
+
+    def test_hardlinked_destination_replaced_by_copy(
+        self, source: Path, tmp_path: Path
+    ) -> None:
+        dest = tmp_path / "dest.json"
+        os.link(source, dest)
+        with patch("twsrt.lib.fanout._reflink", side_effect=OSError("no")):
+            assert place(source, dest) == COPY
+        assert not os.path.samefile(source, dest)
+
+    def test_matching_destination_untouched(self, source: Path, tmp_path: Path) -> None:
+        dest = tmp_path / "dest.json"
+        dest.write_text(source.read_text())
+        inode = dest.stat().st_ino
+        assert place(source, dest) == UNCHANGED
+        assert dest.stat().st_ino == inode
+
+    def test_stale_destination_replaced(self, source: Path, tmp_path: Path) -> None:
+        dest = tmp_path / "dest.json"
+        dest.write_text("old\n")
+        assert place(source, dest) != UNCHANGED
+        assert dest.read_text() == source.read_text()
+        assert [p.name for p in tmp_path.iterdir() if p.suffix == ".tmp"] == []
+
+
+class TestFanOut:
+    def test_messages_and_failures(self, source: Path, tmp_path: Path) -> None:
+        ok = tmp_path / "ok.json"
+        blocker = tmp_path / "blocker"
+        blocker.write_text("")
+        bad = blocker / "settings.json"  # parent is a file
+
+        with diagnostics.collect() as collected:
+            messages = fan_out(source, [ok, bad])
+            again = fan_out(source, [ok])
+
+        assert messages[0].startswith(f"Placed: {ok} (")
+        assert again == [f"Unchanged: {ok}"]
+        [entry] = collected.entries
+        assert entry.level == "warning"
+        assert str(bad) in next(iter(entry.subjects))
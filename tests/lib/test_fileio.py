@@ -0,0 +1,79 @@
+"""Tests for fileio.py: atomic, fsync'd, write-if-changed replacement."""
+
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from twsrt.lib.fileio import write_if_changed
+
+
+class TestWriteIfChanged:
+    def test_writes_new_target(self, tmp_path: Path) -> None:
+        target = tmp_path / "sub" / "flags.txt"
+        assert write_if_changed(target, b"--deny-tool 'shell(rm)'\n") is True
+        assert target.read_bytes() == b"--deny-tool 'shell(rm)'\n"
+        assert [p.name for p in target.parent.iterdir()] == ["flags.txt"]
+
+    def test_identical_content_not_rewritten(self, tmp_path: Path) -> None:
+        target = tmp_path / "flags.txt"
+        target.write_bytes(b"same\n")
+        os.utime(target, ns=(1_000_000_000, 1_000_000_000))
+
+        assert write_if_changed(target, b"same\n") is False
+        assert target.stat().st_mtime_ns == 1_000_000_000
+
+    def test_replaced_content_is_fsynced(self, tmp_path: Path) -> None:
+        target = tmp_path / "flags.txt"
+        target.write_bytes(b"old\n")
+        inode = target.stat().st_ino
+        with patch("twsrt.lib.fileio.os.fsync", wraps=os.fsync) as fsync:
+            assert write_if_changed(target, b"new\n") is True
+        assert fsync.call_count == 2  # file, then directory
+        assert target.read_bytes() == b"new\n"
+        assert target.stat().st_ino != inode
+
+    def test_failed_replace_keeps_target(self, tmp_path: Path) -> None:
+        target = tmp_path / "flags.txt"
+        target.write_bytes(b"old\n")
+        with patch("twsrt.lib.fileio.os.replace", side_effect=OSError("boom")):
+            with pytest.raises(OSError):
+                write_if_changed(target, b"new\n")
+        assert target.read_bytes() == b"old\n"
+        assert [p.name for p in tmp_path.iterdir()] == ["flags.txt"]
+
+    def test_new_target_gets_umask_mode_without_changing_umask(
+        self, tmp_path: Path
+    ) -> None:
+        target = tmp_path / "new.json"
+        previous = os.umask(0o027)
+        try:
+            with patch("twsrt.lib.fileio.os.umask", side_effect=AssertionError):
+                write_if_changed(target, b"{}")
+        finally:
+            os.umask(previous)
+        assert target.stat().st_mode & 0o777 == 0o640
+
+    def test_existing_target_keeps_mode(self, tmp_path: Path) -> None:
+        target = tmp_path / "settings.json"
+        target.write_bytes(b"old")
+        target.chmod(0o600)
+        write_if_changed(target, b"new")
+        assert target.stat().st_mode & 0o777 == 0o600
+
+    def test_symlinked_target_written_through(self, tmp_path: Path) -> None:
+        dotfiles = tmp_path / "dotfiles"
+        dotfiles.mkdir()
+        real = dotfiles / "settings.json"
+        real.write_bytes(b"old")
+        link = tmp_path / ".claude" / "settings.json"
+        link.parent.mkdir()
+        link.symlink_to(real)
+
+        assert write_if_changed(link, b"new") is True
+
+        assert link.is_symlink()
+        assert real.read_bytes() == b"new"
+        assert [p.name for p in link.parent.iterdir()] == ["settings.json"]
+        assert [p.name for p in dotfiles.iterdir()] == ["settings.json"]
@@ -0,0 +1,294 @@
+"""Tests for fleet.py: manifest parsing and multi-tenant generation."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from twsrt.lib.fleet import (
+    Tenant,
+    diff_fleet,
+    generate_fleet,
+    read_manifest,
+    summarize_diffs,
+    tenants_from_homes,
+    write_summary,
+)
+
+
+def _make_tenant(root: Path, name: str, srt: dict, bash_rules: dict) -> Tenant:
+    """Helper: create a tenant home with '~'-relative config, sources and targets."""
+    home = root / name
+    (home / ".config" / "twsrt").mkdir(parents=True)
+    (home / ".srt-settings.json").write_text(json.dumps(srt))
+    (home / ".config" / "twsrt" / "bash-rules.json").write_text(json.dumps(bash_rules))
+    config = home / ".config" / "twsrt" / "config.toml"
+    config.write_text(
+        '[sources]\nsrt = "~/.srt-settings.json"\n'
+        'bash_rules = "~/.config/twsrt/bash-rules.json"\n'
+        "[targets]\n"
+        'claude_settings = "~/.claude/settings.full.json"\n'
+        'copilot_output = "~/.config/twsrt/copilot-flags.txt"\n'
+    )
+    return Tenant(name=name, home=home, config_path=config)
+
+
+class TestReadManifest:
+    def test_parses_tenants_with_defaults(self, tmp_path: Path) -> None:
+        manifest = tmp_path / "fleet.toml"
+        manifest.write_text(
+            '[[tenant]]\nhome = "/home/alice"\n\n'
+            '[[tenant]]\nhome = "/home/bob"\nname = "robert"\n'
+            'config = "~/custom/twsrt.toml"\n'
+        )
+        tenants = read_manifest(manifest)
+        assert tenants[0] == Tenant(
+            name="alice",
+            home=Path("/home/alice"),
+            config_path=Path("/home/alice/.config/twsrt/config.toml"),
+        )
+        assert tenants[1].name == "robert"
+        assert tenants[1].config_path == Path("/home/bob/custom/twsrt.toml")
+
+    def test_missing_home_raises(self, tmp_path: Path) -> None:
+        manifest = tmp_path / "fleet.toml"
+        manifest.write_text('[[tenant]]\nname = "x"\n')
+        with pytest.raises(ValueError, match="no 'home'"):
+            read_manifest(manifest)
+
+    def test_missing_manifest_raises(self, tmp_path: Path) -> None:
+        with pytest.raises(FileNotFoundError):
+            read_manifest(tmp_path / "nope.toml")
+
+
+class TestGenerateFleet:
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_writes_each_tenant_under_its_home(
+        self, tmp_path: Path, workers: int
+    ) -> None:
+        srt = {"network": {"allowedDomains": ["github.com"]}}
+        tenants = [
+            _make_tenant(tmp_path, "alice", srt, {"deny": ["rm"], "ask": []}),
+            _make_tenant(tmp_path, "bob", srt, {"deny": ["sudo"], "ask": []}),
+        ]
+
+        results = generate_fleet(tenants, ["claude", "copilot"], workers=workers)
+
+        assert [r.tenant for r in results] == ["alice", "bob"]
+        assert all(r.ok for r in results), results
+        for tenant, cmd in (("alice", "rm"), ("bob", "sudo")):
+            settings = tmp_path / tenant / ".claude" / "settings.full.json"
+            written = json.loads(settings.read_text())
+            assert f"Bash({cmd})" in written["permissions"]["deny"]
+            assert (tmp_path / tenant / ".claude" / "settings.json").is_symlink()
+            flags = tmp_path / tenant / ".config" / "twsrt" / "copilot-flags.txt"
+            assert f"--deny-tool 'shell({cmd})'" in flags.read_text()
+
+    def test_identical_sources_parsed_once(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        import twsrt.lib.sources as sources
+
+        srt = {"network": {"allowedDomains": ["github.com"]}}
+        bash_rules = {"deny": ["rm"], "ask": []}
+        tenants = [_make_tenant(tmp_path, f"u{i}", srt, bash_rules) for i in range(3)]
+
+        calls: list[Path] = []
+        original = sources.read_srt
+
+        def counting_read_srt(path: Path):
+            calls.append(path)
+            return original(path)
+
+        monkeypatch.setattr(sources, "read_srt", counting_read_srt)
+        results = generate_fleet(tenants, ["claude"], workers=1)
+
+        assert all(r.ok for r in results)
+        assert len(calls) == 1
+
+    def test_tilde_deny_read_resolved_against_tenant_home(self, tmp_path: Path) -> None:
+        """'~/.netrc' is a file in the tenant home → no /** expansion."""
+        tenant = _make_tenant(
+            tmp_path,
+            "alice",
+            {"filesystem": {"denyRead": ["~/.netrc"]}},
+            {"deny": [], "ask": []},
+        )
+        (tenant.home / ".netrc").write_text("")
+
+        generate_fleet([tenant], ["claude"], workers=1)
+
+        settings = tenant.home / ".claude" / "settings.full.json"
+        deny = json.loads(settings.read_text())["permissions"]["deny"]
+        assert "Read(~/.netrc)" in deny
+        assert "Read(~/.netrc/**)" not in deny
+
+    def test_missing_sources_fail_only_that_tenant(self, tmp_path: Path) -> None:
+        good = _make_tenant(tmp_path, "good", {}, {"deny": [], "ask": []})
+        bad = _make_tenant(tmp_path, "bad", {}, {"deny": [], "ask": []})
+        (bad.home / ".srt-settings.json").unlink()
+
+        results = generate_fleet([bad, good], ["claude"], workers=1)
+
+        assert results[0].ok is False
+        assert "not found" in (results[0].error or "")
+        assert results[1].ok is True
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_corrupt_target_fails_only_that_tenant(
+        self, tmp_path: Path, workers: int
+    ) -> None:
+        good = _make_tenant(tmp_path, "good", {}, {"deny": [], "ask": []})
+        bad = _make_tenant(tmp_path, "bad", {}, {"deny": [], "ask": []})
+        target = bad.home / ".claude" / "settings.full.json"
+        target.parent.mkdir()
+        target.write_text("{not json")
+
+        results = generate_fleet([bad, good], ["claude"], workers=workers)
+
+        assert results[0].ok is False
+        assert results[0].error
+        assert results[1].ok is True
+
+
+class TestTenantsFromHomes:
+    def test_globs_expanded_and_deduplicated(self, tmp_path: Path) -> None:
+        for name in ("bob", "alice"):
+            (tmp_path / name).mkdir()
+        (tmp_path / "notes.txt").write_text("")
+
+        tenants = tenants_from_homes([str(tmp_path / "*"), str(tmp_path / "bob")])
+
+        assert [t.name for t in tenants] == ["alice", "bob"]
+        assert tenants[0].config_path == (
+            tmp_path / "alice" / ".config" / "twsrt" / "config.toml"
+        )
+
+
+class TestDiffFleet:
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_records_per_tenant_and_agent(self, tmp_path: Path, workers: int) -> None:
+        srt = {"network": {"allowedDomains": ["github.com"]}}
+        bash_rules = {"deny": ["rm"], "ask": []}
+        tenants = [_make_tenant(tmp_path, n, srt, bash_rules) for n in ("a", "b")]
+        generate_fleet(tenants, ["claude", "copilot"], workers=1)
+        settings = tmp_path / "b" / ".claude" / "settings.full.json"
+        drifted = json.loads(settings.read_text())
+        drifted["permissions"]["deny"].append("Bash(curl)")
+        drifted["permissions"]["allow"].append("WebFetch(domain:evil.com)")
+        settings.write_text(json.dumps(drifted))
+
+        records = diff_fleet(tenants, ["claude", "copilot"], workers=workers)
+
+        assert [(r["tenant"], r["agent"], r["status"]) for r in records] == [
+            ("a", "claude", "matched"),
+            ("a", "copilot", "matched"),
+            ("b", "claude", "drift"),
+            ("b", "copilot", "matched"),
+        ]
+        # A deny added by hand is kept by writes; a WebFetch allow is not
+        assert records[2]["extra"] == ["WebFetch(domain:evil.com)"]
+        assert records[2]["changes"][0]["old"] == "WebFetch(domain:evil.com)"
+        assert records[2]["kept"] == ["Bash(curl)"]
+
+    def test_shared_document_generated_once(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        from twsrt.lib.claude import ClaudeGenerator
+
+        tenants = [
+            _make_tenant(tmp_path, f"u{i}", {}, {"deny": ["rm"], "ask": []})
+            for i in range(3)
+        ]
+        calls: list[Path | None] = []
+        original = ClaudeGenerator.build
+
+        def counting_build(self, rules, config):
+            calls.append(config.home)
+            return original(self, rules, config)
+
+        monkeypatch.setattr(ClaudeGenerator, "build", counting_build)
+        records = diff_fleet(tenants, ["claude"], workers=1)
+
+        assert len(calls) == 1
+        # Nothing written yet: every target is missing
+        assert {r["status"] for r in records} == {"failed"}
+
+    def test_home_facts_split_documents(self, tmp_path: Path) -> None:
+        """'~/.netrc' is a file in one home only → different documents."""
+        srt = {"filesystem": {"denyRead": ["~/.netrc"]}}
+        tenants = [
+            _make_tenant(tmp_path, n, srt, {"deny": [], "ask": []}) for n in "ab"
+        ]
+        (tenants[0].home / ".netrc").write_text("")
+        generate_fleet(tenants, ["claude"], workers=1)
+
+        records = diff_fleet(tenants, ["claude"], workers=1)
+
+        assert [r["status"] for r in records] == ["matched", "matched"]
+
+    def test_unreadable_config_fails_tenant(self, tmp_path: Path) -> None:
+        tenant = _make_tenant(tmp_path, "bad", {}, {"deny": [], "ask": []})
+        (tenant.home / ".srt-settings.json").unlink()
+
+        (record,) = diff_fleet([tenant], ["claude", "copilot"], workers=1)
+
+        assert record["agent"] is None
+        assert record["status"] == "failed"
+        assert "not found" in record["error"]
+
+
+class TestSummarizeDiffs:
+    def test_histogram(self) -> None:
+        change = {"kind": "missing", "key": "Bash(rm)"}
+        records = [
+            {"home": "/a", "agent": "claude", "status": "drift", "changes": [change]},
+            {"home": "/b", "agent": "claude", "status": "drift", "changes": [change]},
+            {"home": "/b", "agent": "copilot", "status": "matched", "changes": []},
+            {"home": "/c", "agent": None, "status": "failed", "error": "x"},
+        ]
+
+        summary = summarize_diffs(records)
+
+        assert summary["tenants"] == 3
+        assert summary["targets"] == 3
+        assert summary["status"] == {"matched": 1, "drift": 2, "failed": 1}
+        assert summary["missing"] == {"Bash(rm)": 2}
+        assert summary["extra"] == {}
+
+
+class TestWriteSummary:
+    def test_summary_counts_and_results(self, tmp_path: Path) -> None:
+        from twsrt.lib.fleet import TenantResult
+
+        summary = tmp_path / "out" / "summary.json"
+        write_summary(
+            [
+                TenantResult(tenant="a", ok=True, messages=["Wrote: x"]),
+                TenantResult(tenant="b", ok=False, error="boom"),
+            ],
+            summary,
+        )
+        data = json.loads(summary.read_text())
+        assert data["tenants"] == 2
+        assert data["ok"] == 1
+        assert data["failed"] == 1
+        assert data["results"][1]["error"] == "boom"
+
+
+class TestFleetDiagnostics:
+    def test_worker_diagnostics_merged_into_active_collector(
+        self, tmp_path: Path
+    ) -> None:
+        from twsrt.lib import diagnostics
+
+        tenants = [
+            _make_tenant(tmp_path, name, {}, {"deny": [], "ask": ["git push"]})
+            for name in ("alice", "bob")
+        ]
+        with diagnostics.collect() as collected:
+            results = generate_fleet(tenants, ["copilot"], workers=2)
+
+        assert all(r.ok for r in results)
+        assert results[0].diagnostics[0]["examples"] == ["git push"]
+        assert collected.entries[0].count == 2
@@ -0,0 +1,226 @@
+"""Tests for history.py: content-addressed target history and rollback."""
+
+import os
+import threading
+from pathlib import Path
+
+import pytest
+
+from twsrt.lib import history as history_mod
+from twsrt.lib.history import EXTERNAL, ROLLBACK, WRITE, History
+from twsrt.lib.lock import target_lock
+
+
+@pytest.fixture
+def history(tmp_path: Path) -> History:
+    return History(tmp_path / "history")
+
+
+@pytest.fixture
+def target(tmp_path: Path) -> Path:
+    return tmp_path / "settings.full.json"
+
+
+class TestBlobs:
+    def test_identical_content_stored_once(
+        self, history: History, target: Path
+    ) -> None:
+        history.record(target, b"{}\n", "fp1")
+        history.record(target, b"{}\n", "fp2")
+        blobs = [p for p in (history.root / "objects").rglob("*") if p.is_file()]
+        assert len(blobs) == 1
+        assert history.get_blob(history.put_blob(b"{}\n")) == b"{}\n"
+
+
+class TestVersions:
+    def test_newest_first_per_target(
+        self, history: History, target: Path, tmp_path: Path
+    ) -> None:
+        other = tmp_path / "copilot-flags.txt"
+        history.record(target, b"v1", "fp1")
+        history.record(other, b"flags", "fp1")
+        history.record(target, b"v2", "fp2")
+
+        assert [v.fingerprint for v in history.versions(target)] == ["fp2", "fp1"]
+        assert len(list(history.versions())) == 3
+
+    def test_listing_spans_read_chunks(
+        self, history: History, target: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(history_mod, "_READ_CHUNK", 64)
+        for i in range(50):
+            history.record(target, f"v{i}".encode(), f"fp{i}")
+        fps = [v.fingerprint for v in history.versions(target)]
+        assert fps == [f"fp{i}" for i in reversed(range(50))]
+
+    def test_torn_line_skipped(self, history: History, target: Path) -> None:
+        history.record(target, b"v1", "fp1")
+        with history.index.open("a") as f:
+            f.write('{"timestamp": 1, "tar')
+        assert [v.fingerprint for v in history.versions(target)] == ["fp1"]
+
+    def test_record_existing_only_unrecorded_content(
+        self, history: History, target: Path
+    ) -> None:
+        target.write_bytes(b"v1")
+        history.record(target, b"v1", "fp1")
+        history.record_existing(target)
+        target.write_bytes(b"hand edit")
+        history.record_existing(target)
+
+        assert [v.event for v in history.versions(target)] == [EXTERNAL, WRITE]
+
+
+class TestRollback:
+    def test_restores_previous_version(self, history: History, target: Path) -> None:
+        for content, fp in ((b"v1", "fp1"), (b"v2", "fp2")):
+            target.write_bytes(content)
+            history.record(target, content, fp)
+
+        restored = history.rollback(target)
+
+        assert restored.fingerprint == "fp1"
+        assert target.read_bytes() == b"v1"
+        latest = next(history.versions(target))
+        assert (latest.event, latest.fingerprint) == (ROLLBACK, "fp1")
+
+        history.rollback(target)  # undo the rollback
+        assert target.read_bytes() == b"v2"
+
+    def test_hand_edit_kept_restorable(self, history: History, target: Path) -> None:
+        target.write_bytes(b"v1")
+        history.record(target, b"v1", "fp1")
+        target.write_bytes(b"hand edit")
+
+        history.rollback(target, 0)
+
+        assert target.read_bytes() == b"v1"
+        contents = [history.get_blob(v.blob) for v in history.versions(target)]
+        assert b"hand edit" in contents
+
+    def test_unknown_version(self, history: History, target: Path) -> None:
+        history.record(target, b"v1")
+        with pytest.raises(IndexError, match="No version 3"):
+            history.rollback(target, 3)
+
+    def test_restores_sidecar_stamp(self, history: History, target: Path) -> None:
+        sidecar = target.with_name(f".{target.name}.twsrt")
+        for content, stamp in ((b"v1", b"# twsrt: a\n"), (b"v2", b"# twsrt: b\n")):
+            target.write_bytes(content)
+            sidecar.write_bytes(stamp)
+            history.record(target, content, sidecar=stamp)
+
+        history.rollback(target)
+
+        assert sidecar.read_bytes() == b"# twsrt: a\n"
+        sidecar.unlink()
+        history.record(target, b"v3")
+        history.rollback(target, 0)
+        assert not sidecar.exists()
+
+    def test_restores_merge_base(self, history: History, target: Path) -> None:
+        for content, base in ((b'{"v": 1}', b'{"deny":["a"]}'), (b'{"v": 2}', b"{}")):
+            history.base_path(target).parent.mkdir(parents=True, exist_ok=True)
+            history.base_path(target).write_bytes(base)
+            target.write_bytes(content)
+            history.record(target, content)
+
+        history.rollback(target)
+
+        assert history.get_base(target) == {"deny": ["a"]}
+
+    def test_base_derived_for_versions_without_one(
+        self, history: History, target: Path
+    ) -> None:
+        old = b'{"permissions": {"deny": ["Bash(rm)"], "allow": ["Read"]}}'
+        target.write_bytes(old)
+        history.record(target, old)  # before bases were recorded
+        history.put_base(target, {"deny": ["Bash(sudo)"], "ask": [], "allow": []})
+        target.write_bytes(b"{}")
+        history.record(target, b"{}")
+
+        history.rollback(target)
+
+        assert history.get_base(target) == {
+            "deny": ["Bash(rm)"],
+            "ask": [],
+            "allow": [],
+        }
+
+
+class TestHeads:
+    def test_record_existing_reads_head_not_index(
+        self, history: History, target: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        target.write_bytes(b"v1")
+        history.record(target, b"v1", "fp1")
+        monkeypatch.setattr(history_mod, "_lines_reversed", _no_index_scan)
+
+        history.record_existing(target)
+        target.write_bytes(b"hand edit")
+        history.record_existing(target)
+
+        assert history.head(target) == {
+            "blob": history.put_blob(b"hand edit"),
+            "sidecar": None,
+            "count": 2,
+        }
+
+    def test_store_without_heads_counted_once(
+        self, history: History, target: Path
+    ) -> None:
+        history.record(target, b"v1")
+        history.record(target, b"v2")
+        history.head_path(target).unlink()
+
+        history.record(target, b"v3")
+
+        assert history.head(target)["count"] == 3
+
+
+class TestRetention:
+    def test_prunes_old_versions_and_blobs(self, tmp_path: Path, target: Path) -> None:
+        history = History(tmp_path / "history", keep=3)
+        other = tmp_path / "copilot-flags.txt"
+        history.record(other, b"flags")
+        for i in range(6):
+            history.record(target, f"v{i}".encode(), f"fp{i}")
+
+        assert [v.fingerprint for v in history.versions(target)] == [
+            "fp5",
+            "fp4",
+            "fp3",
+        ]
+        assert [history.get_blob(v.blob) for v in history.versions(other)] == [b"flags"]
+        blobs = [p for p in (history.root / "objects").rglob("*") if p.is_file()]
+        assert len(blobs) == 4
+        assert history.head(target)["count"] == 3
+
+    def test_prune_waits_for_lock_and_spares_unindexed_blobs(
+        self, tmp_path: Path, target: Path
+    ) -> None:
+        history = History(tmp_path / "history", keep=1)
+        history.record(target, b"v1")
+        history.record(target, b"v2")  # count 2: pruned down to v2
+        unindexed = history.put_blob(b"stored, not indexed yet")
+        os.utime(history.index, (1, 1))  # index last written before the blob
+        done = threading.Event()
+
+        with target_lock(history.root / history_mod.LOCK_NAME):
+            worker = threading.Thread(target=lambda: (history.prune(), done.set()))
+            worker.start()
+            assert not done.wait(0.2)
+        worker.join(5)
+
+        assert done.is_set()
+        assert history.get_blob(unindexed) == b"stored, not indexed yet"
+
+    def test_keep_from_environment(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setenv(history_mod.HISTORY_KEEP_ENV, "0")
+        assert History(Path("unused")).keep == 0
+        monkeypatch.setenv(history_mod.HISTORY_KEEP_ENV, "many")
+        assert History(Path("unused")).keep == history_mod.HISTORY_KEEP
+
+
+def _no_index_scan(path: Path):
+    raise AssertionError(f"{path} scanned")
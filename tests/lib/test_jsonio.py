@@ -0,0 +1,179 @@
+"""Tests for jsonio.py: streaming JSON writer."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from twsrt.lib.jsonio import (
+    OrjsonCodec,
+    StdlibCodec,
+    select_codec,
+    write_json_stream,
+)
+
+DOCUMENT = {
+    "permissions": {
+        "deny": [f"Bash(cmd{i})" for i in range(500)],
+        "allow": ["Read", "WebFetch(domain:github.com)"],
+    },
+    "sandbox": {"enabled": True, "network": {"allowedDomains": ["github.com"]}},
+    "unicode": "Migrated: a → b",
+}
+
+
+class TestWriteJsonStream:
+    def test_indented_output_identical_to_dumps(self, tmp_path: Path) -> None:
+        target = tmp_path / "settings.json"
+        write_json_stream(DOCUMENT, target, chunk_size=128)
+        assert target.read_text() == json.dumps(DOCUMENT, indent=2) + "\n"
+
+    def test_compact_output_smaller_and_equivalent(self, tmp_path: Path) -> None:
+        indented = tmp_path / "indented.json"
+        compact = tmp_path / "compact.json"
+        write_json_stream(DOCUMENT, indented)
+        write_json_stream(DOCUMENT, compact, compact=True)
+        assert compact.stat().st_size < indented.stat().st_size
+        assert "\n" not in compact.read_text().rstrip("\n")
+        assert json.loads(compact.read_text()) == DOCUMENT
+
+    def test_creates_parent_and_leaves_no_temp_files(self, tmp_path: Path) -> None:
+        target = tmp_path / "sub" / "settings.json"
+        write_json_stream(DOCUMENT, target)
+        assert [p.name for p in target.parent.iterdir()] == ["settings.json"]
+
+    def test_encoding_error_keeps_existing_target(self, tmp_path: Path) -> None:
+        target = tmp_path / "settings.json"
+        target.write_text('{"old": true}\n')
+        with pytest.raises(TypeError):
+            write_json_stream({"bad": object()}, target)
+        assert target.read_text() == '{"old": true}\n'
+        assert [p.name for p in tmp_path.iterdir()] == ["settings.json"]
+
+    def test_unchanged_target_not_replaced(self, tmp_path: Path) -> None:
+        target = tmp_path / "settings.json"
+        assert write_json_stream(DOCUMENT, target) is True
+        inode = target.stat().st_ino
+        assert write_json_stream(DOCUMENT, target) is False
+        assert target.stat().st_ino == inode
+        assert [p.name for p in tmp_path.iterdir()] == ["settings.json"]
+
+    def test_symlinked_target_written_through(self, tmp_path: Path) -> None:
+        real = tmp_path / "dotfiles" / "settings.full.json"
+        real.parent.mkdir()
+        real.write_text("{}")
+        link = tmp_path / "settings.full.json"
+        link.symlink_to(real)
+
+        assert write_json_stream(DOCUMENT, link) is True
+
+        assert link.is_symlink()
+        assert real.read_text() == json.dumps(DOCUMENT, indent=2) + "\n"
+
+    def test_preserves_existing_file_mode(self, tmp_path: Path) -> None:
+        target = tmp_path / "settings.json"
+        target.write_text("{}")
+        target.chmod(0o640)
+        write_json_stream(DOCUMENT, target)
+        assert target.stat().st_mode & 0o777 == 0o640
+
+
+# Documents chosen to hit every orjson → json fallback
+TRICKY_DOCUMENTS = [
+    DOCUMENT,
+    {},
+    [],
+    {"a": {}, "b": [], "c": [1, {"x": None}], "d": True},
+    {"floats": [1e-07, 1e-05, 0.1, 1e16, -0.0]},
+    {"nan": float("nan"), "inf": float("inf"), "n": None},
+    {1: "int key", None: "null key"},
+    {"big": 2**70},
+    {"s": 'tab\tquote"backslash\\ ctrl\x01 \u2028'},
+    {"del": "\x7f", "nested": {"k\x7f": ["\x7f"]}},
+    {
+        "deny": [f"Read(~/p{i})" for i in range(1000)],
+        "mixed": [1, "a", {"b": []}] * 300,
+    },
+    {"outer": {"inner": {1: "int key deep", "list": list(range(600))}}},
+    "bare string",
+]
+
+
+def _codecs() -> list:
+    orjson = pytest.importorskip("orjson")
+    return [StdlibCodec(), OrjsonCodec(orjson)]
+
+
+class TestCodecs:
+    @pytest.mark.parametrize("compact", [False, True])
+    @pytest.mark.parametrize("document", TRICKY_DOCUMENTS)
+    def test_orjson_output_byte_identical_to_stdlib(
+        self, document: object, compact: bool
+    ) -> None:
+        stdlib, fast = _codecs()
+        if compact:
+            expected = json.dumps(document, separators=(",", ":"))
+        else:
+            expected = json.dumps(document, indent=2)
+        assert stdlib.dumps(document, compact) == expected
+        assert fast.dumps(document, compact) == expected
+        assert "".join(fast.iterencode(document, compact)) == expected
+        assert "".join(stdlib.iterencode(document, compact)) == expected
+
+    def test_loads_falls_back_for_stdlib_only_input(self) -> None:
+        _, fast = _codecs()
+        data = '{"nan": NaN, "big": 123456789012345678901234567890}'
+        result = fast.loads(data)
+        assert result["big"] == 123456789012345678901234567890
+
+    @pytest.mark.parametrize("codec_name", ["json", "orjson"])
+    @pytest.mark.parametrize("as_bytes", [False, True])
+    def test_wide_integers_round_trip_unchanged(
+        self, codec_name: str, as_bytes: bool
+    ) -> None:
+        if codec_name == "orjson":
+            pytest.importorskip("orjson")
+        codec = select_codec(codec_name)
+        assert codec.name == codec_name
+        document = {
+            "u64max": 18446744073709551615,
+            "above": 18446744073709551616,
+            "below": -9223372036854775809,
+            "list": [1, 2**70, -(2**70)],
+        }
+        text = json.dumps(document, indent=2)
+
+        result = codec.loads(text.encode() if as_bytes else text)
+
+        assert result == document
+        assert all(isinstance(v, int) for v in result["list"])
+        assert codec.dumps(result) == text
+
+    def test_loads_invalid_raises_json_decode_error(self) -> None:
+        for codec in _codecs():
+            with pytest.raises(json.JSONDecodeError):
+                codec.loads(b"{not json")
+
+    def test_select_codec_forced_stdlib(self) -> None:
+        assert select_codec("json").name == "json"
+
+    def test_select_codec_prefers_orjson_when_installed(self) -> None:
+        pytest.importorskip("orjson")
+        assert select_codec(None).name == "orjson"
+
+    def test_orjson_iterencode_splits_large_sections(self) -> None:
+        _, fast = _codecs()
+        document = {"permissions": {"deny": [f"Read(~/p{i}/**)" for i in range(20000)]}}
+
+        fragments = list(fast.iterencode(document))
+
+        assert "".join(fragments) == json.dumps(document, indent=2)
+        assert max(map(len, fragments)) < len("".join(fragments)) / 10
+
+    def test_stream_identical_across_codecs(self, tmp_path: Path) -> None:
+        outputs = []
+        for i, codec in enumerate(_codecs()):
+            target = tmp_path / f"out{i}.json"
+            write_json_stream(DOCUMENT, target, chunk_size=64, codec=codec)
+            outputs.append(target.read_bytes())
+        assert outputs[0] == outputs[1]
@@ -0,0 +1,74 @@
+"""Tests for launch.py: cached agent flags and launch commands."""
+
+from pathlib import Path
+
+import pytest
+
+from twsrt.lib.cache import OutputCache
+from twsrt.lib.launch import agent_flags, launch_command
+from twsrt.lib.models import AppConfig
+
+
+@pytest.fixture
+def config(tmp_path: Path) -> AppConfig:
+    srt = tmp_path / "srt.json"
+    srt.write_text('{"network": {"allowedDomains": ["github.com"]}}')
+    bash = tmp_path / "bash-rules.json"
+    bash.write_text('{"deny": ["rm"], "ask": ["git push"]}')
+    return AppConfig(srt_path=srt, bash_rules_path=bash)
+
+
+class TestAgentFlags:
+    def test_full_profile_flags(self, config: AppConfig) -> None:
+        flags = agent_flags("copilot", config, "full", "1.0")
+        assert flags[:2] == ["--allow-url", "github.com"]
+        assert "shell(rm)" in flags
+        assert "shell(git push)" in flags
+
+    def test_yolo_profile_flags(self, config: AppConfig) -> None:
+        flags = agent_flags("copilot", config, "yolo", "1.0")
+        assert flags[0] == "--yolo"
+        assert "shell(git push)" not in flags
+
+    def test_warm_cache_skips_parsing(
+        self, config: AppConfig, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        import twsrt.lib.sources as sources
+
+        cache = OutputCache(tmp_path / "cache")
+        first = agent_flags("copilot", config, "full", "1.0", cache=cache)
+
+        def fail(path: Path):
+            raise AssertionError("sources parsed on a warm cache")
+
+        monkeypatch.setattr(sources, "read_srt", fail)
+        assert agent_flags("copilot", config, "full", "1.0", cache=cache) == first
+
+    def test_source_change_regenerates(self, config: AppConfig, tmp_path: Path) -> None:
+        cache = OutputCache(tmp_path / "cache")
+        agent_flags("copilot", config, "full", "1.0", cache=cache)
+        config.bash_rules_path.write_text('{"deny": ["sudo"], "ask": []}')
+
+        flags = agent_flags("copilot", config, "full", "1.0", cache=cache)
+        assert "shell(sudo)" in flags
+        assert "shell(rm)" not in flags
+
+
+class TestLaunchCommand:
+    def test_plain(self) -> None:
+        assert launch_command("copilot", ["--yolo"], ["-p", "hi"]) == [
+            "copilot",
+            "--yolo",
+            "-p",
+            "hi",
+        ]
+
+    def test_srt_wrapped_is_shell_quoted(self) -> None:
+        command = launch_command(
+            "copilot", ["--deny-tool", "shell(rm)"], ["-p", "a b"], srt=True
+        )
+        assert command == [
+            "srt",
+            "-c",
+            "copilot --deny-tool 'shell(rm)' -p 'a b'",
+        ]
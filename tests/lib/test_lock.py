@@ -0,0 +1,116 @@
+"""Tests for lock.py: cross-process lock around target writes."""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from twsrt.lib import lock
+from twsrt.lib.lock import LockTimeout, target_lock
+
+
+@pytest.fixture
+def lock_file(tmp_path: Path) -> Path:
+    return tmp_path / ".claude" / ".twsrt.lock"
+
+
+def _hold(path: Path, seconds: float, acquired: threading.Event) -> None:
+    with target_lock(path):
+        acquired.set()
+        time.sleep(seconds)
+
+
+class TestTargetLock:
+    def test_uncontended(self, lock_file: Path) -> None:
+        with target_lock(lock_file) as waited:
+            assert waited is False
+            assert lock_file.read_text() == f"{os.getpid()}\n"
+
+    def test_waits_for_holder(self, lock_file: Path) -> None:
+        acquired = threading.Event()
+        holder = threading.Thread(target=_hold, args=(lock_file, 0.3, acquired))
+        holder.start()
+        acquired.wait()
+        owners: list[int | None] = []
+        with target_lock(lock_file, timeout=5, on_wait=owners.append) as waited:
+            assert waited is True
+        holder.join()
+        assert owners == [os.getpid()]
+
+    def test_timeout(self, lock_file: Path) -> None:
+        acquired = threading.Event()
+        holder = threading.Thread(target=_hold, args=(lock_file, 0.5, acquired))
+        holder.start()
+        acquired.wait()
+        with pytest.raises(LockTimeout, match="held by pid"):
+            with target_lock(lock_file, timeout=0.1):
+                pass
+        holder.join()
+
+    def test_lock_of_dead_process_is_free(self, lock_file: Path) -> None:
+        lock_file.parent.mkdir(parents=True)
+        code = (
+            "import os, fcntl, sys; fd = os.open(sys.argv[1], os.O_RDWR | os.O_CREAT);"
+            "fcntl.flock(fd, fcntl.LOCK_EX); os._exit(0)"
+        )
+        subprocess.run([sys.executable, "-c", code, str(lock_file)], check=True)
+        with target_lock(lock_file, timeout=0.1) as waited:
+            assert waited is False
+
+
+class TestPidFileFallback:
+    @pytest.fixture(autouse=True)
+    def no_flock(self):
+        with patch.object(lock, "_acquire_flock", return_value=None):
+            yield
+
+    def test_acquire_and_release(self, lock_file: Path) -> None:
+        pid_file = lock_file.with_name(".twsrt.lock.pid")
+        with target_lock(lock_file):
+            assert pid_file.read_text() == f"{os.getpid()}\n"
+        assert not pid_file.exists()
+
+    def test_stale_pid_taken_over(self, lock_file: Path) -> None:
+        dead = subprocess.run(
+            [sys.executable, "-c", "import os; print(os.getpid())"],
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+        lock_file.parent.mkdir(parents=True)
+        lock_file.with_name(".twsrt.lock.pid").write_text(f"{dead}\n")
+        with target_lock(lock_file, timeout=0.1) as waited:
+            assert waited is False
+
+    def test_live_pid_times_out(self, lock_file: Path) -> None:
+        lock_file.parent.mkdir(parents=True)
+        lock_file.with_name(".twsrt.lock.pid").write_text(f"{os.getppid()}\n")
+        with pytest.raises(LockTimeout):
+            with target_lock(lock_file, timeout=0.1):
+                pass
+
+    def test_old_pid_file_of_live_owner_kept(self, lock_file: Path) -> None:
+        lock_file.parent.mkdir(parents=True)
+        pid_file = lock_file.with_name(".twsrt.lock.pid")
+        pid_file.write_text(f"{os.getppid()}\n")
+        old = time.time() - lock.STALE_AFTER - 1
+        os.utime(pid_file, (old, old))
+        with pytest.raises(LockTimeout):
+            with target_lock(lock_file, timeout=0.1):
+                pass
+
+    def test_old_pid_file_without_owner_taken_over(self, lock_file: Path) -> None:
+        lock_file.parent.mkdir(parents=True)
+        pid_file = lock_file.with_name(".twsrt.lock.pid")
+        pid_file.write_text("")
+        with pytest.raises(LockTimeout):
+            with target_lock(lock_file, timeout=0.1):
+                pass
+        old = time.time() - lock.STALE_AFTER - 1
+        os.utime(pid_file, (old, old))
+        with target_lock(lock_file, timeout=0.1) as waited:
+            assert waited is False
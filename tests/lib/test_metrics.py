@@ -0,0 +1,94 @@
+"""Tests for metrics.py: OpenMetrics textfile export."""
+
+from pathlib import Path
+
+from twsrt.lib.metrics import Metrics, rule_counts, sections
+from twsrt.lib.models import Action, DiffEntry, DiffResult, Scope, SecurityRule, Source
+
+
+class TestMetrics:
+    def test_render_families_in_order(self) -> None:
+        metrics = Metrics()
+        metrics.set("twsrt_drift", 1, agent="claude", profile="full")
+        metrics.set(
+            "twsrt_rules", 3, source="bash_rules", scope="execute", action="deny"
+        )
+
+        assert metrics.render().splitlines() == [
+            "# TYPE twsrt_rules gauge",
+            "# HELP twsrt_rules Rules parsed from the canonical sources.",
+            'twsrt_rules{source="bash_rules",scope="execute",action="deny"} 3',
+            "# TYPE twsrt_drift gauge",
+            "# HELP twsrt_drift 1 if the target differs from the generated document.",
+            'twsrt_drift{agent="claude",profile="full"} 1',
+            "# EOF",
+        ]
+
+    def test_label_values_escaped(self) -> None:
+        metrics = Metrics()
+        metrics.set("twsrt_target_bytes", 10, target='C:\\a "b"\n')
+
+        assert 'target="C:\\\\a \\"b\\"\\n"} 10' in metrics.render()
+
+    def test_diff_counts_per_kind(self) -> None:
+        result = DiffResult.from_changes(
+            "claude",
+            [
+                DiffEntry("missing", "permissions.deny", "Bash(rm)", new="Bash(rm)"),
+                DiffEntry("missing", "permissions.deny", "Bash(dd)", new="Bash(dd)"),
+            ],
+        )
+        metrics = Metrics()
+        metrics.add_diff("claude", "full", result)
+
+        text = metrics.render()
+        assert (
+            'twsrt_drift_entries{agent="claude",profile="full",kind="missing"} 2'
+            in text
+        )
+        assert (
+            'twsrt_drift_entries{agent="claude",profile="full",kind="extra"} 0' in text
+        )
+        assert 'twsrt_drift{agent="claude",profile="full"} 1' in text
+
+    def test_write_replaces_file_atomically(self, tmp_path: Path) -> None:
+        path = tmp_path / "textfile" / "twsrt.prom"
+        Metrics().write(path, "generate")
+        Metrics().write(path, "diff")
+
+        text = path.read_text()
+        assert 'twsrt_last_success_timestamp_seconds{command="diff"}' in text
+        assert "generate" not in text
+        assert text.endswith("# EOF\n")
+        assert [p.name for p in path.parent.iterdir()] == ["twsrt.prom"]
+
+
+class TestHelpers:
+    def test_rule_counts(self) -> None:
+        rules = [
+            SecurityRule(Scope.EXECUTE, Action.DENY, "rm", Source.BASH_RULES),
+            SecurityRule(Scope.EXECUTE, Action.DENY, "dd", Source.BASH_RULES),
+            SecurityRule(Scope.NETWORK, Action.ALLOW, "a.com", Source.SRT_NETWORK),
+        ]
+
+        assert rule_counts(rules) == [
+            ["bash_rules", "execute", "deny", 2],
+            ["srt_network", "network", "allow", 1],
+        ]
+
+    def test_sections_of_settings(self) -> None:
+        document = {
+            "permissions": {"deny": ["a", "b"], "ask": []},
+            "sandbox": {"enabled": True, "network": {"allowedDomains": ["x"]}},
+        }
+
+        assert sections(document) == {
+            "permissions.deny": 2,
+            "permissions.ask": 0,
+            "sandbox.network.allowedDomains": 1,
+        }
+
+    def test_sections_of_flags(self) -> None:
+        flags = ["--yolo", "--deny-tool 'shell(rm)'", "--deny-tool 'shell(dd)'"]
+
+        assert sections(flags) == {"--yolo": 1, "--deny-tool": 2}
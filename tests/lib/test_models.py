@@ -180,6 +180,24 @@ class TestYoloPath:
         assert result == Path("config.yolo")
 
 
+class TestExpandHome:
+    def test_tilde_against_given_home(self) -> None:
+        from twsrt.lib.models import expand_home
+
+        assert expand_home("~/.ssh", Path("/home/alice")) == Path("/home/alice/.ssh")
+        assert expand_home("~", Path("/home/alice")) == Path("/home/alice")
+
+    def test_absolute_path_unchanged(self) -> None:
+        from twsrt.lib.models import expand_home
+
+        assert expand_home("/etc/hosts", Path("/home/alice")) == Path("/etc/hosts")
+
+    def test_no_home_uses_current_user(self) -> None:
+        from twsrt.lib.models import expand_home
+
+        assert expand_home("~/.ssh") == Path("~/.ssh").expanduser()
+
+
 class TestAppConfigYoloFields:
     def test_yolo_defaults_to_false(self) -> None:
         config = AppConfig()
@@ -192,3 +210,51 @@ class TestAppConfigYoloFields:
     def test_copilot_yolo_path_defaults_to_none(self) -> None:
         config = AppConfig()
         assert config.copilot_yolo_path is None
+
+
+class TestForProfile:
+    def test_builtin_yolo_applies_overrides(self) -> None:
+        config = AppConfig(sandbox_overrides={"yolo": {"enabled": True}})
+        yolo = config.for_profile("yolo")
+        assert yolo.yolo is True
+        assert yolo.sandbox_config == {"enabled": True}
+        # Original untouched
+        assert config.yolo is False
+        assert config.sandbox_config == {}
+
+    def test_named_profile_applied_to_copy(self) -> None:
+        from twsrt.lib.models import AskPolicy, Profile
+
+        config = AppConfig(
+            sandbox_config={"enabled": False},
+            profiles={
+                "ci": Profile(
+                    name="ci",
+                    ask_policy=AskPolicy.DENY,
+                    sandbox_overrides={"enabled": True},
+                )
+            },
+        )
+        ci = config.for_profile("ci")
+        assert ci.profile == "ci"
+        assert ci.effective_ask_policy == AskPolicy.DENY
+        assert ci.sandbox_config == {"enabled": True}
+        assert config.sandbox_config == {"enabled": False}
+
+    def test_unknown_profile_raises(self) -> None:
+        with pytest.raises(ValueError, match="Unknown profile 'nope'"):
+            AppConfig().for_profile("nope")
+
+    def test_effective_ask_policy_defaults(self) -> None:
+        from twsrt.lib.models import AskPolicy
+
+        assert AppConfig().effective_ask_policy == AskPolicy.ASK
+        assert AppConfig(yolo=True).effective_ask_policy == AskPolicy.SKIP
+
+
+class TestVariantPath:
+    def test_compound_extension(self) -> None:
+        from twsrt.lib.models import variant_path
+
+        result = variant_path(Path("/h/.claude/settings.full.json"), "ci")
+        assert result == Path("/h/.claude/settings.ci.json")
@@ -0,0 +1,89 @@
+"""Tests for modes.py: stamped variants and full/yolo switching."""
+
+from pathlib import Path
+
+import pytest
+
+from twsrt.lib.models import AppConfig
+from twsrt.lib.modes import current_mode, refresh_variant, switch_mode
+from twsrt.lib.stamps import read_stamp
+
+
+@pytest.fixture
+def config(tmp_path: Path) -> AppConfig:
+    srt = tmp_path / "srt.json"
+    srt.write_text('{"network": {"allowedDomains": ["github.com"]}}')
+    bash = tmp_path / "bash-rules.json"
+    bash.write_text('{"deny": ["rm"], "ask": ["git push"]}')
+    return AppConfig(
+        srt_path=srt,
+        bash_rules_path=bash,
+        claude_settings_path=tmp_path / ".claude" / "settings.full.json",
+    )
+
+
+def _forbid_parsing(monkeypatch: pytest.MonkeyPatch) -> None:
+    import twsrt.lib.sources as sources
+
+    def fail(path: Path):
+        raise AssertionError("sources parsed for a fresh variant")
+
+    monkeypatch.setattr(sources, "read_srt", fail)
+
+
+class TestSwitchMode:
+    def test_first_switch_generates_and_links(self, config: AppConfig) -> None:
+        result = switch_mode(config, "yolo", "1.0")
+
+        yolo_target = config.claude_settings_path.with_name("settings.yolo.json")
+        assert result.regenerated is True
+        assert result.target == yolo_target
+        assert config.symlink_anchor.resolve() == yolo_target.resolve()
+        assert read_stamp("claude", yolo_target) is not None
+
+    def test_fresh_variant_only_flips_symlink(
+        self, config: AppConfig, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        switch_mode(config, "full", "1.0")
+        switch_mode(config, "yolo", "1.0")
+        _forbid_parsing(monkeypatch)
+
+        result = switch_mode(config, "full", "1.0")
+
+        assert result.regenerated is False
+        assert current_mode(config) == "full"
+
+    def test_source_change_regenerates(self, config: AppConfig) -> None:
+        switch_mode(config, "full", "1.0")
+        config.bash_rules_path.write_text('{"deny": ["sudo"], "ask": []}')
+
+        result = switch_mode(config, "full", "1.0")
+
+        assert result.regenerated is True
+        assert "Bash(sudo)" in result.target.read_text()
+
+    def test_invalid_variant_not_linked(self, config: AppConfig) -> None:
+        switch_mode(config, "full", "1.0")
+        switch_mode(config, "yolo", "1.0")
+        config.claude_settings_path.write_text("{broken")
+
+        with pytest.raises(ValueError):
+            switch_mode(config, "full", "1.0")
+        assert current_mode(config) == "yolo"
+
+
+class TestRefreshVariant:
+    def test_refresh_leaves_anchor_alone(self, config: AppConfig) -> None:
+        switch_mode(config, "full", "1.0")
+
+        assert refresh_variant(config, "yolo", "1.0") is not None
+        assert refresh_variant(config, "yolo", "1.0") is None
+        assert current_mode(config) == "full"
+
+
+class TestCurrentMode:
+    def test_unmanaged_anchor(self, config: AppConfig) -> None:
+        assert current_mode(config) is None
+        config.symlink_anchor.parent.mkdir(parents=True)
+        config.symlink_anchor.write_text("{}")
+        assert current_mode(config) is None
@@ -0,0 +1,116 @@
+"""Tests for projects.py: monorepo overlay discovery and per-project writes."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from twsrt.lib.models import Action, AppConfig, Scope, SecurityRule, Source
+from twsrt.lib.projects import (
+    FAILED,
+    UNCHANGED,
+    WROTE,
+    find_projects,
+    generate_projects,
+    read_overlay,
+)
+
+GLOBAL_RULES = [
+    SecurityRule(Scope.EXECUTE, Action.DENY, "rm", Source.BASH_RULES),
+    SecurityRule(Scope.NETWORK, Action.ALLOW, "github.com", Source.SRT_NETWORK),
+]
+
+
+def _project(root: Path, rel: str, overlay: str) -> Path:
+    project = root / rel
+    project.mkdir(parents=True)
+    (project / ".twsrt.toml").write_text(overlay)
+    return project
+
+
+class TestFindProjects:
+    def test_finds_overlays_and_prunes(self, tmp_path: Path) -> None:
+        a = _project(tmp_path, "services/a", "")
+        b = _project(tmp_path, "services/b/nested", "")
+        _project(tmp_path, "node_modules/pkg", "")
+        _project(tmp_path, ".git/x", "")
+
+        assert find_projects(tmp_path) == [a, b]
+
+
+class TestReadOverlay:
+    def test_overlay_rules(self, tmp_path: Path) -> None:
+        project = _project(
+            tmp_path,
+            "svc",
+            '[network]\nallowedDomains = ["api.internal"]\n'
+            '[bash]\nask = ["make deploy"]\n',
+        )
+        rules = read_overlay(project / ".twsrt.toml")
+        assert rules == [
+            SecurityRule(
+                Scope.NETWORK, Action.ALLOW, "api.internal", Source.SRT_NETWORK
+            ),
+            SecurityRule(Scope.EXECUTE, Action.ASK, "make deploy", Source.BASH_RULES),
+        ]
+
+    def test_invalid_toml_raises(self, tmp_path: Path) -> None:
+        project = _project(tmp_path, "svc", "[network\n")
+        with pytest.raises(ValueError, match="Invalid TOML"):
+            read_overlay(project / ".twsrt.toml")
+
+
+class TestGenerateProjects:
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_global_plus_overlay(self, tmp_path: Path, workers: int) -> None:
+        a = _project(tmp_path, "a", '[network]\nallowedDomains = ["a.internal"]\n')
+        b = _project(tmp_path, "b", '[bash]\nask = ["make deploy"]\n')
+
+        results = generate_projects([a, b], GLOBAL_RULES, AppConfig(), workers=workers)
+
+        assert [r.status for r in results] == [WROTE, WROTE]
+        settings_a = json.loads((a / ".claude" / "settings.json").read_text())
+        assert settings_a["sandbox"]["network"]["allowedDomains"] == [
+            "github.com",
+            "a.internal",
+        ]
+        assert "Bash(rm)" in settings_a["permissions"]["deny"]
+        settings_b = json.loads((b / ".claude" / "settings.json").read_text())
+        assert "Bash(make deploy)" in settings_b["permissions"]["ask"]
+
+    def test_unchanged_project_not_rewritten(self, tmp_path: Path) -> None:
+        a = _project(tmp_path, "a", "")
+        generate_projects([a], GLOBAL_RULES, AppConfig(), workers=1)
+        target = a / ".claude" / "settings.json"
+        mtime = target.stat().st_mtime_ns
+
+        results = generate_projects([a], GLOBAL_RULES, AppConfig(), workers=1)
+
+        assert results[0].status == UNCHANGED
+        assert target.stat().st_mtime_ns == mtime
+
+    def test_selective_merge_preserves_project_keys(self, tmp_path: Path) -> None:
+        a = _project(tmp_path, "a", "")
+        target = a / ".claude" / "settings.json"
+        target.parent.mkdir()
+        target.write_text(json.dumps({"hooks": {"Stop": []}}))
+
+        generate_projects([a], GLOBAL_RULES, AppConfig(), workers=1)
+
+        assert json.loads(target.read_text())["hooks"] == {"Stop": []}
+
+    def test_bad_overlay_fails_only_that_project(self, tmp_path: Path) -> None:
+        bad = _project(tmp_path, "bad", "[oops\n")
+        good = _project(tmp_path, "good", "")
+
+        results = generate_projects([bad, good], GLOBAL_RULES, AppConfig(), workers=1)
+
+        assert [r.status for r in results] == [FAILED, WROTE]
+
+    def test_dry_run_writes_nothing(self, tmp_path: Path) -> None:
+        a = _project(tmp_path, "a", "")
+        results = generate_projects(
+            [a], GLOBAL_RULES, AppConfig(), workers=1, dry_run=True
+        )
+        assert results[0].status == WROTE
+        assert not (a / ".claude").exists()
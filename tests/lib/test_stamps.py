@@ -0,0 +1,138 @@
+"""Tests for stamps.py: provenance stamps and target status."""
+
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from twsrt.lib.models import AppConfig
+from twsrt.lib.stamps import (
+    CURRENT,
+    MISSING,
+    MODIFIED,
+    STALE,
+    STAMP_KEY,
+    UNSTAMPED,
+    read_stamp,
+    sidecar_path,
+    target_status,
+)
+from twsrt.lib.targets import write_claude, write_copilot
+
+FLAGS = ["--deny-tool 'shell(rm)'", "--allow-url 'github.com'"]
+
+
+def _settings() -> dict:
+    return {
+        "permissions": {"deny": ["Bash(rm)"], "ask": [], "allow": []},
+        "sandbox": {"network": {"allowedDomains": ["github.com"]}},
+    }
+
+
+@pytest.fixture
+def config(tmp_path: Path) -> AppConfig:
+    return AppConfig(
+        claude_settings_path=tmp_path / ".claude" / "settings.full.json",
+        copilot_output_path=tmp_path / "copilot-flags.txt",
+    )
+
+
+class TestClaudeStamp:
+    def test_written_settings_carry_stamp(self, config: AppConfig) -> None:
+        write_claude(_settings(), config, fingerprint="fp1")
+        data = json.loads(config.claude_settings_path.read_text())
+        assert data[STAMP_KEY]["fingerprint"] == "fp1"
+        assert target_status("claude", config.claude_settings_path, "fp1") == CURRENT
+
+    def test_sources_changed(self, config: AppConfig) -> None:
+        write_claude(_settings(), config, fingerprint="fp1")
+        assert target_status("claude", config.claude_settings_path, "fp2") == STALE
+
+    def test_out_of_band_edit_of_managed_section(self, config: AppConfig) -> None:
+        write_claude(_settings(), config, fingerprint="fp1")
+        target = config.claude_settings_path
+        data = json.loads(target.read_text())
+        data["permissions"]["deny"].append("Bash(sudo)")
+        target.write_text(json.dumps(data))
+
+        assert target_status("claude", target, "fp1") == MODIFIED
+
+    def test_unmanaged_edit_keeps_current(self, config: AppConfig) -> None:
+        write_claude(_settings(), config, fingerprint="fp1")
+        target = config.claude_settings_path
+        data = json.loads(target.read_text())
+        data["hooks"] = {"PreToolUse": []}
+        target.write_text(json.dumps(data))
+
+        assert target_status("claude", target, "fp1") == CURRENT
+
+    def test_unstamped_write_drops_old_stamp(self, config: AppConfig) -> None:
+        write_claude(_settings(), config, fingerprint="fp1")
+        write_claude(_settings(), config)
+
+        assert read_stamp("claude", config.claude_settings_path) is None
+        assert target_status("claude", config.claude_settings_path, "fp1") == UNSTAMPED
+
+    def test_missing_target(self, config: AppConfig) -> None:
+        assert target_status("claude", config.claude_settings_path, "fp") == MISSING
+
+
+class TestCopilotStamp:
+    def test_shell_format_stamp_sidecar(self, config: AppConfig) -> None:
+        assert write_copilot(FLAGS, config, fingerprint="fp1") is not None
+        target = config.copilot_output_path
+        assert "# twsrt:" not in target.read_text()
+        assert sidecar_path(target).exists()
+        assert target_status("copilot", target, "fp1") == CURRENT
+        assert target_status("copilot", target, "fp2") == STALE
+
+    @pytest.mark.skipif(shutil.which("bash") is None, reason="needs bash")
+    def test_stamped_shell_snippet_keeps_trailing_arguments(
+        self, config: AppConfig
+    ) -> None:
+        """The snippet is pasted before further arguments of the same command."""
+        assert write_copilot(FLAGS, config, fingerprint="fp1") is not None
+        script = (
+            'printargs() { printf "%s\\n" "$@"; }\n'
+            f'eval "printargs $(cat {config.copilot_output_path})\n --model gpt"'
+        )
+
+        result = subprocess.run(
+            ["bash", "-c", script], capture_output=True, text=True, check=True
+        )
+        assert result.stdout.splitlines() == [
+            "--deny-tool",
+            "shell(rm)",
+            "--allow-url",
+            "github.com",
+            "--model",
+            "gpt",
+        ]
+
+    def test_legacy_stamp_comment_read(self, config: AppConfig) -> None:
+        target = config.copilot_output_path
+        target.write_text(
+            "--deny-tool 'shell(rm)' \\\n--allow-url 'github.com' \\\n"
+            "# twsrt: fingerprint=fp1 managed=x\n"
+        )
+        stamp = read_stamp("copilot", target)
+        assert stamp is not None and stamp.fingerprint == "fp1"
+
+    def test_shell_flag_edit_detected(self, config: AppConfig) -> None:
+        assert write_copilot(FLAGS, config, fingerprint="fp1") is not None
+        target = config.copilot_output_path
+        target.write_text(target.read_text().replace("rm", "rmdir"))
+        assert target_status("copilot", target, "fp1") == MODIFIED
+
+    @pytest.mark.parametrize("fmt", ["nul", "json"])
+    def test_argv_formats_use_sidecar(self, config: AppConfig, fmt: str) -> None:
+        config.copilot_format = fmt
+        assert write_copilot(FLAGS, config, fingerprint="fp1") is not None
+        target = config.copilot_output_path
+        assert sidecar_path(target).exists()
+        assert target_status("copilot", target, "fp1") == CURRENT
+
+        write_copilot(FLAGS, config)
+        assert not sidecar_path(target).exists()
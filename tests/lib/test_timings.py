@@ -0,0 +1,85 @@
+"""Tests for timings.py: per-stage wall/CPU time and peak allocations."""
+
+import json
+
+from twsrt.lib import timings
+from twsrt.lib.timings import Timings
+
+
+class TestTimings:
+    def test_nested_stages_in_entry_order(self) -> None:
+        recorder = Timings(trace_memory=False)
+        with recorder.stage("outer"):
+            with recorder.stage("inner"):
+                pass
+
+        assert [(s.name, s.depth, s.calls) for s in recorder.stages] == [
+            ("outer", 0, 1),
+            ("inner", 1, 1),
+        ]
+        assert recorder.stages[0].wall >= recorder.stages[1].wall
+        assert recorder.stages[0].peak_bytes is None
+
+    def test_repeated_stage_summed(self) -> None:
+        recorder = Timings(trace_memory=False)
+        for _ in range(3):
+            with recorder.stage("finish"):
+                pass
+
+        assert len(recorder.stages) == 1
+        assert recorder.stages[0].calls == 3
+
+    def test_peak_includes_freed_child_allocations(self) -> None:
+        with timings.record() as recorder:
+            with timings.stage("outer"):
+                with timings.stage("inner"):
+                    block = bytearray(4 * 2**20)
+                    del block
+                with timings.stage("after"):
+                    pass
+
+        peaks = {s.name: s.peak_bytes for s in recorder.stages}
+        assert peaks["inner"] >= 4 * 2**20
+        assert peaks["outer"] >= 4 * 2**20
+        assert peaks["total"] >= 4 * 2**20
+        assert peaks["after"] < 2**20
+
+    def test_render(self) -> None:
+        recorder = Timings()
+        with recorder.stage("read_srt"):
+            pass
+
+        assert recorder.render().splitlines()[1].startswith("read_srt")
+        data = json.loads(recorder.render("json"))
+        assert data["timings"][0]["stage"] == "read_srt"
+        assert set(data["timings"][0]) == {
+            "stage",
+            "depth",
+            "calls",
+            "wall_ms",
+            "cpu_ms",
+            "peak_bytes",
+        }
+
+
+class TestRecord:
+    def test_stage_is_noop_outside_record(self) -> None:
+        assert timings.stage("a") is timings.stage("b")
+
+    def test_records_only_inside_block(self) -> None:
+        with timings.record(trace_memory=False) as recorder:
+            with timings.stage("sources"):
+                pass
+        with timings.stage("later"):
+            pass
+
+        assert [s.name for s in recorder.stages] == ["total", "sources"]
+
+    def test_profiler_stopped_on_exit(self) -> None:
+        import pstats
+
+        with timings.record(trace_memory=False, profile=True) as recorder:
+            sorted(range(1000))
+
+        stats = pstats.Stats(recorder.profiler)
+        assert stats.total_calls > 0
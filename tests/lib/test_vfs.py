@@ -0,0 +1,133 @@
+"""Tests for vfs.py: OS, in-memory and archive filesystems."""
+
+import io
+import json
+import tarfile
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from twsrt.lib import vfs
+from twsrt.lib.claude import _is_directory_pattern, selective_merge
+from twsrt.lib.config import load_config
+from twsrt.lib.sources import read_bash_rules, read_srt
+from twsrt.lib.symlink import ensure_symlink, prepare_claude_target
+from twsrt.lib.vfs import ArchiveFileSystem, MemoryFileSystem
+
+HOME = Path("/home/alice")
+SRT = {"filesystem": {"denyRead": ["~/.ssh"]}, "network": {"allowedDomains": ["x.io"]}}
+
+
+def _tar(path: Path, files: dict[str, bytes], links: dict[str, str]) -> Path:
+    with tarfile.open(path, "w:gz") as tar:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+        for name, target in links.items():
+            info = tarfile.TarInfo(name)
+            info.type = tarfile.SYMTYPE
+            info.linkname = target
+            tar.addfile(info)
+    return path
+
+
+class TestMemoryFileSystem:
+    def test_files_dirs_and_symlinks(self) -> None:
+        fs = MemoryFileSystem({"/h/.claude/settings.full.json": "{}"})
+        fs.symlink("settings.full.json", Path("/h/.claude/settings.json"))
+
+        assert fs.exists(Path("/h/.claude"))
+        assert fs.is_symlink(Path("/h/.claude/settings.json"))
+        assert fs.read_bytes(Path("/h/.claude/settings.json")) == b"{}"
+        assert fs.resolve(Path("/h/.claude/settings.json")) == Path(
+            "/h/.claude/settings.full.json"
+        )
+        with pytest.raises(FileNotFoundError):
+            fs.read_bytes(Path("/h/missing"))
+
+    def test_symlink_loop(self) -> None:
+        fs = MemoryFileSystem()
+        fs.symlink("b", Path("/a"))
+        fs.symlink("a", Path("/b"))
+        with pytest.raises(OSError, match="symbolic links"):
+            fs.read_bytes(Path("/a"))
+
+    def test_sources_and_config(self) -> None:
+        fs = MemoryFileSystem(
+            {
+                "/h/srt.json": json.dumps(SRT),
+                "/h/bash.json": json.dumps({"deny": ["rm"]}),
+                "/h/config.toml": "[targets]\ncompact = true\n",
+            }
+        )
+        assert [r.pattern for r in read_srt(Path("/h/srt.json"), fs).rules] == [
+            "~/.ssh",
+            "x.io",
+        ]
+        assert read_bash_rules(Path("/h/bash.json"), fs)[0].pattern == "rm"
+        assert load_config(Path("/h/config.toml"), fs=fs).compact is True
+
+    def test_directory_pattern(self) -> None:
+        fs = MemoryFileSystem({"/h/.netrc": ""})
+        assert _is_directory_pattern("~/.netrc", Path("/h"), fs) is False
+        assert _is_directory_pattern("~/.ssh", Path("/h"), fs) is True
+
+    def test_migrate_and_link(self) -> None:
+        anchor = Path("/h/.claude/settings.json")
+        target = Path("/h/.claude/settings.full.json")
+        fs = MemoryFileSystem({anchor: '{"hooks": {}}'})
+
+        assert prepare_claude_target(anchor, target, fs).startswith("Migrated")
+        ensure_symlink(target, anchor, fs)
+
+        assert fs.readlink(anchor) == "settings.full.json"
+        assert fs.read_bytes(anchor) == b'{"hooks": {}}'
+
+    def test_selective_merge(self) -> None:
+        target = Path("/h/.claude/settings.full.json")
+        fs = MemoryFileSystem({target: json.dumps({"hooks": {"Stop": []}})})
+        generated = {"permissions": {"deny": ["Bash(rm)"]}, "sandbox": {}}
+
+        with vfs.use(fs):
+            merged = selective_merge(target, generated)
+
+        assert merged["hooks"] == {"Stop": []}
+        assert merged["permissions"]["deny"] == ["Bash(rm)"]
+
+
+class TestArchiveFileSystem:
+    def test_tar_members_and_symlinks(self, tmp_path: Path) -> None:
+        archive = _tar(
+            tmp_path / "home.tar.gz",
+            {"./.claude/settings.full.json": b"{}", "./.srt-settings.json": b"[]"},
+            {"./.claude/settings.json": "settings.full.json"},
+        )
+        fs = ArchiveFileSystem(archive, mount=HOME)
+
+        assert fs.read_bytes(HOME / ".srt-settings.json") == b"[]"
+        assert fs.read_bytes(HOME / ".claude" / "settings.json") == b"{}"
+        assert fs.is_symlink(HOME / ".claude" / "settings.json")
+        assert fs.exists(HOME / ".claude")
+        assert not fs.exists(Path("/etc/passwd"))
+        with pytest.raises(OSError, match="Read-only"):
+            fs.write_bytes(HOME / "x", b"")
+        fs.close()
+        assert [p.name for p in tmp_path.iterdir()] == ["home.tar.gz"]
+
+    def test_zip(self, tmp_path: Path) -> None:
+        archive = tmp_path / "home.zip"
+        with zipfile.ZipFile(archive, "w") as z:
+            z.writestr(".config/twsrt/bash-rules.json", '{"deny": ["sudo"]}')
+
+        fs = ArchiveFileSystem(archive, mount=HOME)
+
+        rules = read_bash_rules(HOME / ".config" / "twsrt" / "bash-rules.json", fs)
+        assert rules[0].pattern == "sudo"
+
+    def test_not_an_archive(self, tmp_path: Path) -> None:
+        bogus = tmp_path / "x.tar"
+        bogus.write_text("plain text")
+        with pytest.raises(ValueError, match="Not a tar or zip"):
+            ArchiveFileSystem(bogus)